@@ -0,0 +1,337 @@
+"""
+Single-call interview sessions driven by Twilio webhooks.
+
+Instead of placing a new outbound call for the greeting, every question, every
+acknowledgment and the conclusion, a session places one call and walks the
+trucker through the whole question list on it. The TwiML flow is built up
+front as one document per step: each step speaks a question inside a speech
+<Gather>, and Twilio posts the answer to the webhook server, which stores it
+and replies with the next step.
+"""
+
+import json
+import re
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from twilio.twiml.voice_response import VoiceResponse, Gather
+from twilio.request_validator import RequestValidator
+from config import TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+from config import (
+    WEBHOOK_BASE_URL, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_VALIDATE_SIGNATURES,
+    GATHER_TIMEOUT_SECONDS, SESSION_TIMEOUT_SECONDS
+)
+from questions import DISPATCH_QUESTIONS, GREETING, ACKNOWLEDGMENT, CONCLUSION
+from twilio_client import get_twilio_client
+from leads_manager import save_lead, save_responses
+
+# Call statuses after which Twilio will not post any more answers
+FINAL_CALL_STATUSES = ("completed", "busy", "failed", "no-answer", "canceled")
+
+ANSWER_PATH = re.compile(r"^/sessions/(?P<session_id>\w+)/answer/(?P<index>\d+)$")
+STATUS_PATH = re.compile(r"^/sessions/(?P<session_id>\w+)/status$")
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+class InterviewSession:
+    def __init__(self, phone_number, questions=DISPATCH_QUESTIONS, base_url=WEBHOOK_BASE_URL):
+        """
+        Initialize an interview session.
+        
+        Args:
+            phone_number (str): Trucker's phone number
+            questions (list): (key, question_text) tuples to ask
+            base_url (str): Public URL Twilio can reach the webhook server on
+        """
+        if not base_url:
+            raise ValueError("WEBHOOK_BASE_URL must be set to run call sessions")
+        
+        self.session_id = uuid.uuid4().hex
+        self.phone_number = phone_number
+        self.questions = list(questions)
+        self.base_url = base_url.rstrip("/")
+        self.responses = {}
+        self.call_sid = None
+        self.finished = threading.Event()
+        self._saver = None
+        self._lock = threading.Lock()
+        self.steps = self.build_steps()
+    
+    def answer_url(self, index):
+        """Get the webhook URL Twilio posts the answer to question index to."""
+        return f"{self.base_url}/sessions/{self.session_id}/answer/{index}"
+    
+    def status_url(self):
+        """Get the webhook URL Twilio posts call status changes to."""
+        return f"{self.base_url}/sessions/{self.session_id}/status"
+    
+    def build_steps(self):
+        """
+        Build the TwiML flow for the whole question list.
+        
+        Returns:
+            list: One TwiML document per question, followed by the conclusion
+        """
+        steps = []
+        for index, (key, question) in enumerate(self.questions):
+            response = VoiceResponse()
+            response.say(GREETING if index == 0 else ACKNOWLEDGMENT)
+            
+            gather = Gather(
+                input="speech",
+                action=self.answer_url(index),
+                method="POST",
+                speech_timeout="auto",
+                timeout=GATHER_TIMEOUT_SECONDS,
+                action_on_empty_result=True
+            )
+            gather.say(question)
+            response.append(gather)
+            steps.append(str(response))
+        
+        conclusion = VoiceResponse()
+        conclusion.say(ACKNOWLEDGMENT)
+        conclusion.say(CONCLUSION)
+        conclusion.hangup()
+        steps.append(str(conclusion))
+        
+        return steps
+    
+    def start(self):
+        """
+        Place the call with the first step of the flow.
+        
+        Returns:
+            str: Call SID
+        """
+        # Registered first: Twilio may post the first answer before create() returns
+        register_session(self)
+        try:
+            call = get_twilio_client().calls.create(
+                to=self.phone_number,
+                from_=TWILIO_PHONE_NUMBER,
+                twiml=self.steps[0],
+                status_callback=self.status_url(),
+                status_callback_event=["completed"]
+            )
+        except Exception:
+            unregister_session(self.session_id)
+            raise
+        self.call_sid = call.sid
+        print(f"📞 Session {self.session_id} started on call {call.sid}")
+        return call.sid
+    
+    def handle_answer(self, index, params):
+        """
+        Store the answer to one question and return the next step.
+        
+        Args:
+            index (int): Position of the answered question
+            params (dict): Form fields Twilio posted to the webhook
+        
+        Returns:
+            str: TwiML for the next step
+        """
+        if index >= len(self.questions):
+            return self.steps[-1]
+        
+        key, question = self.questions[index]
+        response = params.get("SpeechResult", "").strip()
+        print(f"✅ {self.phone_number} {key}: {response}")
+        
+        with self._lock:
+            self.responses[key] = {
+                "question": question,
+                "response": response,
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        if index == len(self.questions) - 1:
+            self.finish()
+        
+        return self.steps[index + 1]
+    
+    def handle_status(self, params):
+        """
+        Close the session once Twilio reports the call has ended.
+        
+        Args:
+            params (dict): Form fields Twilio posted to the webhook
+        """
+        if params.get("CallStatus") in FINAL_CALL_STATUSES:
+            self.finish()
+    
+    def finish(self):
+        """Save the collected responses once, off the webhook thread."""
+        with self._lock:
+            if self.finished.is_set():
+                return
+            self.finished.set()
+            responses = dict(self.responses)
+        
+        unregister_session(self.session_id)
+        if responses:
+            # Not a daemon, so exiting cannot cut a save short
+            self._saver = threading.Thread(target=self._save, args=(responses,))
+            self._saver.start()
+    
+    def _save(self, responses):
+        """Save responses to their own file and to the leads store."""
+        save_responses(responses, self.phone_number)
+        if save_lead(responses, self.phone_number):
+            print("\n✅ Lead successfully added to leads database")
+        else:
+            print("\n⚠️ Failed to save lead to database")
+    
+    def wait_saved(self):
+        """Block until the responses collected by finish() are saved."""
+        if self._saver is not None:
+            self._saver.join()
+    
+    def wait(self, timeout=SESSION_TIMEOUT_SECONDS):
+        """
+        Wait for the interview to finish.
+        
+        Args:
+            timeout (float): Seconds to wait
+        
+        Returns:
+            dict: Responses in question order, or None if the session timed out
+        """
+        if not self.finished.wait(timeout):
+            return None
+        self.wait_saved()
+        with self._lock:
+            return {key: self.responses[key] for key, _ in self.questions if key in self.responses}
+
+def register_session(session):
+    """Make a session reachable from the webhook server."""
+    with _sessions_lock:
+        _sessions[session.session_id] = session
+
+def unregister_session(session_id):
+    """Remove a finished session from the webhook server."""
+    with _sessions_lock:
+        _sessions.pop(session_id, None)
+
+def get_session(session_id):
+    """Get a live session by ID."""
+    with _sessions_lock:
+        return _sessions.get(session_id)
+
+def handle_webhook(path, params):
+    """
+    Route a Twilio webhook to its session.
+    
+    Args:
+        path (str): Request path
+        params (dict): Form fields Twilio posted
+    
+    Returns:
+        tuple: (status_code, body)
+    """
+    match = ANSWER_PATH.match(path)
+    if match:
+        session = get_session(match.group("session_id"))
+        if session is None:
+            # The session is gone, end the call politely
+            response = VoiceResponse()
+            response.hangup()
+            return 200, str(response)
+        return 200, session.handle_answer(int(match.group("index")), params)
+    
+    match = STATUS_PATH.match(path)
+    if match:
+        session = get_session(match.group("session_id"))
+        if session is not None:
+            session.handle_status(params)
+        return 204, ""
+    
+    return 404, ""
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    validator = RequestValidator(TWILIO_AUTH_TOKEN)
+    
+    def do_POST(self):
+        """Handle a Twilio webhook."""
+        length = int(self.headers.get("Content-Length", 0))
+        params = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        
+        if WEBHOOK_VALIDATE_SIGNATURES:
+            url = WEBHOOK_BASE_URL.rstrip("/") + self.path
+            if not self.validator.validate(url, params, self.headers.get("X-Twilio-Signature", "")):
+                self._respond(403, "")
+                return
+        
+        try:
+            status, body = handle_webhook(self.path, params)
+        except Exception as e:
+            print(f"\n❌ Error handling webhook {self.path}: {str(e)}")
+            status, body = 500, ""
+        self._respond(status, body)
+    
+    def _respond(self, status, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        """Silence the default per-request access log."""
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_webhook_server(host=WEBHOOK_HOST, port=WEBHOOK_PORT):
+    """
+    Start the webhook server on a background thread if it is not running.
+    
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), WebhookHandler)
+            threading.Thread(target=_server.serve_forever, name="webhooks", daemon=True).start()
+            print(f"🌐 Webhook server listening on {host}:{port}")
+    return _server
+
+def conduct_interview_session(phone_number, timeout=SESSION_TIMEOUT_SECONDS):
+    """
+    Conduct an interview over a single call.
+    
+    Args:
+        phone_number (str): Trucker's phone number
+        timeout (float): Seconds to wait for the interview to finish
+    
+    Returns:
+        dict: Responses keyed by question, or None if the interview failed
+    """
+    try:
+        start_webhook_server()
+        session = InterviewSession(phone_number)
+        print(f"\n📞 Initiating call to {phone_number}...")
+        session.start()
+        
+        responses = session.wait(timeout)
+        if responses is None:
+            print(f"\n⚠️ Interview with {phone_number} timed out")
+            # Save the partial interview before returning
+            session.finish()
+            session.wait_saved()
+        return responses
+        
+    except Exception as e:
+        print(f"\n❌ Error during interview: {str(e)}")
+        return None
+
+if __name__ == "__main__":
+    import sys
+    
+    print(json.dumps(conduct_interview_session(sys.argv[1]), indent=4))
\ No newline at end of file
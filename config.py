@@ -11,15 +11,110 @@ TWILIO_ACCOUNT_SID = "AC1234567890abcdef1234567890abcdef"
 TWILIO_AUTH_TOKEN = "1234567890abcdef1234567890abcdef"
 TWILIO_PHONE_NUMBER = "+1234567890"  # Format: +[country code][phone number]
 DISPATCHER_PHONE_NUMBER = "+1987654321"  # Human dispatcher's phone number
+TWILIO_POOL_SIZE = 10  # Keep-alive connections shared by all Twilio requests
+TWILIO_MAX_RETRIES = 3  # Retries for 429 and 5xx responses
+TWILIO_RETRY_BACKOFF_SECONDS = 0.5  # Exponential backoff factor between retries
+TWILIO_TIMEOUT_SECONDS = 10  # Per-request timeout
+TWILIO_API_BASE_URL = None  # Point at a local stub such as "http://127.0.0.1:8099" to work offline
+
+# Whisper Configuration
+WHISPER_MODEL = "base"  # Options: "tiny", "base", "small", "medium", "large"
+WHISPER_DEVICE = "cpu"  # Use "cuda" when a GPU is available
+WHISPER_FP16 = False  # Half precision decoding, only effective on GPU
+WHISPER_PRELOAD_MODELS = [WHISPER_MODEL]  # Models loaded and warmed up at boot
+
+# Audio Configuration
+SAVE_RESPONSE_AUDIO = False  # Also write each recorded answer to a WAV file
+MAX_ANSWER_SECONDS = 15  # Upper bound on the recording of a single answer
+VAD_ENERGY_THRESHOLD = 0.01  # RMS level above which an audio block counts as speech
+VAD_TRAILING_SILENCE_SECONDS = 1.5  # Stop recording after this much silence following speech
+VAD_NO_SPEECH_TIMEOUT_SECONDS = 6  # Give up if nobody starts speaking within this time
+
+# Interview Configuration
+PIPELINED_INTERVIEW = True  # Transcribe each answer while the next question is asked
+
+# Call Sessions
+# Set WEBHOOK_BASE_URL to the public URL of the webhook server to run each
+# interview over a single call instead of one outbound call per prompt
+WEBHOOK_BASE_URL = None  # e.g. "https://dispatcher.example.com"
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080
+WEBHOOK_VALIDATE_SIGNATURES = True  # Reject webhooks without a valid X-Twilio-Signature
+GATHER_TIMEOUT_SECONDS = 6  # Seconds Twilio waits for the trucker to start answering
+SESSION_TIMEOUT_SECONDS = 600  # Longest a single interview call may take
+
+# Batched Transcription
+TRANSCRIPTION_BATCHING = True  # Route scheduler transcriptions through the batch service
+TRANSCRIPTION_MAX_BATCH_SIZE = 8  # Most clips decoded in one forward pass
+TRANSCRIPTION_MAX_WAIT_SECONDS = 0.2  # Longest a clip waits for its batch to fill
+TRANSCRIPTION_LANGUAGE = "en"  # Set to None to detect the language of each clip
+
+# Interview Scheduler
+MAX_CONCURRENT_INTERVIEWS = 100  # Interview sessions in flight at once
+MAX_TRANSCRIPTION_WORKERS = 4  # Whisper worker threads, each with its own model replica
+MAX_CONCURRENT_TWILIO_REQUESTS = 20  # Outstanding Twilio API requests
+MAX_CONCURRENT_RECORDINGS = 1  # Simultaneous recordings from the audio input
+INTERVIEW_QUEUE_SIZE = 500  # Pending interviews before submit() applies backpressure
+SCHEDULER_REPORT_INTERVAL_SECONDS = 30  # How often throughput is printed
+
+# Leads Storage
+LEADS_BACKEND = "sqlite"  # Options: "sqlite" (leads.db), "jsonl" (append-only leads.jsonl)
+LEADS_FSYNC_BATCH_SIZE = 16  # Appends that may share one disk sync
+LEADS_FSYNC_INTERVAL_SECONDS = 1.0  # Longest an append waits for a disk sync
+STATS_TOP_LOCATIONS = 100  # Busiest origins and destinations counted in the stats sidecar
+
+# Lead Scoring
+SCORING_TABLES_FILE = "scoring_tables.json"  # Optional truck type and lane tables, built-in tables are used if missing
+SCORING_TABLES_CHECK_SECONDS = 5.0  # How often the scoring tables file is checked for changes
+ETA_CACHE_SIZE = 4096  # Distinct ETA phrases kept parsed in memory
+
+# Rescoring
+RESCORE_ON_STARTUP = True  # Rescore leads left stale by a scoring rule change in the background
+RESCORE_CHUNK_SIZE = 500  # Leads rescored and written back per checkpoint
+RESCORE_PAUSE_SECONDS = 0.05  # Pause between chunks so ingestion gets the store
+
+# Google Sheets Sync
+SHEETS_SYNC_STATE_FILE = "sheets_sync_state.json"  # Row and content hash of every synced lead
+SHEETS_SYNC_CHUNK_SIZE = 500  # Rows sent per Sheets API request
+SHEETS_TOKEN_REFRESH_MARGIN_SECONDS = 300  # Refresh the Google token this long before it expires
+SHEETS_SERVICE_WAIT_SECONDS = 5  # Longest the dashboard waits for the Sheets service before giving up
+SHEETS_EXPORT_CHECKPOINT_FILE = "sheets_export_checkpoint.json"  # Progress of the bulk exporter
+SHEETS_EXPORT_REQUESTS_PER_SECOND = 1.0  # Sustained Sheets API request rate of the bulk exporter
+SHEETS_EXPORT_BURST = 5  # Requests the bulk exporter may send back to back before throttling
+SHEETS_EXPORT_RETRIES = 5  # Retries of a rate-limited or failed export request, with backoff
+
+# Dashboard
+DASHBOARD_PAGE_SIZE = 50  # Leads shown per page of the leads table
+DASHBOARD_CSV_CHUNK_SIZE = 1000  # Leads written per chunk of a CSV export
+DASHBOARD_TOP_LEADS = 10  # Best recent leads listed above the leads table
+DASHBOARD_TOP_LEADS_HOURS = 24  # How far back the best recent leads are taken from
+ROLLUP_HOURLY_RETENTION_HOURS = 72  # Hourly lead rollups kept for the charts
+ROLLUP_DAILY_RETENTION_DAYS = 90  # Daily lead rollups kept for the charts
+ROLLUP_LANE_RETENTION_DAYS = 30  # Days of per-lane score rollups kept
+ROLLUP_LANES_PER_DAY = 200  # Busiest lanes kept in each day's per-lane rollup
+ROLLUP_SKETCH_PRECISION = 8  # Distinct-location sketch size, 2**N registers (about 6.5% error at 8)
+VIEW_LEADS_PAGE_SIZE = 25  # Leads per table printed by view_leads.py
 
 # Notification Method
-# Options: "email", "sms", "push", "webhook"
+# Options: "email", "sms", "webhook"
 NOTIFICATION_METHOD = "sms"
+NOTIFICATION_DIGEST_SECONDS = 60  # New leads are coalesced into one notification per window
+NOTIFICATION_DIGEST_TOP_LEADS = 3  # Highest scoring leads listed in each notification
+NOTIFICATION_RETRY_BASE_SECONDS = 5  # First retry delay, doubled after every failure
+NOTIFICATION_RETRY_MAX_SECONDS = 600  # Longest delay between retries
+NOTIFICATION_MAX_ATTEMPTS = 10  # Attempts before a notification is dropped
+NOTIFICATION_CLAIM_SECONDS = 300  # Queued leads claimed by a process that died are sent by another after this long
+NOTIFICATION_WEBHOOK_URL = None  # Receives a JSON POST when NOTIFICATION_METHOD is "webhook"
+
+# Email Notifications, used when NOTIFICATION_METHOD is "email"
+EMAIL_SETTINGS = {
+    "smtp_server": "smtp.example.com",
+    "smtp_port": 587,
+    "sender_email": "your-email@example.com",
+    "recipient_email": "dispatcher@example.com",
+    "username": None,  # Defaults to sender_email
+    "password": "dummy-smtp-password",
+    "use_tls": True
+}
 
-# Optional: Add any additional configuration settings below
-# For example:
-# EMAIL_SETTINGS = {
-#     "smtp_server": "smtp.example.com",
-#     "smtp_port": 587,
-#     "sender_email": "your-email@example.com"
-# } 
\ No newline at end of file
+# Optional: Add any additional configuration settings below
\ No newline at end of file
@@ -3,54 +3,124 @@ Streamlit dashboard for viewing and filtering trucker leads.
 """
 
 import streamlit as st
+import io
 import json
-from datetime import datetime
+import math
 import pandas as pd
-from leads_manager import get_all_leads
-from sheets_sync import SheetsSync
+from leads_manager import get_stats, get_store, get_top_recent_leads
+from leads_frame import LeadsFrame, COLUMNS, TIMESTAMP_FORMAT, build_frame
+from sheets_sync import SheetsSync, prefetch_sheets_service, get_sheets_service, get_sheets_service_error
+from config import SHEETS_SERVICE_WAIT_SECONDS, DASHBOARD_PAGE_SIZE, DASHBOARD_CSV_CHUNK_SIZE
+from config import ROLLUP_HOURLY_RETENTION_HOURS, DASHBOARD_TOP_LEADS, DASHBOARD_TOP_LEADS_HOURS
 
-def format_timestamp(timestamp):
-    """Format ISO timestamp to a more readable format."""
-    try:
-        dt = datetime.fromisoformat(timestamp)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    except:
-        return timestamp
+# Show the datetime64 Timestamp column as TIMESTAMP_FORMAT does
+TABLE_COLUMNS = {"Timestamp": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")}
+
+@st.cache_resource
+def get_leads_frame():
+    """Get the process-wide leads frame, shared by every session and rerun."""
+    return LeadsFrame(get_store())
 
 def load_leads_data():
-    """Load and format leads data for the dashboard."""
-    leads = get_all_leads()
-    
-    # Transform leads into a format suitable for pandas DataFrame
-    formatted_leads = []
-    for lead in leads:
-        # Extract responses into separate fields
-        responses = lead['responses']
-        formatted_lead = {
-            'Score': lead.get('score', 0),  # Add score
-            'Phone': lead['phone_number'],
-            'Timestamp': format_timestamp(lead['timestamp']),
-            'Truck ID': responses.get('truck_id', {}).get('response', ''),
-            'Current Location': responses.get('current_location', {}).get('response', ''),
-            'Destination': responses.get('destination', {}).get('response', ''),
-            'Cargo Type': responses.get('cargo_type', {}).get('response', ''),
-            'ETA': responses.get('estimated_arrival', {}).get('response', ''),
-            'Special Requirements': responses.get('special_requirements', {}).get('response', ''),
-            'Contact Number': responses.get('contact_number', {}).get('response', '')
-        }
-        formatted_leads.append(formatted_lead)
+    """
+    Load leads data for the dashboard.
     
-    return pd.DataFrame(formatted_leads)
+    Only leads written since the last rerun are read from the store; without
+    new leads the cached frame is returned as is.
+    """
+    return get_leads_frame().refresh()
 
-def filter_dataframe(df, search_term):
-    """Filter dataframe based on search term."""
-    if not search_term:
-        return df
+def filter_dataframe(df, ids, min_score=0.0):
+    """
+    Filter dataframe by search matches and minimum score.
     
-    # Convert all columns to string and search case-insensitive
-    mask = df.astype(str).apply(lambda x: x.str.lower().str.contains(search_term.lower())).any(axis=1)
+    The matches come from the leads frame's search index and are combined
+    with the score filter into one mask, so the frame is selected from once.
+    
+    Args:
+        df (pd.DataFrame): Leads frame
+        ids (set): Lead IDs matching the search query, None to keep every lead
+        min_score (float): Lowest score to keep
+    """
+    mask = df['Score'].to_numpy() >= min_score
+    if ids is not None:
+        mask &= df.index.isin(list(ids))
     return df[mask]
 
+def count_scoring(df, min_score):
+    """
+    Count the leads scoring at least min_score.
+    
+    The frame is sorted highest score first, so those leads are a prefix of
+    it and are counted with a binary search.
+    
+    Args:
+        df (pd.DataFrame): Leads frame, highest score first
+        min_score (float): Lowest score to count
+    """
+    return int((-df['Score']).searchsorted(-min_score, side='right'))
+
+def load_page(filtered_df, page_index, page_size=DASHBOARD_PAGE_SIZE):
+    """
+    Load one page of the leads table, highest score first.
+    
+    Pages are sliced by position from the cached frame, which is already in
+    score order, so rendering a page does not query the store and does not
+    depend on how many leads exist or how deep the page is.
+    
+    Args:
+        filtered_df (pd.DataFrame): Filtered leads, highest score first
+        page_index (int): Page number, from 0
+        page_size (int): Leads per page
+    """
+    start = page_index * page_size
+    return filtered_df.iloc[start:start + page_size]
+
+def iter_csv_chunks(filtered_df, chunk_size=DASHBOARD_CSV_CHUNK_SIZE):
+    """Yield the filtered leads as frames of at most chunk_size rows."""
+    for start in range(0, len(filtered_df), chunk_size):
+        yield filtered_df.iloc[start:start + chunk_size]
+
+def export_csv(chunks):
+    """
+    Write frames to an in-memory CSV one chunk at a time.
+    
+    Timestamps are written as TIMESTAMP_FORMAT, as the dashboard always has.
+    
+    Args:
+        chunks (iterable): DataFrames in COLUMNS order, indexed by lead ID
+    
+    Returns:
+        bytes: UTF-8 encoded CSV
+    """
+    buffer = io.BytesIO()
+    buffer.write((",".join(COLUMNS[1:]) + "\n").encode())
+    for chunk in chunks:
+        chunk.to_csv(buffer, index=False, header=False, date_format=TIMESTAMP_FORMAT)
+    return buffer.getvalue()
+
+def show_charts(rollups):
+    """Chart leads per hour and average score per lane from the rollups."""
+    hourly = rollups.hourly_series(hours=ROLLUP_HOURLY_RETENTION_HOURS)
+    lanes = rollups.lane_series()
+    if not hourly and not lanes:
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Leads per Hour")
+        hourly_df = pd.DataFrame(hourly, columns=['Hour', 'Leads', 'Average Score'])
+        hourly_df['Hour'] = pd.to_datetime(hourly_df['Hour'], format="%Y-%m-%dT%H")
+        st.bar_chart(hourly_df, x='Hour', y='Leads')
+    with col2:
+        st.subheader("Average Score per Lane")
+        lane_df = pd.DataFrame(
+            [(day, lane, average) for lane, days in lanes.items() for day, average in days],
+            columns=['Day', 'Lane', 'Average Score']
+        )
+        lane_df['Day'] = pd.to_datetime(lane_df['Day'], format="%Y-%m-%d")
+        st.line_chart(lane_df, x='Day', y='Average Score', color='Lane')
+
 def main():
     st.set_page_config(
         page_title="Trucker Leads Dashboard",
@@ -84,54 +154,88 @@ def main():
         )
         
         st.sidebar.header("Google Sheets Sync")
+        # Build the shared Sheets service in the background, once per process
+        prefetch_sheets_service()
         spreadsheet_id = st.sidebar.text_input(
             "Google Sheet ID",
             help="Enter the ID from your Google Sheet URL (the long string between /d/ and /edit)"
         )
+        full_sync = st.sidebar.checkbox(
+            "Rewrite the whole sheet",
+            help="By default only new and changed leads are sent"
+        )
         
         if st.sidebar.button("Sync to Google Sheets"):
             if spreadsheet_id:
                 with st.spinner("Syncing to Google Sheets..."):
-                    sheets_sync = SheetsSync(spreadsheet_id)
-                    leads = get_all_leads()
-                    if sheets_sync.sync_leads(leads):
-                        st.sidebar.success("✅ Successfully synced to Google Sheets!")
-                        st.sidebar.markdown(f"[Open Google Sheet]({sheets_sync.get_sheet_url()})")
+                    service = get_sheets_service(timeout=SHEETS_SERVICE_WAIT_SECONDS)
+                    if service is None:
+                        error = get_sheets_service_error() or "still connecting, try again in a moment"
+                        st.sidebar.error(f"❌ Google Sheets is not available: {error}")
                     else:
-                        st.sidebar.error("❌ Failed to sync to Google Sheets")
+                        sheets_sync = SheetsSync(spreadsheet_id, service=service)
+                        # Streamed from the store, the ranking index is not needed for a sync
+                        if sheets_sync.sync_leads(get_store().iter_leads(), full=full_sync):
+                            st.sidebar.success("✅ Successfully synced to Google Sheets!")
+                            st.sidebar.markdown(f"[Open Google Sheet]({sheets_sync.get_sheet_url()})")
+                        else:
+                            st.sidebar.error("❌ Failed to sync to Google Sheets")
             else:
                 st.sidebar.error("Please enter a Google Sheet ID")
         
-        # Filter data
-        filtered_df = filter_dataframe(df, search_term)
-        filtered_df = filtered_df[filtered_df['Score'] >= min_score]
+        # Display statistics from the incrementally maintained sidecar
+        stats = get_stats()
+        
+        # Filter data, searching the in-memory index only when there is a query
+        ids = get_leads_frame().search(search_term) if search_term else None
+        if ids is None:
+            # A positional slice, nothing is copied
+            filtered_df = df.iloc[:count_scoring(df, min_score)]
+        else:
+            filtered_df = filter_dataframe(df, ids, min_score)
+        filtered_count = len(filtered_df)
         
-        # Display statistics
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
-            st.metric("Total Leads", len(df))
+            st.metric("Total Leads", stats.count)
         with col2:
-            st.metric("Filtered Leads", len(filtered_df))
+            st.metric("Filtered Leads", filtered_count)
         with col3:
-            st.metric("Active Locations", df['Current Location'].nunique())
+            st.metric("Active Locations", stats.distinct_locations())
         with col4:
-            st.metric("Average Score", f"{df['Score'].mean():.2f}")
+            st.metric("Locations (24h)", stats.rollups.distinct_locations(24))
+        with col5:
+            st.metric("Average Score", f"{stats.average_score:.2f}")
+        
+        # Charts read from the rollups in the sidecar, not from the leads
+        show_charts(stats.rollups)
         
-        # Display data
+        # Best recent leads come straight from the store's score index
+        top_leads = get_top_recent_leads(DASHBOARD_TOP_LEADS_HOURS, DASHBOARD_TOP_LEADS)
+        if top_leads:
+            st.subheader(f"🏆 Top Leads, Last {DASHBOARD_TOP_LEADS_HOURS} Hours")
+            st.dataframe(build_frame(top_leads), use_container_width=True, hide_index=True, column_config=TABLE_COLUMNS)
+        
+        # Display one page of data
+        pages = max(math.ceil(filtered_count / DASHBOARD_PAGE_SIZE), 1)
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
         st.dataframe(
-            filtered_df,
+            load_page(filtered_df, page_number - 1),
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config=TABLE_COLUMNS
         )
         
-        # Download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download filtered data as CSV",
-            data=csv,
-            file_name="trucker_leads.csv",
-            mime="text/csv"
-        )
+        # The CSV is only written when asked for, and only lives until the next rerun
+        if st.button("Prepare CSV download"):
+            with st.spinner("Writing CSV..."):
+                csv = export_csv(iter_csv_chunks(filtered_df))
+            st.download_button(
+                label="Download filtered data as CSV",
+                data=csv,
+                file_name="trucker_leads.csv",
+                mime="text/csv"
+            )
         
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
@@ -0,0 +1,307 @@
+"""
+Parsing of spoken and written ETAs.
+
+Whisper transcripts rarely match a strptime format: truckers say "tomorrow
+at 3 pm", "in about six hours" or "June 5th". Every ETA is normalized and
+matched against a handful of compiled regexes; nothing raises on a miss.
+
+Parsing happens in two steps. The normalized string is turned into a spec
+that does not depend on the current time (for example "one day ahead at
+15:00") and specs are kept in a bounded LRU cache, since the same phrases
+come up over and over. The spec is then resolved against a reference time,
+so scoring a batch against one `now` is deterministic.
+"""
+
+import calendar
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from config import ETA_CACHE_SIZE
+
+# Bump whenever a change to the parser can change the date an ETA resolves to,
+# so stored availability scores are recomputed
+PARSER_VERSION = 1
+
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11,
+    'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+    'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19,
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60,
+    'seventy': 70, 'eighty': 80, 'ninety': 90
+}
+
+AMOUNT_PHRASES = {
+    'a': 1, 'an': 1, 'a couple': 2, 'a couple of': 2, 'couple': 2, 'couple of': 2,
+    'a few': 3, 'few': 3, 'several': 4, 'half a': 0.5, 'half an': 0.5, 'the': 1
+}
+
+# Relative ETAs further out than this are all just "far away"
+MAX_OFFSET = timedelta(days=3650)
+
+UNITS = {
+    'min': timedelta(minutes=1), 'mins': timedelta(minutes=1),
+    'minute': timedelta(minutes=1), 'minutes': timedelta(minutes=1),
+    'hr': timedelta(hours=1), 'hrs': timedelta(hours=1),
+    'hour': timedelta(hours=1), 'hours': timedelta(hours=1),
+    'day': timedelta(days=1), 'days': timedelta(days=1),
+    'week': timedelta(weeks=1), 'weeks': timedelta(weeks=1)
+}
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+MONTHS = {
+    name: number
+    for number, full in enumerate(calendar.month_name)
+    if number
+    for name in (full.lower(), full[:3].lower())
+}
+MONTHS['sept'] = 9
+
+# Hour assumed for each part of the day when no time is given
+PERIOD_HOURS = {'morning': 8, 'afternoon': 14, 'evening': 18, 'night': 21, 'tonight': 20}
+DEFAULT_HOUR = 8
+
+NOW_PHRASES = {
+    'now', 'right now', 'available now', 'ready now', 'asap', 'as soon as possible',
+    'immediately', 'right away', 'already here', 'here now'
+}
+
+_SPOKEN_MERIDIEM = re.compile(r'\b([ap])\.\s?m\b\.?')
+_FILLER = re.compile(r"[,!?]|\bo'clock\b|\.$")
+_SPACES = re.compile(r'\s+')
+_DECIMAL = re.compile(r'\d+(?:\.\d+)?')
+
+_ISO_DATE = re.compile(r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})(?:[ t](?P<time>.+))?')
+_US_DATE = re.compile(r'(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})(?: (?P<time>.+))?')
+_MONTH_DATE = re.compile(
+    r'(?:(?:on|by|around|about) )*(?P<month>' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')\.?'
+    r' (?:the )?(?P<day>\d{1,2})(?:st|nd|rd|th)?(?: (?P<year>\d{4}))?(?: (?:at |around |about |by )?(?P<time>.+))?'
+)
+_DAY = re.compile(
+    r'(?:(?:on|by|around|about|sometime|maybe) )*'
+    r'(?P<day>today|tomorrow|tonight|(?:the )?day after tomorrow|this|(?:next |this )?(?P<weekday>' + '|'.join(WEEKDAYS) + r'))'
+    r'(?: (?P<period>morning|afternoon|evening|night))?'
+    r'(?: (?:at|around|about|by) (?P<time>.+))?'
+)
+_RELATIVE = re.compile(
+    r'(?:(?:in|within|after) )?(?:(?:about|around|roughly|approximately|maybe|like|another|just|under|less than) )*'
+    r'(?P<amount>.+?) (?P<unit>' + '|'.join(UNITS) + r')(?P<half> and a half)?'
+    r'(?: (?:from now|or so|or less|tops|max))?'
+)
+_CLOCK_PREFIX = re.compile(r'^(?:(?:at|around|about|by) )+')
+_CLOCK = re.compile(r'(?P<hour>\d{1,2}|[a-z]+)(?::(?P<minute>\d{2}))?(?: ?(?P<meridiem>am|pm))?')
+
+def normalize_eta(eta):
+    """
+    Normalize an ETA transcript for matching and caching.
+    
+    Args:
+        eta (str): ETA as spoken or typed
+    
+    Returns:
+        str: Lowercase ETA with spoken punctuation and extra whitespace removed
+    """
+    eta = _SPOKEN_MERIDIEM.sub(r'\1m', eta.lower())
+    eta = _FILLER.sub(' ', eta)
+    return _SPACES.sub(' ', eta).strip()
+
+def _parse_amount(text):
+    """Parse "6", "2.5", "six", "twenty five" or "a couple of" into a number, or None."""
+    if _DECIMAL.fullmatch(text):
+        return float(text)
+    if text in AMOUNT_PHRASES:
+        return AMOUNT_PHRASES[text]
+    
+    total = 0
+    for word in text.replace('-', ' ').split():
+        if word not in NUMBER_WORDS:
+            return None
+        total += NUMBER_WORDS[word]
+    return total
+
+def _parse_clock(text, period=None, require_marker=False):
+    """
+    Parse a time of day like "3 pm", "15:30", "three" or "noon".
+    
+    Args:
+        text (str): Normalized time text
+        period (str): Part of the day it was said with, e.g. "afternoon"
+        require_marker (bool): Reject bare hours without am/pm or minutes
+    
+    Returns:
+        tuple: (hour, minute), or None if the text is not a time
+    """
+    text = _CLOCK_PREFIX.sub('', text)
+    if text in ('noon', 'midday'):
+        return 12, 0
+    if text == 'midnight':
+        return 0, 0
+    
+    match = _CLOCK.fullmatch(text)
+    if match is None:
+        return None
+    hour, minute, meridiem = match.group('hour'), match.group('minute'), match.group('meridiem')
+    if require_marker and minute is None and meridiem is None:
+        return None
+    
+    hour = int(hour) if hour.isdigit() else NUMBER_WORDS.get(hour)
+    minute = int(minute) if minute else 0
+    if hour is None or hour > 23 or minute > 59:
+        return None
+    
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == 'pm' else 0)
+    elif period in ('afternoon', 'evening', 'night', 'tonight') and 1 <= hour < 12:
+        hour += 12
+    return hour, minute
+
+def _valid_date(year, month, day):
+    """Check a calendar date without constructing it."""
+    return 1 <= year and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
+def _parse_date(match):
+    """Build an absolute spec from an ISO or US date match."""
+    year, month, day = int(match.group('year')), int(match.group('month')), int(match.group('day'))
+    if not _valid_date(year, month, day):
+        return None
+    
+    hour, minute = 0, 0
+    if match.group('time'):
+        clock = _parse_clock(match.group('time'))
+        if clock is None:
+            return None
+        hour, minute = clock
+    return ('absolute', datetime(year, month, day, hour, minute))
+
+@lru_cache(maxsize=ETA_CACHE_SIZE)
+def _parse_spec(eta):
+    """Parse a normalized ETA into a spec that is independent of the current time."""
+    if not eta:
+        return None
+    if eta in NOW_PHRASES:
+        return ('offset', timedelta(0))
+    
+    # Written dates, the formats typed leads and the original parser used
+    if eta[0].isdigit():
+        match = _ISO_DATE.fullmatch(eta) or _US_DATE.fullmatch(eta)
+        if match:
+            return _parse_date(match)
+    
+    match = _MONTH_DATE.fullmatch(eta)
+    if match:
+        clock = _parse_clock(match.group('time')) if match.group('time') else (DEFAULT_HOUR, 0)
+        if clock is None:
+            return None
+        year = int(match.group('year')) if match.group('year') else None
+        return ('month_day', year, MONTHS[match.group('month')], int(match.group('day'))) + clock
+    
+    match = _DAY.fullmatch(eta)
+    if match:
+        day, period = match.group('day'), match.group('period')
+        if day == 'this' and period is None:
+            return None
+        if day == 'tonight':
+            period = 'tonight'
+        
+        clock = _parse_clock(match.group('time'), period) if match.group('time') else None
+        if clock is None:
+            clock = (PERIOD_HOURS.get(period, DEFAULT_HOUR), 0)
+        
+        if match.group('weekday'):
+            return ('weekday', WEEKDAYS.index(match.group('weekday'))) + clock
+        days_ahead = {'today': 0, 'tonight': 0, 'this': 0, 'tomorrow': 1}.get(day, 2)
+        return ('day', days_ahead) + clock
+    
+    match = _RELATIVE.fullmatch(eta)
+    if match:
+        amount = _parse_amount(match.group('amount'))
+        if amount is None:
+            return None
+        if match.group('half'):
+            amount += 0.5
+        seconds = amount * UNITS[match.group('unit')].total_seconds()
+        return ('offset', timedelta(seconds=min(seconds, MAX_OFFSET.total_seconds())))
+    
+    clock = _parse_clock(eta, require_marker=True)
+    if clock is not None:
+        return ('clock',) + clock
+    
+    return None
+
+def parse_eta_spec(eta):
+    """
+    Parse an ETA into a cached, time-independent spec.
+    
+    Args:
+        eta (str): ETA as spoken or typed
+    
+    Returns:
+        tuple: Spec for resolve_eta, or None if the ETA is not understood
+    """
+    if not isinstance(eta, str):
+        return None
+    return _parse_spec(normalize_eta(eta))
+
+def resolve_eta(spec, now):
+    """
+    Turn a spec into a date and time.
+    
+    Args:
+        spec (tuple): Spec from parse_eta_spec
+        now (datetime): Reference time
+    
+    Returns:
+        datetime: Estimated arrival, or None for a None spec
+    """
+    if spec is None:
+        return None
+    
+    kind = spec[0]
+    if kind == 'absolute':
+        return spec[1]
+    if kind == 'offset':
+        return now + spec[1]
+    
+    today = datetime(now.year, now.month, now.day)
+    if kind == 'day':
+        _, days_ahead, hour, minute = spec
+        return today + timedelta(days=days_ahead, hours=hour, minutes=minute)
+    if kind == 'weekday':
+        _, weekday, hour, minute = spec
+        days_ahead = (weekday - now.weekday()) % 7 or 7
+        return today + timedelta(days=days_ahead, hours=hour, minutes=minute)
+    if kind == 'clock':
+        # The next time the clock shows this time
+        _, hour, minute = spec
+        eta_date = today + timedelta(hours=hour, minutes=minute)
+        return eta_date if eta_date >= now else eta_date + timedelta(days=1)
+    
+    # A month and day without a year means its next occurrence
+    _, year, month, day, hour, minute = spec
+    years = [year] if year else range(now.year, now.year + 9)
+    for candidate in years:
+        if _valid_date(candidate, month, day):
+            eta_date = datetime(candidate, month, day, hour, minute)
+            if year or eta_date >= today:
+                return eta_date
+    return None
+
+def parse_eta(eta, now=None):
+    """
+    Parse an ETA into a date and time.
+    
+    Args:
+        eta (str): ETA as spoken or typed
+        now (datetime): Reference time, defaults to the current time
+    
+    Returns:
+        datetime: Estimated arrival, or None if the ETA is not understood
+    """
+    return resolve_eta(parse_eta_spec(eta), now or datetime.now())
+
+def get_cache_info():
+    """Get hit and miss counts of the ETA spec cache."""
+    return _parse_spec.cache_info()
\ No newline at end of file
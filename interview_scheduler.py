@@ -0,0 +1,305 @@
+"""
+Asyncio scheduler for running many dispatch interviews concurrently.
+
+Each interview runs as a coroutine. Twilio requests go through the async
+Twilio HTTP client, while recording and Whisper transcription (both blocking)
+are offloaded to bounded thread pools. Semaphores cap how many requests each
+resource sees at once, and the bounded submission queue applies backpressure
+to whoever feeds phone numbers in.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from twilio.rest import Client
+from twilio_async_client import AsyncPooledTwilioHttpClient
+from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+from config import (
+    MAX_CONCURRENT_INTERVIEWS, MAX_TRANSCRIPTION_WORKERS, MAX_CONCURRENT_TWILIO_REQUESTS,
+    MAX_CONCURRENT_RECORDINGS, INTERVIEW_QUEUE_SIZE, SCHEDULER_REPORT_INTERVAL_SECONDS,
+    SAVE_RESPONSE_AUDIO, MAX_ANSWER_SECONDS, TRANSCRIPTION_BATCHING
+)
+from voice_utils import record_audio_buffer, transcribe_audio, build_say_twiml
+from transcription_service import get_transcription_service
+from questions import DISPATCH_QUESTIONS, GREETING, ACKNOWLEDGMENT, CONCLUSION
+from leads_manager import save_lead, save_responses
+
+# Each transcription thread keeps its own Whisper replica
+_worker_state = threading.local()
+_replica_ids = itertools.count()
+
+def _init_transcription_worker():
+    """Assign a model replica to the current transcription thread."""
+    _worker_state.replica = next(_replica_ids)
+
+def _transcribe_in_worker(audio):
+    """Transcribe audio with the replica owned by the current thread."""
+    return transcribe_audio(audio, replica=_worker_state.replica)
+
+class InterviewScheduler:
+    def __init__(
+        self,
+        max_sessions=MAX_CONCURRENT_INTERVIEWS,
+        transcription_workers=MAX_TRANSCRIPTION_WORKERS,
+        max_twilio_requests=MAX_CONCURRENT_TWILIO_REQUESTS,
+        max_recordings=MAX_CONCURRENT_RECORDINGS,
+        queue_size=INTERVIEW_QUEUE_SIZE,
+        batch_transcription=TRANSCRIPTION_BATCHING
+    ):
+        """
+        Initialize the interview scheduler.
+        
+        Args:
+            max_sessions (int): Interviews in flight at once
+            transcription_workers (int): Size of the Whisper worker pool
+            max_twilio_requests (int): Outstanding Twilio API requests
+            max_recordings (int): Simultaneous recordings
+            queue_size (int): Pending interviews before submit() blocks
+            batch_transcription (bool): Send answers to the shared batch
+                transcriber instead of the per-thread worker pool
+        """
+        self.max_sessions = max_sessions
+        self.transcription_workers = transcription_workers
+        self.max_twilio_requests = max_twilio_requests
+        self.max_recordings = max_recordings
+        self.queue_size = queue_size
+        self.batch_transcription = batch_transcription
+        
+        self.queue = None
+        self.results = {}
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.started_at = None
+        
+        self._sessions = []
+        self._reporter = None
+        self._http_client = None
+        self._client = None
+    
+    async def start(self):
+        """Start the session workers and open the shared resources."""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.started_at = time.monotonic()
+        
+        self._twilio_slots = asyncio.Semaphore(self.max_twilio_requests)
+        self._transcription_slots = asyncio.Semaphore(self.transcription_workers)
+        self._recording_slots = asyncio.Semaphore(self.max_recordings)
+        
+        self._transcription_pool = ThreadPoolExecutor(
+            max_workers=self.transcription_workers,
+            thread_name_prefix="whisper",
+            initializer=_init_transcription_worker
+        )
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=self.max_recordings + 2,
+            thread_name_prefix="interview-io"
+        )
+        
+        self._http_client = AsyncPooledTwilioHttpClient()
+        self._client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=self._http_client)
+        
+        self._sessions = [
+            asyncio.create_task(self._session_worker())
+            for _ in range(self.max_sessions)
+        ]
+        self._reporter = asyncio.create_task(self._report_periodically())
+    
+    async def submit(self, phone_number):
+        """
+        Queue an interview, waiting while the queue is full.
+        
+        Args:
+            phone_number (str): Trucker's phone number
+        """
+        await self.queue.put(phone_number)
+    
+    async def join(self):
+        """Wait until every submitted interview has finished."""
+        await self.queue.join()
+    
+    async def stop(self):
+        """Cancel the workers and release the shared resources."""
+        for task in self._sessions + [self._reporter]:
+            task.cancel()
+        await asyncio.gather(*self._sessions, self._reporter, return_exceptions=True)
+        
+        await self._http_client.close()
+        self._transcription_pool.shutdown(wait=True)
+        self._io_pool.shutdown(wait=True)
+    
+    def get_stats(self):
+        """
+        Get throughput and queue statistics.
+        
+        Returns:
+            dict: Completed, failed and in-flight counts, queue depth,
+                interviews per minute since start() and Twilio request latency
+        """
+        elapsed_minutes = (time.monotonic() - self.started_at) / 60 if self.started_at else 0
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "interviews_per_minute": round(self.completed / elapsed_minutes, 2) if elapsed_minutes else 0.0,
+            "twilio": self._http_client.get_stats() if self._http_client else None
+        }
+    
+    def print_stats(self):
+        """Print the current scheduler statistics."""
+        stats = self.get_stats()
+        print(
+            f"\n📈 Interviews: {stats['completed']} done, {stats['failed']} failed, "
+            f"{stats['in_flight']} in flight, {stats['queue_depth']} queued "
+            f"({stats['interviews_per_minute']}/min)"
+        )
+    
+    async def _report_periodically(self):
+        """Print statistics at a fixed interval."""
+        while True:
+            await asyncio.sleep(SCHEDULER_REPORT_INTERVAL_SECONDS)
+            self.print_stats()
+    
+    async def _session_worker(self):
+        """Pull phone numbers off the queue and interview them one at a time."""
+        while True:
+            phone_number = await self.queue.get()
+            self.in_flight += 1
+            try:
+                responses = await self.conduct_interview(phone_number)
+                self.results[phone_number] = responses
+                if responses is None:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+    
+    async def say(self, phone_number, message):
+        """
+        Speak a message to the trucker over an outbound call.
+        
+        Args:
+            phone_number (str): Phone number to call (in E.164 format)
+            message (str): Message to speak during the call
+        
+        Returns:
+            str: Call SID if successful
+        """
+        async with self._twilio_slots:
+            try:
+                call = await self._client.calls.create_async(
+                    to=phone_number,
+                    from_=TWILIO_PHONE_NUMBER,
+                    twiml=build_say_twiml(message)
+                )
+                return call.sid
+            except Exception as e:
+                print(f"Error making call to {phone_number}: {str(e)}")
+                return None
+    
+    async def record(self, key):
+        """Record one answer on the I/O pool."""
+        output_file = f"response_{key}.wav" if SAVE_RESPONSE_AUDIO else None
+        async with self._recording_slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._io_pool,
+                lambda: record_audio_buffer(
+                    duration=MAX_ANSWER_SECONDS,
+                    output_file=output_file,
+                    stop_on_silence=True
+                )
+            )
+    
+    async def transcribe(self, audio):
+        """Transcribe one answer on the batch service or the Whisper worker pool."""
+        if self.batch_transcription:
+            return await asyncio.wrap_future(get_transcription_service().submit(audio))
+        
+        async with self._transcription_slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._transcription_pool, _transcribe_in_worker, audio
+            )
+    
+    async def conduct_interview(self, phone_number):
+        """
+        Conduct an interview with the trucker using the predefined questions.
+        
+        Args:
+            phone_number (str): Trucker's phone number
+        
+        Returns:
+            dict: Responses keyed by question, or None if the interview failed
+        """
+        responses = {}
+        
+        try:
+            await self.say(phone_number, GREETING)
+            await asyncio.sleep(2)  # Wait for the greeting to finish
+            
+            for key, question in DISPATCH_QUESTIONS:
+                await self.say(phone_number, question)
+                await asyncio.sleep(1)  # Wait for the question to finish
+                
+                audio = await self.record(key)
+                response = await self.transcribe(audio)
+                
+                responses[key] = {
+                    "question": question,
+                    "response": response,
+                    "timestamp": datetime.now().isoformat()
+                }
+                
+                await self.say(phone_number, ACKNOWLEDGMENT)
+                await asyncio.sleep(1)
+            
+            await self.say(phone_number, CONCLUSION)
+            
+            # Persisting touches the disk and notifies the dispatcher, keep it off the loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._io_pool, save_responses, responses, phone_number)
+            if not await loop.run_in_executor(self._io_pool, save_lead, responses, phone_number):
+                print(f"\n⚠️ Failed to save lead for {phone_number}")
+            
+            return responses
+            
+        except Exception as e:
+            print(f"\n❌ Error during interview with {phone_number}: {str(e)}")
+            return None
+
+async def _run(phone_numbers, scheduler):
+    """Feed phone numbers into the scheduler and wait for them to finish."""
+    await scheduler.start()
+    try:
+        for phone_number in phone_numbers:
+            await scheduler.submit(phone_number)
+        await scheduler.join()
+    finally:
+        await scheduler.stop()
+    return scheduler.results
+
+def run_interviews(phone_numbers, **scheduler_options):
+    """
+    Interview many truckers concurrently.
+    
+    Args:
+        phone_numbers (iterable): Trucker phone numbers to interview
+        **scheduler_options: Overrides for the InterviewScheduler limits
+    
+    Returns:
+        dict: Responses keyed by phone number (None for failed interviews)
+    """
+    scheduler = InterviewScheduler(**scheduler_options)
+    results = asyncio.run(_run(phone_numbers, scheduler))
+    scheduler.print_stats()
+    return results
+
+if __name__ == "__main__":
+    import sys
+    
+    run_interviews(sys.argv[1:])
\ No newline at end of file
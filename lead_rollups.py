@@ -0,0 +1,256 @@
+"""
+Time-series rollups of saved leads for the dashboard charts.
+
+Every saved lead is added to an hourly and a daily bucket holding the lead
+count, the score sum and a HyperLogLog sketch of the locations seen, and to
+a per-lane daily bucket holding the count, score sum and count error. Charts
+and recent metrics are then read from the buckets, so their cost depends on
+the number of buckets kept rather than the number of leads. Buckets older
+than their retention are dropped as new ones are opened, and each day keeps
+only its busiest lanes: when the day is full, a new lane replaces the least
+counted one and inherits its count (the Space-Saving algorithm), so a busy
+lane that shows up late can still climb past the quiet ones.
+"""
+
+import base64
+import hashlib
+import math
+from datetime import datetime, timedelta
+from config import ROLLUP_HOURLY_RETENTION_HOURS, ROLLUP_DAILY_RETENTION_DAYS
+from config import ROLLUP_LANE_RETENTION_DAYS, ROLLUP_LANES_PER_DAY, ROLLUP_SKETCH_PRECISION
+
+HOUR_FORMAT = "%Y-%m-%dT%H"
+DAY_FORMAT = "%Y-%m-%d"
+
+# Marks a sketch stored as (index, rank) pairs
+SPARSE_PREFIX = "s:"
+
+def hour_key(timestamp):
+    """Get the hourly bucket of an ISO timestamp, e.g. "2024-06-01T12"."""
+    return timestamp[:13]
+
+def day_key(timestamp):
+    """Get the daily bucket of an ISO timestamp, e.g. "2024-06-01"."""
+    return timestamp[:10]
+
+def lane_label(origin, destination):
+    """Get the rollup key of a lane."""
+    return f"{origin or '?'} → {destination or '?'}"
+
+class HyperLogLog:
+    def __init__(self, registers=None, precision=ROLLUP_SKETCH_PRECISION):
+        """
+        Initialize a distinct-count sketch.
+        
+        Args:
+            registers (str): Registers from to_string(), empty sketch if None
+            precision (int): log2 of the register count; 8 gives about 6.5% error
+        """
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+        if registers and registers.startswith(SPARSE_PREFIX):
+            data = base64.b64decode(registers[len(SPARSE_PREFIX):])
+            for i in range(0, len(data), 3):
+                self.registers[int.from_bytes(data[i:i + 2], "big")] = data[i + 2]
+        elif registers:
+            self.registers = bytearray(base64.b64decode(registers))
+    
+    def add(self, value):
+        """Add a value to the sketch."""
+        h = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other):
+        """Add every value counted by another sketch of the same precision."""
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+    
+    def count(self):
+        """Estimate the number of distinct values added."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate for small counts
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+    
+    def to_string(self):
+        """
+        Get the registers as a compact string for the sidecar.
+        
+        Most buckets see only a few locations, so a sketch with few set
+        registers is stored as (index, rank) pairs instead of every register.
+        """
+        used = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if len(used) * 3 < self.m:
+            data = b"".join(index.to_bytes(2, "big") + bytes([rank]) for index, rank in used)
+            return SPARSE_PREFIX + base64.b64encode(data).decode()
+        return base64.b64encode(bytes(self.registers)).decode()
+
+class Rollups:
+    def __init__(self, data=None):
+        """
+        Initialize rollups.
+        
+        Args:
+            data (dict): Previously saved rollups, empty rollups if None
+        """
+        data = data or {}
+        self.hourly = data.get("hourly", {})
+        self.daily = data.get("daily", {})
+        self.lanes = data.get("lanes", {})
+    
+    def _bucket(self, buckets, key):
+        """Get a count bucket, opening it if needed."""
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {"count": 0, "score_sum": 0.0, "locations": None}
+        return bucket
+    
+    def record(self, timestamp, score, locations, lane):
+        """
+        Add one new lead to the rollups.
+        
+        Args:
+            timestamp (str): ISO time the lead was captured
+            score (float): Lead score
+            locations (list): Normalized locations the lead mentions
+            lane (str): Key from lane_label
+        """
+        hour, day = hour_key(timestamp), day_key(timestamp)
+        opened = hour not in self.hourly or day not in self.lanes
+        
+        for bucket in (self._bucket(self.hourly, hour), self._bucket(self.daily, day)):
+            bucket["count"] += 1
+            bucket["score_sum"] = round(bucket["score_sum"] + score, 6)
+            sketch = HyperLogLog(bucket["locations"])
+            for location in locations:
+                sketch.add(location)
+            bucket["locations"] = sketch.to_string()
+        
+        day_lanes = self.lanes.setdefault(day, {})
+        lane_bucket = day_lanes.get(lane)
+        if lane_bucket is None:
+            inherited = 0
+            if len(day_lanes) >= ROLLUP_LANES_PER_DAY:
+                # Replace the day's least counted lane; its count is the new lane's possible overcount
+                least = min(day_lanes, key=lambda key: day_lanes[key][0])
+                inherited = day_lanes.pop(least)[0]
+            lane_bucket = day_lanes[lane] = [inherited, 0.0, inherited]
+        lane_bucket[0] += 1
+        lane_bucket[1] = round(lane_bucket[1] + score, 6)
+        
+        if opened:
+            self.prune(timestamp)
+    
+    def record_rescore(self, timestamp, old_score, new_score, lane):
+        """Move an existing lead's score in the buckets it was counted in, if still kept."""
+        delta = new_score - old_score
+        for buckets, key in ((self.hourly, hour_key(timestamp)), (self.daily, day_key(timestamp))):
+            if key in buckets:
+                buckets[key]["score_sum"] = round(buckets[key]["score_sum"] + delta, 6)
+        lane_bucket = self.lanes.get(day_key(timestamp), {}).get(lane)
+        if lane_bucket is not None:
+            lane_bucket[1] = round(lane_bucket[1] + delta, 6)
+    
+    def prune(self, timestamp):
+        """
+        Drop buckets that fell out of their retention.
+        
+        Retention is counted back from the newest lead rather than the clock,
+        so rebuilding from the store gives the same buckets.
+        """
+        newest = max(timestamp, max(self.hourly, default=""))
+        try:
+            newest_time = datetime.fromisoformat(hour_key(newest))
+        except ValueError:
+            return
+        cutoffs = (
+            (self.hourly, (newest_time - timedelta(hours=ROLLUP_HOURLY_RETENTION_HOURS)).strftime(HOUR_FORMAT)),
+            (self.daily, (newest_time - timedelta(days=ROLLUP_DAILY_RETENTION_DAYS)).strftime(DAY_FORMAT)),
+            (self.lanes, (newest_time - timedelta(days=ROLLUP_LANE_RETENTION_DAYS)).strftime(DAY_FORMAT))
+        )
+        for buckets, cutoff in cutoffs:
+            for key in [key for key in buckets if key < cutoff]:
+                del buckets[key]
+    
+    def to_dict(self):
+        """Get the rollups as a JSON-serializable dictionary."""
+        return {"hourly": self.hourly, "daily": self.daily, "lanes": self.lanes}
+    
+    def series(self, buckets, since=None):
+        """
+        Get count and average score per bucket.
+        
+        Args:
+            buckets (dict): self.hourly or self.daily
+            since (str): Only buckets with this key or later
+        
+        Returns:
+            list: (key, count, average score) tuples, oldest first
+        """
+        return [
+            (key, bucket["count"], bucket["score_sum"] / bucket["count"] if bucket["count"] else 0.0)
+            for key, bucket in sorted(buckets.items())
+            if since is None or key >= since
+        ]
+    
+    def hourly_series(self, hours=None, now=None):
+        """Get (hour, count, average score) for the last few hours, all kept hours if None."""
+        since = None
+        if hours is not None:
+            since = ((now or datetime.now()) - timedelta(hours=hours)).strftime(HOUR_FORMAT)
+        return self.series(self.hourly, since)
+    
+    def daily_series(self):
+        """Get (day, count, average score) for every kept day."""
+        return self.series(self.daily)
+    
+    def distinct_locations(self, hours, now=None):
+        """
+        Estimate the number of distinct locations seen in the last few hours.
+        
+        Args:
+            hours (float): How far back to look, at most the hourly retention
+            now (datetime): End of the window, defaults to the current time
+        
+        Returns:
+            int: Estimated distinct locations
+        """
+        since = ((now or datetime.now()) - timedelta(hours=hours)).strftime(HOUR_FORMAT)
+        merged = HyperLogLog()
+        for key, bucket in self.hourly.items():
+            if key >= since and bucket["locations"]:
+                merged.merge(HyperLogLog(bucket["locations"]))
+        return merged.count()
+    
+    def lane_series(self, top=5):
+        """
+        Get the average score per day of the busiest lanes.
+        
+        Args:
+            top (int): Number of lanes, by lead count over the kept days
+        
+        Returns:
+            dict: lane -> list of (day, average score), oldest first
+        """
+        totals = {}
+        for lanes in self.lanes.values():
+            for lane, (count, _, _) in lanes.items():
+                totals[lane] = totals.get(lane, 0) + count
+        busiest = sorted(totals, key=totals.get, reverse=True)[:top]
+        
+        # Only the leads counted since the lane was last added to its day contributed scores
+        return {
+            lane: [
+                (day, lanes[lane][1] / (lanes[lane][0] - lanes[lane][2]))
+                for day, lanes in sorted(self.lanes.items())
+                if lane in lanes
+            ]
+            for lane in busiest
+        }
\ No newline at end of file
@@ -3,7 +3,19 @@ Module for scoring and ranking trucker leads based on various criteria.
 """
 
 from datetime import datetime, timedelta
-import re
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config import SCORING_TABLES_FILE, SCORING_TABLES_CHECK_SECONDS
+from eta_parser import parse_eta, PARSER_VERSION
+from scoring_matcher import normalize_location, KeywordMatcher, RouteMatcher, load_scoring_tables
+
+# Score components, in the order they are weighted and summed
+COMPONENTS = ['truck_type', 'availability', 'route']
 
 # Scoring weights
 WEIGHTS = {
@@ -31,9 +43,97 @@ PREFERRED_ROUTES = {
     ('houston', 'denver'): 0.7
 }
 
-def normalize_location(location):
-    """Normalize location string for comparison."""
-    return location.lower().strip()
+# Cargo words that always mean a refrigerated truck
+REFRIGERATED_WORDS = ['refrigerated', 'reefer', 'cold', 'frozen']
+
+# The batch scorer clamps ETAs to this distance from now to stay inside datetime64[ns]
+ETA_CLAMP = timedelta(days=36500)
+
+_compiled = None  # (truck type matcher, route matcher, table versions)
+_compiled_signature = None
+_compiled_checked = None  # time.monotonic() of the last look at the tables file
+_compiled_lock = threading.Lock()
+
+def _tables_signature(path):
+    """Identify the current version of the scoring tables file."""
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    except (OSError, TypeError):
+        return (path, None, None)
+
+def _version_hash(rules):
+    """Hash a set of scoring rules into a short version string."""
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:12]
+
+def _compile():
+    """
+    Get the compiled matchers and table versions, recompiling if the tables file changed.
+    
+    Every lead is scored through here, so the tables file is only looked at
+    once every SCORING_TABLES_CHECK_SECONDS rather than on every call.
+    """
+    global _compiled, _compiled_signature, _compiled_checked
+    now = time.monotonic()
+    if _compiled is not None and now - _compiled_checked < SCORING_TABLES_CHECK_SECONDS:
+        return _compiled
+    
+    signature = _tables_signature(SCORING_TABLES_FILE)
+    _compiled_checked = now
+    if _compiled is not None and signature == _compiled_signature:
+        return _compiled
+    
+    with _compiled_lock:
+        if _compiled is None or signature != _compiled_signature:
+            truck_types, refrigerated_words, preferred_routes = load_scoring_tables(
+                SCORING_TABLES_FILE, TRUCK_TYPES, REFRIGERATED_WORDS, PREFERRED_ROUTES
+            )
+            # Refrigerated cargo outranks every truck type, then table order
+            keywords = [(word, truck_types['reefer']) for word in refrigerated_words]
+            keywords += list(truck_types.items())
+            
+            # Table order matters for both matchers, so it is part of the version
+            versions = {
+                'truck_type': _version_hash(keywords),
+                'route': _version_hash([[origin, destination, score] for (origin, destination), score in preferred_routes.items()]),
+                'availability': _version_hash({'parser': PARSER_VERSION})
+            }
+            _compiled = (KeywordMatcher(keywords), RouteMatcher(preferred_routes.items()), versions)
+            _compiled_signature = signature
+        return _compiled
+
+def get_matchers():
+    """
+    Get the compiled truck type and route matchers.
+    
+    The matchers are compiled on first use and again when the scoring tables
+    file has changed, noticed within SCORING_TABLES_CHECK_SECONDS.
+    
+    Returns:
+        tuple: (KeywordMatcher for cargo types, RouteMatcher)
+    """
+    truck_matcher, route_matcher, _ = _compile()
+    return truck_matcher, route_matcher
+
+def get_scoring_versions():
+    """
+    Get the version of the rules behind each score component and the weights.
+    
+    A stored component whose version differs from the current one is stale
+    and gets recomputed by the rescorer.
+    
+    Returns:
+        dict: Component name or "weights" -> version hash
+    """
+    versions = dict(_compile()[2])
+    versions['weights'] = _version_hash(WEIGHTS)
+    return versions
+
+def reload_scoring_tables():
+    """Recompile the matchers on next use, e.g. after editing the built-in tables."""
+    global _compiled
+    with _compiled_lock:
+        _compiled = None
 
 def score_truck_type(cargo_type):
     """
@@ -45,25 +145,16 @@ def score_truck_type(cargo_type):
     Returns:
         float: Score between 0 and 1
     """
-    cargo_type = cargo_type.lower()
-    
-    # Check for refrigerated cargo
-    if any(word in cargo_type for word in ['refrigerated', 'reefer', 'cold', 'frozen']):
-        return TRUCK_TYPES['reefer']
-    
-    # Check for other truck types
-    for truck_type, score in TRUCK_TYPES.items():
-        if truck_type in cargo_type:
-            return score
-    
-    return 0.5  # Default score for unknown types
+    # Refrigerated cargo first, then truck types; 0.5 for unknown types
+    return get_matchers()[0].score(cargo_type)
 
-def score_availability(eta):
+def score_availability(eta, now=None):
     """
     Score based on availability timing.
     
     Args:
         eta (str): Estimated arrival time
+        now (datetime): Reference time, defaults to the current time
     
     Returns:
         float: Score between 0 and 1
@@ -73,24 +164,19 @@ def score_availability(eta):
         if 'today' in eta.lower():
             return 1.0
         
-        # Try to extract date and time
-        now = datetime.now()
+        # Written dates and spoken forms like "tomorrow at 3 pm"
+        now = now or datetime.now()
+        eta_date = parse_eta(eta, now)
+        if eta_date is None:
+            return 0.5  # Default score if parsing fails
         
-        # Try different date formats
-        for fmt in ['%Y-%m-%d %H:%M', '%m/%d/%Y %H:%M', '%Y-%m-%d']:
-            try:
-                eta_date = datetime.strptime(eta, fmt)
-                # Score higher for availability within 24 hours
-                if eta_date - now <= timedelta(hours=24):
-                    return 0.9
-                elif eta_date - now <= timedelta(days=3):
-                    return 0.7
-                else:
-                    return 0.5
-            except ValueError:
-                continue
-        
-        return 0.5  # Default score if parsing fails
+        # Score higher for availability within 24 hours
+        if eta_date - now <= timedelta(hours=24):
+            return 0.9
+        elif eta_date - now <= timedelta(days=3):
+            return 0.7
+        else:
+            return 0.5
         
     except Exception:
         return 0.5  # Default score for any errors
@@ -106,65 +192,216 @@ def score_route(origin, destination):
     Returns:
         float: Score between 0 and 1
     """
-    origin = normalize_location(origin)
-    destination = normalize_location(destination)
-    
-    # Check for exact route match
-    route = (origin, destination)
-    if route in PREFERRED_ROUTES:
-        return PREFERRED_ROUTES[route]
-    
-    # Check for partial matches (e.g., "Los Angeles, CA" matches "los angeles")
-    for (pref_origin, pref_dest), score in PREFERRED_ROUTES.items():
-        if pref_origin in origin and pref_dest in destination:
-            return score * 0.9  # Slightly lower score for partial matches
-    
-    return 0.5  # Default score for unknown routes
+    # Exact lanes first, then partial matches (e.g., "Los Angeles, CA" matches
+    # "los angeles") at a slightly lower score; 0.5 for unknown routes
+    return get_matchers()[1].score(origin, destination)
+
+def _response_text(lead, key):
+    """Get one response of a lead, '' when the lead has no answer or a None one."""
+    return ((lead.get('responses') or {}).get(key) or {}).get('response') or ''
 
-def calculate_lead_score(lead):
+def score_components(lead, now=None, components=COMPONENTS):
     """
-    Calculate overall score for a lead.
+    Score the individual components of a lead.
     
     Args:
         lead (dict): Lead dictionary containing responses
+        now (datetime): Reference time for availability, defaults to the current time
+        components (list): Components to score, all of them by default
     
     Returns:
-        float: Overall score between 0 and 1
+        dict: Component name -> score between 0 and 1
     """
-    responses = lead['responses']
+    scores = {}
     
-    # Get individual scores
-    truck_score = score_truck_type(
-        responses.get('cargo_type', {}).get('response', '')
-    )
+    if 'truck_type' in components:
+        scores['truck_type'] = score_truck_type(
+            _response_text(lead, 'cargo_type')
+        )
     
-    availability_score = score_availability(
-        responses.get('estimated_arrival', {}).get('response', '')
-    )
+    if 'availability' in components:
+        scores['availability'] = score_availability(
+            _response_text(lead, 'estimated_arrival'),
+            now
+        )
     
-    route_score = score_route(
-        responses.get('current_location', {}).get('response', ''),
-        responses.get('destination', {}).get('response', '')
-    )
+    if 'route' in components:
+        scores['route'] = score_route(
+            _response_text(lead, 'current_location'),
+            _response_text(lead, 'destination')
+        )
     
+    return scores
+
+def combine_components(components):
+    """
+    Combine component scores into the overall score.
+    
+    Args:
+        components (dict): Score of every component
+    
+    Returns:
+        float: Overall score between 0 and 1
+    """
     # Calculate weighted score
     overall_score = (
-        truck_score * WEIGHTS['truck_type'] +
-        availability_score * WEIGHTS['availability'] +
-        route_score * WEIGHTS['route']
+        components['truck_type'] * WEIGHTS['truck_type'] +
+        components['availability'] * WEIGHTS['availability'] +
+        components['route'] * WEIGHTS['route']
     )
     
     return round(overall_score, 2)
 
-def add_score_to_lead(lead):
+def calculate_lead_score(lead, now=None):
+    """
+    Calculate overall score for a lead.
+    
+    Args:
+        lead (dict): Lead dictionary containing responses
+        now (datetime): Reference time for availability, defaults to the current time
+    
+    Returns:
+        float: Overall score between 0 and 1
+    """
+    return combine_components(score_components(lead, now))
+
+def add_score_to_lead(lead, now=None):
     """
     Add score to lead dictionary.
     
+    The component scores and the versions of the rules behind them are
+    stored too, so a rule change only recomputes what it affects.
+    
     Args:
         lead (dict): Lead dictionary
+        now (datetime): Reference time for availability, defaults to the current time
     
     Returns:
         dict: Lead dictionary with added score
     """
-    lead['score'] = calculate_lead_score(lead)
-    return lead 
\ No newline at end of file
+    components = score_components(lead, now)
+    lead['score'] = combine_components(components)
+    lead['score_components'] = components
+    lead['score_versions'] = get_scoring_versions()
+    return lead 
+
+def _response_column(leads, key):
+    """Extract one response from every lead as a string Series."""
+    return pd.Series(
+        [_response_text(lead, key) for lead in leads],
+        dtype=object
+    )
+
+def score_truck_type_batch(cargo_types):
+    """
+    Vectorized score_truck_type.
+    
+    Args:
+        cargo_types (pd.Series): Cargo type strings
+    
+    Returns:
+        np.ndarray: Scores between 0 and 1
+    """
+    # The compiled keyword pattern runs over the whole column at once
+    return get_matchers()[0].score_series(cargo_types)
+
+def score_availability_batch(etas, now=None):
+    """
+    Vectorized score_availability.
+    
+    Args:
+        etas (pd.Series): Estimated arrival strings
+        now (datetime): Reference time, defaults to the current time
+    
+    Returns:
+        np.ndarray: Scores between 0 and 1
+    """
+    now = now or datetime.now()
+    is_today = etas.str.lower().str.contains('today', regex=False).to_numpy(dtype=bool)
+    
+    # Each distinct string goes through the cached parser once
+    parsed_unique = {eta: parse_eta(eta, now) for eta in etas[~is_today].unique()}
+    
+    # Dates decades away still score like the far past or future once clamped
+    for eta, eta_date in parsed_unique.items():
+        if eta_date is not None:
+            parsed_unique[eta] = min(max(eta_date, now - ETA_CLAMP), now + ETA_CLAMP)
+    parsed = pd.to_datetime(etas.map(parsed_unique))
+    
+    delta = (parsed - pd.Timestamp(now)).to_numpy()
+    has_date = ~np.isnat(delta)
+    return np.select(
+        [
+            is_today,
+            has_date & (delta <= np.timedelta64(timedelta(hours=24))),
+            has_date & (delta <= np.timedelta64(timedelta(days=3)))
+        ],
+        [1.0, 0.9, 0.7],
+        default=0.5
+    )
+
+def score_route_batch(origins, destinations):
+    """
+    Vectorized score_route.
+    
+    Args:
+        origins (pd.Series): Starting locations
+        destinations (pd.Series): Ending locations
+    
+    Returns:
+        np.ndarray: Scores between 0 and 1
+    """
+    # Exact lanes by hash lookup, partial lanes by joining the city matches
+    return get_matchers()[1].score_series(origins, destinations)
+
+def score_batch(leads, now=None):
+    """
+    Score many leads at once with vectorized sub-scores.
+    
+    Produces exactly the scores calculate_lead_score would give each lead
+    for the same reference time.
+    
+    Args:
+        leads (list): Lead dictionaries containing responses
+        now (datetime): Reference time for availability, defaults to the current time
+    
+    Returns:
+        pd.DataFrame: truck_type, availability, route and score columns, one row per lead
+    """
+    components = np.column_stack([
+        score_truck_type_batch(_response_column(leads, 'cargo_type')),
+        score_availability_batch(_response_column(leads, 'estimated_arrival'), now),
+        score_route_batch(
+            _response_column(leads, 'current_location'),
+            _response_column(leads, 'destination')
+        )
+    ]).reshape(len(leads), 3)
+    
+    weighted = components * np.array([WEIGHTS['truck_type'], WEIGHTS['availability'], WEIGHTS['route']])
+    # Sum left to right like calculate_lead_score so the floats round identically
+    overall = weighted[:, 0] + weighted[:, 1] + weighted[:, 2]
+    
+    return pd.DataFrame({
+        'truck_type': components[:, 0],
+        'availability': components[:, 1],
+        'route': components[:, 2],
+        'score': [round(score, 2) for score in overall.tolist()]
+    })
+
+def add_scores_to_leads(leads, now=None):
+    """
+    Add scores to many lead dictionaries at once.
+    
+    Args:
+        leads (list): Lead dictionaries
+        now (datetime): Reference time for availability, defaults to the current time
+    
+    Returns:
+        list: The same leads with their score, components and versions set
+    """
+    versions = get_scoring_versions()
+    for lead, row in zip(leads, score_batch(leads, now).itertuples(index=False)):
+        lead['score'] = row.score
+        lead['score_components'] = {component: getattr(row, component) for component in COMPONENTS}
+        lead['score_versions'] = dict(versions)
+    return leads
\ No newline at end of file
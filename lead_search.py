@@ -0,0 +1,167 @@
+"""
+Inverted token index for searching leads from the dashboard.
+
+Every searchable field of a lead is lowercased and split into alphanumeric
+tokens. Each token maps to the IDs of the leads containing it, and the
+distinct tokens are kept sorted, so a prefix finds its tokens with bisect
+instead of scanning leads. Queries are whitespace separated terms that must
+all match:
+
+    miami            any field has a word starting with "miami"
+    dest:mia         the destination has a word starting with "mia"
+    "new york"       any field contains the literal text "new york"
+    cargo:"dry van"  the cargo type contains the literal text "dry van"
+"""
+
+import bisect
+import re
+
+# Query prefix -> searched field
+FIELDS = {
+    'phone': 'Phone',
+    'date': 'Timestamp',
+    'truck': 'Truck ID',
+    'from': 'Current Location',
+    'origin': 'Current Location',
+    'dest': 'Destination',
+    'to': 'Destination',
+    'destination': 'Destination',
+    'cargo': 'Cargo Type',
+    'eta': 'ETA',
+    'notes': 'Special Requirements',
+    'special': 'Special Requirements',
+    'contact': 'Contact Number'
+}
+
+SEARCH_FIELDS = sorted(set(FIELDS.values()))
+
+TOKEN = re.compile(r'[a-z0-9]+')
+TERM = re.compile(r'(?:(?P<field>[a-z]+):)?(?:"(?P<phrase>[^"]*)"?|(?P<word>\S+))')
+
+def tokenize(text):
+    """Split lowercased text into alphanumeric tokens."""
+    return TOKEN.findall(text.lower())
+
+def parse_query(query):
+    """
+    Split a search query into terms.
+    
+    Args:
+        query (str): Search box text
+    
+    Returns:
+        list: (field or None, text, is_phrase) tuples
+    """
+    terms = []
+    for match in TERM.finditer(query.lower()):
+        field, phrase, word = match.group('field'), match.group('phrase'), match.group('word')
+        if field is not None and field not in FIELDS:
+            # Not a field prefix, e.g. a time like "10:30", so search it as typed
+            field, word = None, match.group(0).strip('"')
+            phrase = None
+        text = phrase if phrase is not None else word
+        if text and text.strip():
+            terms.append((FIELDS.get(field), text.strip(), phrase is not None))
+    return terms
+
+class SearchIndex:
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings = {}  # (field, token) -> set of lead IDs
+        self._vocabulary = {field: [] for field in SEARCH_FIELDS}  # Sorted tokens per field
+        self._texts = {}  # lead ID -> {field: lowercased text}
+    
+    def __len__(self):
+        return len(self._texts)
+    
+    def add(self, lead_id, record):
+        """
+        Index a lead, replacing what was indexed for it before.
+        
+        Args:
+            lead_id (str): Lead ID
+            record (dict): Field values, e.g. from leads_frame.lead_record
+        """
+        self.remove(lead_id)
+        texts = {field: str(record.get(field) or '').lower() for field in SEARCH_FIELDS}
+        self._texts[lead_id] = texts
+        for field, text in texts.items():
+            for token in set(tokenize(text)):
+                key = (field, token)
+                if key not in self._postings:
+                    self._postings[key] = set()
+                    bisect.insort(self._vocabulary[field], token)
+                self._postings[key].add(lead_id)
+    
+    def remove(self, lead_id):
+        """Remove a lead from the index, if present."""
+        texts = self._texts.pop(lead_id, None)
+        if texts is None:
+            return
+        for field, text in texts.items():
+            for token in set(tokenize(text)):
+                key = (field, token)
+                ids = self._postings[key]
+                ids.discard(lead_id)
+                if not ids:
+                    del self._postings[key]
+                    vocabulary = self._vocabulary[field]
+                    del vocabulary[bisect.bisect_left(vocabulary, token)]
+    
+    def _prefix_ids(self, field, prefix):
+        """Get the IDs of leads with a token starting with prefix in a field."""
+        vocabulary = self._vocabulary[field]
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + '\uffff')
+        ids = set()
+        for token in vocabulary[start:end]:
+            ids |= self._postings[(field, token)]
+        return ids
+    
+    def _term_ids(self, field, text, is_phrase):
+        """Get the IDs of leads matching one query term."""
+        fields = [field] if field else SEARCH_FIELDS
+        tokens = tokenize(text)
+        found = set()
+        for searched in fields:
+            candidates = None
+            # The last token may still be being typed; earlier ones are whole
+            # words unless the term is a phrase, which is checked literally below
+            for position, token in enumerate(tokens):
+                if is_phrase or position == len(tokens) - 1:
+                    ids = self._prefix_ids(searched, token)
+                else:
+                    ids = self._postings.get((searched, token), set())
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            
+            if candidates is None:
+                # No alphanumerics in the term, e.g. "+" or "#"
+                candidates = self._texts.keys()
+            if is_phrase or not tokens:
+                candidates = {lead_id for lead_id in candidates if text in self._texts[lead_id][searched]}
+            found |= candidates
+        return found
+    
+    def search(self, query):
+        """
+        Find the leads matching a query.
+        
+        Args:
+            query (str): Search box text, see the module docstring
+        
+        Returns:
+            set: Matching lead IDs, or None if the query is empty and matches everything
+        """
+        terms = parse_query(query)
+        if not terms:
+            return None
+        
+        matches = None
+        for field, text, is_phrase in terms:
+            ids = self._term_ids(field, text, is_phrase)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+Persisted summary statistics for the leads store.
+
+The stats live in a small JSON sidecar next to the store and are updated
+incrementally every time a lead is saved, so the boot banner and dashboard
+can show the lead count, score distribution, last write time and
+per-location counts without reading a single lead. The sidecar also holds
+the hourly, daily and per-lane rollups behind the dashboard charts.
+
+The sidecar is read and rewritten on every save, so nothing in it may grow
+with the number of leads: per-location counts are kept only for the busiest
+origins and destinations, and the number of distinct locations is estimated
+from a fixed-size sketch.
+"""
+
+import json
+import os
+from datetime import datetime
+from lead_scorer import normalize_location
+from lead_rollups import HyperLogLog, Rollups, lane_label
+from leads_store import FileLock, atomic_write
+from config import STATS_TOP_LOCATIONS
+
+HISTOGRAM_BINS = 10  # Score buckets of width 0.1 between 0 and 1
+
+# Bump when the sidecar gains statistics that older sidecars lack, so they are rebuilt
+STATS_VERSION = 4
+
+def _response(lead, key):
+    """Get one response text from a lead."""
+    return lead.get('responses', {}).get(key, {}).get('response', '')
+
+def score_bin(score):
+    """Get the histogram bucket for a score."""
+    return min(int(score * HISTOGRAM_BINS), HISTOGRAM_BINS - 1)
+
+def count_top(counts, key, limit=STATS_TOP_LOCATIONS):
+    """
+    Count one occurrence of a key, keeping at most limit keys.
+    
+    When the table is full, the least counted key is replaced and the new key
+    inherits its count (the Space-Saving algorithm). Frequent keys stay in
+    the table with exact or slightly high counts.
+    
+    Args:
+        counts (dict): key -> count, modified in place
+        key (str): Key seen
+        limit (int): Most keys kept
+    """
+    if key in counts or len(counts) < limit:
+        counts[key] = counts.get(key, 0) + 1
+        return
+    least = min(counts, key=counts.get)
+    counts[key] = counts.pop(least) + 1
+
+class LeadStats:
+    def __init__(self, data=None):
+        """
+        Initialize lead statistics.
+        
+        Args:
+            data (dict): Previously saved statistics, empty stats if None
+        """
+        data = data or {}
+        self.count = data.get("count", 0)
+        self.score_sum = data.get("score_sum", 0.0)
+        self.histogram = data.get("histogram", [0] * HISTOGRAM_BINS)
+        self.last_write = data.get("last_write")  # Newest lead saved
+        self.last_rescore = data.get("last_rescore")  # Last time an existing lead was rescored
+        self.locations = data.get("locations", {})
+        self.destinations = data.get("destinations", {})
+        self.location_sketch = data.get("location_sketch")
+        self.rollups = Rollups(data.get("rollups"))
+    
+    @property
+    def average_score(self):
+        """Get the mean score of all leads."""
+        return self.score_sum / self.count if self.count else 0.0
+    
+    def distinct_locations(self):
+        """Estimate the number of distinct origins and destinations across all leads."""
+        return HyperLogLog(self.location_sketch).count()
+    
+    def record(self, lead):
+        """
+        Add one new lead to the statistics.
+        
+        Args:
+            lead (dict): Scored lead dictionary
+        """
+        score = lead.get('score', 0)
+        self.count += 1
+        self.score_sum += score
+        self.histogram[score_bin(score)] += 1
+        timestamp = lead.get('timestamp') or datetime.now().isoformat()
+        self.last_write = max(self.last_write or timestamp, timestamp)
+        
+        origin = normalize_location(_response(lead, 'current_location'))
+        destination = normalize_location(_response(lead, 'destination'))
+        if origin:
+            count_top(self.locations, origin)
+        if destination:
+            count_top(self.destinations, destination)
+        
+        locations = [location for location in (origin, destination) if location]
+        if locations:
+            sketch = HyperLogLog(self.location_sketch)
+            for location in locations:
+                sketch.add(location)
+            self.location_sketch = sketch.to_string()
+        self.rollups.record(timestamp, score, locations, lane_label(origin, destination))
+    
+    def record_rescore(self, old_score, new_score, lead=None):
+        """
+        Move an existing lead to its new score.
+        
+        Args:
+            old_score (float): Score before rescoring
+            new_score (float): Score after rescoring
+            lead (dict): The rescored lead, to also adjust its rollup buckets
+        """
+        self.score_sum += new_score - old_score
+        self.histogram[score_bin(old_score)] -= 1
+        self.histogram[score_bin(new_score)] += 1
+        self.last_rescore = datetime.now().isoformat()
+        
+        if lead is not None and lead.get('timestamp'):
+            lane = lane_label(
+                normalize_location(_response(lead, 'current_location')),
+                normalize_location(_response(lead, 'destination'))
+            )
+            self.rollups.record_rescore(lead['timestamp'], old_score, new_score, lane)
+    
+    def to_dict(self):
+        """Get the statistics as a JSON-serializable dictionary."""
+        return {
+            "version": STATS_VERSION,
+            "count": self.count,
+            "score_sum": self.score_sum,
+            "histogram": self.histogram,
+            "last_write": self.last_write,
+            "last_rescore": self.last_rescore,
+            "locations": self.locations,
+            "destinations": self.destinations,
+            "location_sketch": self.location_sketch,
+            "rollups": self.rollups.to_dict()
+        }
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load statistics from a sidecar file.
+        
+        Args:
+            path (str): Path of the sidecar file
+        
+        Returns:
+            LeadStats: The saved statistics, or None if there is no readable sidecar
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"⚠️ Error reading {path}, statistics will be rebuilt")
+            return None
+        
+        if data.get("version") != STATS_VERSION:
+            print(f"📦 {path} is from an older version, statistics will be rebuilt")
+            return None
+        return cls(data)
+    
+    def save(self, path):
+        """Atomically write the statistics to a sidecar file."""
+        atomic_write(path, lambda f: json.dump(self.to_dict(), f))
+    
+    @classmethod
+    def rebuild(cls, leads):
+        """
+        Compute statistics from scratch.
+        
+        Args:
+            leads (iterable): Every lead in the store
+        
+        Returns:
+            LeadStats: Fresh statistics
+        """
+        stats = cls()
+        for lead in leads:
+            stats.record(lead)
+        return stats
+
+class StatsSidecar:
+    def __init__(self, path):
+        """
+        Initialize access to a statistics sidecar file.
+        
+        Args:
+            path (str): Path of the sidecar file
+        """
+        self.path = path
+        self.lock = FileLock(path)
+    
+    def read(self, store):
+        """
+        Read the statistics, rebuilding them from the store if the sidecar is missing.
+        
+        Args:
+            store: Leads store with an iter_leads() method
+        
+        Returns:
+            LeadStats: Current statistics
+        """
+        stats = LeadStats.load(self.path)
+        if stats is None:
+            stats = self.rebuild(store)
+        return stats
+    
+    def update(self, store, change):
+        """
+        Apply an incremental change under the sidecar lock.
+        
+        Args:
+            store: Leads store, used only if the sidecar must be rebuilt
+            change (callable): Called with the LeadStats to modify
+        
+        Returns:
+            LeadStats: The updated statistics
+        """
+        with self.lock:
+            stats = LeadStats.load(self.path)
+            if stats is None:
+                # The store already holds the change, so a rebuild includes it
+                stats = LeadStats.rebuild(store.iter_leads())
+            else:
+                change(stats)
+            stats.save(self.path)
+        return stats
+    
+    def rebuild(self, store):
+        """Recompute the statistics from every lead in the store and save them."""
+        with self.lock:
+            stats = LeadStats.rebuild(store.iter_leads())
+            stats.save(self.path)
+        return stats
\ No newline at end of file
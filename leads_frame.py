@@ -0,0 +1,152 @@
+"""
+Typed, incrementally updated DataFrame of the leads store for the dashboard.
+
+Streamlit reruns the dashboard script on every widget change, so building a
+DataFrame from every lead on each rerun makes the page slower as the store
+grows. A LeadsFrame keeps one frame per process and a cursor into the store;
+each refresh asks the store only for the leads written since the cursor and
+upserts them by lead ID, so a rerun without new leads does no work at all.
+Leads are never deleted, so upserting everything again after the JSON Lines
+log is compacted still gives the same frame.
+
+Locations and cargo types are categoricals and timestamps are datetime64,
+which keeps the frame small and makes filtering and sorting vectorized. The
+search index is updated from the same changes, so it always matches the frame.
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+from lead_search import SearchIndex
+
+COLUMNS = [
+    'ID', 'Score', 'Phone', 'Timestamp', 'Truck ID', 'Current Location',
+    'Destination', 'Cargo Type', 'ETA', 'Special Requirements', 'Contact Number'
+]
+
+CATEGORY_COLUMNS = ['Current Location', 'Destination', 'Cargo Type']
+
+# How timestamps are shown and exported
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _response(lead, key):
+    """Get one response text from a lead."""
+    return lead.get('responses', {}).get(key, {}).get('response', '')
+
+def lead_record(lead):
+    """
+    Flatten a lead into one dashboard row.
+    
+    Args:
+        lead (dict): Lead dictionary
+    
+    Returns:
+        dict: Values keyed by COLUMNS
+    """
+    return {
+        'ID': lead['id'],
+        'Score': lead.get('score', 0),
+        'Phone': lead.get('phone_number', ''),
+        'Timestamp': lead.get('timestamp'),
+        'Truck ID': _response(lead, 'truck_id'),
+        'Current Location': _response(lead, 'current_location'),
+        'Destination': _response(lead, 'destination'),
+        'Cargo Type': _response(lead, 'cargo_type'),
+        'ETA': _response(lead, 'estimated_arrival'),
+        'Special Requirements': _response(lead, 'special_requirements'),
+        'Contact Number': _response(lead, 'contact_number')
+    }
+
+def build_frame(leads):
+    """
+    Build a typed frame of leads, indexed by lead ID.
+    
+    Args:
+        leads (iterable): Lead dictionaries
+    
+    Returns:
+        pd.DataFrame: One row per lead, in the given order
+    """
+    df = pd.DataFrame([lead_record(lead) for lead in leads], columns=COLUMNS)
+    df['Score'] = df['Score'].astype(float)
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df.set_index('ID')
+
+def _by_score(df):
+    """Sort highest score first, keeping earlier rows first among ties."""
+    return df.sort_values('Score', ascending=False, kind='stable')
+
+class LeadsFrame:
+    def __init__(self, store):
+        """
+        Initialize an empty frame over a store.
+        
+        Args:
+            store: Leads store with a changes_since() method
+        """
+        self.store = store
+        self.cursor = None
+        self.frame = build_frame([])
+        self.search_index = SearchIndex()
+        self._lock = threading.Lock()
+    
+    def refresh(self):
+        """
+        Bring the frame up to date with the store.
+        
+        The frame is replaced rather than modified, so a frame returned
+        earlier is never changed under its reader.
+        
+        Returns:
+            pd.DataFrame: Every lead, highest score first
+        """
+        with self._lock:
+            leads, cursor = self.store.changes_since(self.cursor)
+            for lead in leads:
+                record = lead_record(lead)
+                record['Timestamp'] = (record['Timestamp'] or '').replace('T', ' ')
+                self.search_index.add(lead['id'], record)
+            if leads:
+                if self.frame.empty:
+                    self.frame = _by_score(build_frame(leads))
+                else:
+                    self.frame = self._upsert(leads)
+            self.cursor = cursor
+            return self.frame
+    
+    def search(self, query):
+        """
+        Find the leads matching a search query.
+        
+        Args:
+            query (str): Query, see lead_search
+        
+        Returns:
+            set: Matching lead IDs, or None if the query matches everything
+        """
+        with self._lock:
+            return self.search_index.search(query)
+    
+    def _upsert(self, leads):
+        """
+        Replace the rows of changed leads and add the rows of new ones.
+        
+        Only the changed rows are sorted; they are then merged into the frame,
+        which is already in score order, so a refresh costs a linear copy of
+        the frame rather than a sort of every lead. Changed rows go after
+        existing rows with the same score, as a stable sort would put them.
+        """
+        changes = _by_score(build_frame(leads))
+        frame = self.frame.drop(index=changes.index, errors='ignore')
+        
+        # Matching categories keep the columns categorical through concat
+        for column in CATEGORY_COLUMNS:
+            categories = frame[column].cat.categories.union(changes[column].cat.categories)
+            frame[column] = frame[column].cat.set_categories(categories)
+            changes[column] = changes[column].cat.set_categories(categories)
+        
+        positions = (-frame['Score']).searchsorted(-changes['Score'], side='right')
+        order = np.insert(np.arange(len(frame)), positions, np.arange(len(frame), len(frame) + len(changes)))
+        return pd.concat([frame, changes]).iloc[order]
\ No newline at end of file
@@ -1,54 +1,65 @@
 """
 Module for managing trucker leads and their responses.
-Handles saving and loading leads from a JSON file.
+Handles saving and loading leads from the configured leads store, either a
+SQLite repository or an append-only JSON Lines log.
 """
 
 import json
 import os
-from datetime import datetime
-from twilio.rest import Client
-from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, DISPATCHER_PHONE_NUMBER
+import threading
+from datetime import datetime, timedelta
+from config import LEADS_BACKEND
 from lead_scorer import add_score_to_lead
+from leads_store import LeadsLog, new_lead_id
+from leads_repository import LeadsRepository
+from lead_stats import StatsSidecar
+from rescorer import Rescorer
+from notifications import get_notifier
 
-LEADS_FILE = "leads.json"
+LEADS_FILE = "leads.json"  # Legacy single-array file, migrated on first use
+LEADS_LOG_FILE = "leads.jsonl"
+LEADS_DB_FILE = "leads.db"
+LEADS_META_FILE = "leads_meta.json"  # Incrementally maintained statistics sidecar
+RESCORE_CHECKPOINT_FILE = "rescore_checkpoint.json"
 
-def send_sms_notification():
-    """
-    Send SMS notification to the human dispatcher about a new lead.
+_store = None
+_store_lock = threading.Lock()
+_stats_sidecar = StatsSidecar(LEADS_META_FILE)
+_rescorer = None
+_rescorer_lock = threading.Lock()
+
+def _open_store():
+    """Open the store selected by config.LEADS_BACKEND, migrating older files into it."""
+    if LEADS_BACKEND == "jsonl":
+        store = LeadsLog(LEADS_LOG_FILE)
+    elif LEADS_BACKEND == "sqlite":
+        store = LeadsRepository(LEADS_DB_FILE)
+        if os.path.exists(LEADS_LOG_FILE):
+            imported = store.migrate_from(LeadsLog(LEADS_LOG_FILE))
+            os.replace(LEADS_LOG_FILE, LEADS_LOG_FILE + ".migrated")
+            print(f"📦 Migrated {imported} leads from {LEADS_LOG_FILE} to {LEADS_DB_FILE}")
+    else:
+        raise ValueError(f"Unknown LEADS_BACKEND: {LEADS_BACKEND}")
     
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        message = client.messages.create(
-            body="New trucker lead captured. Check leads.json.",
-            from_=TWILIO_PHONE_NUMBER,
-            to=DISPATCHER_PHONE_NUMBER
-        )
-        
-        print(f"\n📱 SMS notification sent to dispatcher (SID: {message.sid})")
-        return True
-        
-    except Exception as e:
-        print(f"\n❌ Error sending SMS notification: {str(e)}")
-        return False
+    if os.path.exists(LEADS_FILE):
+        store.migrate_from_json(LEADS_FILE)
+    return store
+
+def get_store():
+    """Get the leads store, migrating the legacy files on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _open_store()
+    return _store
 
 def load_leads():
-    """Load existing leads from the JSON file."""
-    if os.path.exists(LEADS_FILE):
-        try:
-            with open(LEADS_FILE, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            print("⚠️ Error reading leads file. Creating new file.")
-            return []
-    return []
+    """Load existing leads, highest score first."""
+    return list(get_store().query(order_by="score"))
 
 def save_lead(responses, phone_number):
     """
-    Save a new lead to the leads file and notify the dispatcher.
+    Save a new lead to the leads store and queue a dispatcher notification.
     
     Args:
         responses (dict): Dictionary of question keys and responses
@@ -58,37 +69,29 @@ def save_lead(responses, phone_number):
         bool: True if successful, False otherwise
     """
     try:
-        # Load existing leads
-        leads = load_leads()
-        
         # Create new lead entry
+        captured_at = datetime.now()
         new_lead = {
+            "id": new_lead_id(),
             "phone_number": phone_number,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": captured_at.isoformat(),
             "responses": responses
         }
         
-        # Add score to the lead
-        new_lead = add_score_to_lead(new_lead)
-        
-        # Append new lead
-        leads.append(new_lead)
+        # Add score to the lead, availability relative to when it was captured
+        new_lead = add_score_to_lead(new_lead, captured_at)
         
-        # Sort leads by score (highest first)
-        leads.sort(key=lambda x: x.get('score', 0), reverse=True)
+        # Append to the store, no need to read or rewrite existing leads
+        store = get_store()
+        store.append(new_lead)
+        _stats_sidecar.update(store, lambda stats: stats.record(new_lead))
         
-        # Save updated leads
-        with open(LEADS_FILE, 'w') as f:
-            json.dump(leads, f, indent=4)
-        
-        print(f"\n💾 Lead saved to {LEADS_FILE}")
+        print(f"\n💾 Lead saved to {store.path}")
         print(f"📊 Lead score: {new_lead['score']}")
         
-        # Send SMS notification
-        if send_sms_notification():
-            print("✅ Dispatcher notified via SMS")
-        else:
-            print("⚠️ Failed to send SMS notification")
+        # Notify the dispatcher in the background, batched with other new leads
+        get_notifier().notify(new_lead)
+        print("🔔 Dispatcher notification queued")
         
         return True
         
@@ -96,10 +99,79 @@ def save_lead(responses, phone_number):
         print(f"\n❌ Error saving lead: {str(e)}")
         return False
 
+def save_responses(responses, trucker_id):
+    """Save the responses to a JSON file."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"dispatch_responses_{trucker_id}_{timestamp}.json"
+    
+    with open(filename, 'w') as f:
+        json.dump(responses, f, indent=4)
+    
+    print(f"\n💾 Responses saved to {filename}")
+    return filename
+
 def get_all_leads():
-    """Get all saved leads."""
-    return load_leads()
+    """
+    Iterate over all saved leads, highest score first.
+    
+    Leads are streamed from the store's score order rather than collected,
+    so callers that only need one pass never hold every lead.
+    """
+    return get_store().query(order_by="score")
+
+def get_stats():
+    """Get lead statistics from the sidecar without reading any leads."""
+    return _stats_sidecar.read(get_store())
+
+def rebuild_stats():
+    """Recompute the statistics sidecar from every lead in the store."""
+    return _stats_sidecar.rebuild(get_store())
 
 def get_lead_count():
     """Get the total number of leads."""
-    return len(load_leads()) 
\ No newline at end of file
+    return get_stats().count
+
+def get_top_leads(n):
+    """
+    Get the n highest scoring leads.
+    
+    Top K is read from the store on every call: SQLite walks its score index
+    and the JSON Lines log keeps a K-sized heap while scanning. Nothing is
+    cached, so leads saved by other processes and rescoring runs are seen
+    without rebuilding anything.
+    """
+    return list(get_store().query(order_by="score", limit=n))
+
+def get_top_leads_for_lane(origin, destination, n):
+    """Get the n highest scoring leads for a lane."""
+    return list(get_store().query(origin=origin, destination=destination, order_by="score", limit=n))
+
+def get_top_recent_leads(hours, n, now=None):
+    """Get the n highest scoring leads captured in the last few hours."""
+    since = (now or datetime.now()) - timedelta(hours=hours)
+    return list(get_store().query(since=since, order_by="score", limit=n))
+
+def get_leads_in_range(since=None, until=None, limit=None):
+    """Get leads captured in [since, until), newest first."""
+    return list(get_store().query(since=since, until=until, order_by="timestamp", limit=limit))
+
+def get_leads_page(page_number, page_size, order_by="score"):
+    """Get one page of leads, numbered from 0."""
+    return list(get_store().query(order_by=order_by, limit=page_size, offset=page_number * page_size))
+
+def get_rescorer():
+    """Get the rescorer for the leads store."""
+    global _rescorer
+    store = get_store()
+    with _rescorer_lock:
+        if _rescorer is None:
+            _rescorer = Rescorer(store, _stats_sidecar, RESCORE_CHECKPOINT_FILE)
+    return _rescorer
+
+def start_rescoring():
+    """Rescore leads left stale by a scoring rule change on a background thread."""
+    return get_rescorer().start()
+
+def compact_leads():
+    """Drop superseded lead versions from the store."""
+    return get_store().compact() 
\ No newline at end of file
@@ -0,0 +1,350 @@
+"""
+SQLite-backed leads repository.
+
+Leads are stored one row each, with the full lead kept as JSON next to
+indexed columns for score, timestamp, phone number and route. Queries for
+the top leads, counts, time ranges and pages are answered from the indexes
+instead of deserializing every lead. The database runs in WAL mode so
+readers (dashboard, view_leads) never block the interview writers.
+
+Every insert or update stamps the row with the next change sequence number,
+so readers can fetch just the leads written since they last looked.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from lead_scorer import normalize_location
+from leads_store import new_lead_id, as_iso_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id TEXT PRIMARY KEY,
+    phone_number TEXT,
+    timestamp TEXT,
+    score REAL,
+    origin TEXT,
+    destination TEXT,
+    data TEXT NOT NULL,
+    seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (score DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_timestamp ON leads (timestamp);
+CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads (phone_number);
+CREATE INDEX IF NOT EXISTS idx_leads_route ON leads (origin, destination);
+CREATE INDEX IF NOT EXISTS idx_leads_lane_score ON leads (origin, destination, score DESC);
+"""
+
+# Databases created before the change sequence get the column on open, then the index
+SEQ_INDEX = "CREATE INDEX IF NOT EXISTS idx_leads_seq ON leads (seq);"
+
+ORDER_BY = {
+    None: "rowid",
+    "score": "score DESC, rowid",
+    "timestamp": "timestamp DESC, rowid",
+    "oldest": "timestamp ASC, rowid"
+}
+
+def _response(lead, key):
+    """Get one response text from a lead."""
+    return lead.get('responses', {}).get(key, {}).get('response', '')
+
+class LeadsRepository:
+    def __init__(self, path):
+        """
+        Initialize the repository, creating the schema if needed.
+        
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+        self._add_seq_column()
+    
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _add_seq_column(self):
+        """Add the change sequence to a database created without it, numbering rows in insertion order."""
+        conn = self._connect()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(leads)")]
+        with conn:
+            if "seq" not in columns:
+                conn.execute("ALTER TABLE leads ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE leads SET seq = rowid")
+            conn.execute(SEQ_INDEX)
+    
+    def _row(self, lead):
+        """Build the column values for a lead."""
+        return (
+            lead["id"],
+            lead.get("phone_number"),
+            lead.get("timestamp"),
+            lead.get("score", 0),
+            normalize_location(_response(lead, 'current_location')),
+            normalize_location(_response(lead, 'destination')),
+            json.dumps(lead)
+        )
+    
+    def append(self, lead):
+        """
+        Insert a lead, or replace the stored version of an existing lead.
+        
+        Args:
+            lead (dict): Lead dictionary, an "id" is assigned if missing
+        
+        Returns:
+            dict: The stored lead
+        """
+        return self.append_many([lead])[0]
+    
+    def append_many(self, leads):
+        """
+        Insert or replace several leads in one transaction.
+        
+        Args:
+            leads (list): Lead dictionaries, an "id" is assigned where missing
+        
+        Returns:
+            list: The stored leads
+        """
+        for lead in leads:
+            lead.setdefault("id", new_lead_id())
+        
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO leads (id, phone_number, timestamp, score, origin, destination, data, seq)
+                VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM leads))
+                ON CONFLICT (id) DO UPDATE SET
+                    phone_number = excluded.phone_number,
+                    timestamp = excluded.timestamp,
+                    score = excluded.score,
+                    origin = excluded.origin,
+                    destination = excluded.destination,
+                    data = excluded.data,
+                    seq = excluded.seq
+                """,
+                [self._row(lead) for lead in leads]
+            )
+        return leads
+    
+    def get(self, lead_id):
+        """Get a lead by ID, or None."""
+        row = self._connect().execute("SELECT data FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def iter_leads(self):
+        """
+        Iterate over every lead in insertion order.
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        return self.query()
+    
+    def query(self, min_score=None, since=None, until=None, order_by=None, limit=None, offset=0, origin=None, destination=None):
+        """
+        Query leads using the indexes.
+        
+        Top K by score, overall or for one lane, walks the score indexes and
+        stops after K rows, so it does not depend on how many leads exist.
+        
+        Args:
+            min_score (float): Only leads scoring at least this much
+            since (datetime or str): Only leads captured at or after this time
+            until (datetime or str): Only leads captured before this time
+            order_by (str): None for insertion order, "score" for highest score
+                first, "timestamp" for newest first or "oldest" for oldest first
+            limit (int): Most leads to return
+            offset (int): Leads to skip, for pagination
+            origin (str): Only leads starting from this location
+            destination (str): Only leads going to this location
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        clauses, params = [], []
+        if origin is not None:
+            clauses.append("origin = ?")
+            params.append(normalize_location(origin))
+        if destination is not None:
+            clauses.append("destination = ?")
+            params.append(normalize_location(destination))
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(as_iso_timestamp(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(as_iso_timestamp(until))
+        
+        sql = "SELECT data FROM leads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {ORDER_BY[order_by]}"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+        
+        for (data,) in self._connect().execute(sql, params):
+            yield json.loads(data)
+    
+    def iter_leads_by_id(self, after=None, chunk_size=500):
+        """
+        Iterate over every lead in ID order.
+        
+        Leads are read in chunks along the primary key, so writers only ever
+        wait for one short read.
+        
+        Args:
+            after (str): Only leads with an ID greater than this one
+            chunk_size (int): Leads read per query
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        after = after or ""
+        while True:
+            rows = self._connect().execute(
+                "SELECT id, data FROM leads WHERE id > ? ORDER BY id LIMIT ?", (after, chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            for _, data in rows:
+                yield json.loads(data)
+            after = rows[-1][0]
+    
+    def changes_since(self, cursor=None, limit=None):
+        """
+        Get the leads inserted or updated since a cursor.
+        
+        Args:
+            cursor (int): Cursor from a previous call, None for every lead
+            limit (int): Most leads to return, None for all of them
+        
+        Returns:
+            tuple: (leads in change order, cursor for the next call)
+        """
+        rows = self._connect().execute(
+            "SELECT seq, data FROM leads WHERE seq > ? ORDER BY seq LIMIT ?",
+            (cursor or 0, -1 if limit is None else limit)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [json.loads(data) for _, data in rows], rows[-1][0]
+    
+    def top_by_score(self, n):
+        """Get the n highest scoring leads."""
+        return list(self.query(order_by="score", limit=n))
+    
+    def in_time_range(self, since=None, until=None, limit=None):
+        """Get leads captured in [since, until), newest first."""
+        return list(self.query(since=since, until=until, order_by="timestamp", limit=limit))
+    
+    def page(self, page_number, page_size, order_by="score"):
+        """Get one page of leads, numbered from 0."""
+        return list(self.query(order_by=order_by, limit=page_size, offset=page_number * page_size))
+    
+    def by_phone(self, phone_number):
+        """Get every lead captured from a phone number."""
+        rows = self._connect().execute(
+            "SELECT data FROM leads WHERE phone_number = ? ORDER BY timestamp DESC", (phone_number,)
+        )
+        return [json.loads(data) for (data,) in rows]
+    
+    def by_route(self, origin, destination=None):
+        """Get leads for an origin, or an origin and destination, highest score first."""
+        sql = "SELECT data FROM leads WHERE origin = ?"
+        params = [normalize_location(origin)]
+        if destination is not None:
+            sql += " AND destination = ?"
+            params.append(normalize_location(destination))
+        rows = self._connect().execute(sql + " ORDER BY score DESC", params)
+        return [json.loads(data) for (data,) in rows]
+    
+    def count(self, min_score=None):
+        """Get the number of leads, optionally only those scoring at least min_score."""
+        if min_score is None:
+            return self._connect().execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM leads WHERE score >= ?", (min_score,)
+        ).fetchone()[0]
+    
+    def sync(self):
+        """Checkpoint the write-ahead log into the main database file."""
+        self._connect().execute("PRAGMA wal_checkpoint(PASSIVE)")
+    
+    def compact(self):
+        """Checkpoint the write-ahead log and reclaim free pages."""
+        conn = self._connect()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        return self.count()
+    
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    def migrate_from(self, source):
+        """
+        Import every lead from another store, such as a LeadsLog.
+        
+        Args:
+            source: Store with an iter_leads() method
+        
+        Returns:
+            int: Number of leads imported
+        """
+        imported = 0
+        batch = []
+        for lead in source.iter_leads():
+            batch.append(lead)
+            if len(batch) >= 1000:
+                imported += len(self.append_many(batch))
+                batch = []
+        if batch:
+            imported += len(self.append_many(batch))
+        return imported
+    
+    def migrate_from_json(self, json_path):
+        """
+        Import leads from the legacy leads.json array file.
+        
+        The legacy file is renamed to <name>.migrated afterwards so the import
+        runs only once.
+        
+        Args:
+            json_path (str): Path of the legacy JSON file
+        
+        Returns:
+            int: Number of leads imported
+        """
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r") as f:
+                leads = json.load(f)
+        except json.JSONDecodeError:
+            print(f"⚠️ Error reading {json_path}, nothing migrated")
+            return 0
+        
+        self.append_many(leads)
+        os.replace(json_path, json_path + ".migrated")
+        print(f"📦 Migrated {len(leads)} leads from {json_path} to {self.path}")
+        return len(leads)
\ No newline at end of file
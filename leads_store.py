@@ -0,0 +1,438 @@
+"""
+Append-only JSON Lines store for leads.
+
+Each save appends one line to the log instead of rewriting the whole file, so
+the cost of saving a lead does not grow with the number of leads. A lead is
+identified by its "id"; writing a lead again appends a newer version and the
+latest line wins. Compaction rewrites the log with only the latest versions
+and atomically swaps it into place.
+
+Writers in different processes are serialized with an advisory file lock.
+Every append is flushed to the OS immediately, while fsync is batched so that
+a burst of saves shares one disk sync. A timer syncs whatever is left
+unsynced once the interval passes, so the last save of a burst is not left
+waiting for the next one.
+"""
+
+import atexit
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from config import LEADS_FSYNC_BATCH_SIZE, LEADS_FSYNC_INTERVAL_SECONDS
+from scoring_matcher import normalize_location
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers within this process are serialized
+    fcntl = None
+
+class FileLock:
+    def __init__(self, path):
+        """
+        Initialize an advisory lock backed by a sidecar lock file.
+        
+        Args:
+            path (str): Path of the file being protected
+        """
+        self.lock_path = path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._handle = None
+        self._depth = 0
+    
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._handle = open(self.lock_path, "a")
+            if fcntl:
+                fcntl.flock(self._handle, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl:
+                fcntl.flock(self._handle, fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+        self._thread_lock.release()
+
+def new_lead_id():
+    """Generate a unique lead ID."""
+    return uuid.uuid4().hex
+
+def as_iso_timestamp(value):
+    """Accept datetimes or ISO strings for time range arguments."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def atomic_write(path, write):
+    """
+    Write a file atomically by writing a temporary file and renaming it.
+    
+    Args:
+        path (str): Destination path
+        write (callable): Called with the open temporary file
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    
+    # Persist the rename itself
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+class LeadsLog:
+    def __init__(self, path, fsync_batch_size=LEADS_FSYNC_BATCH_SIZE, fsync_interval=LEADS_FSYNC_INTERVAL_SECONDS):
+        """
+        Initialize the leads log.
+        
+        Args:
+            path (str): Path of the JSON Lines file
+            fsync_batch_size (int): Appends allowed between disk syncs
+            fsync_interval (float): Longest time in seconds an append waits for a disk sync
+        """
+        self.path = path
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self.lock = FileLock(path)
+        
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+        atexit.register(self.close)
+    
+    def _open_for_append(self):
+        """Get the append handle, reopening it if compaction replaced the file."""
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return self._file
+            except FileNotFoundError:
+                pass
+            self._file.close()
+        
+        self._file = open(self.path, "a")
+        return self._file
+    
+    def _maybe_sync(self, force=False):
+        """fsync the log once enough appends or time have accumulated."""
+        if self._file is None or self._unsynced == 0:
+            return
+        due = (
+            self._unsynced >= self.fsync_batch_size
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        )
+        if force or due:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+        elif self._sync_timer is None:
+            delay = max(0.0, self.fsync_interval - (time.monotonic() - self._last_sync))
+            self._sync_timer = threading.Timer(delay, self._sync_when_due)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+    
+    def _sync_when_due(self):
+        """Timer callback: sync appends that have waited the full interval."""
+        with self.lock:
+            self._sync_timer = None
+            self._maybe_sync()
+    
+    def append(self, lead):
+        """
+        Append a lead, or a newer version of an existing lead.
+        
+        Args:
+            lead (dict): Lead dictionary, an "id" is assigned if missing
+        
+        Returns:
+            dict: The stored lead
+        """
+        return self.append_many([lead])[0]
+    
+    def append_many(self, leads):
+        """
+        Append several leads with a single write.
+        
+        Args:
+            leads (list): Lead dictionaries, an "id" is assigned where missing
+        
+        Returns:
+            list: The stored leads
+        """
+        for lead in leads:
+            lead.setdefault("id", new_lead_id())
+        data = "".join(json.dumps(lead) + "\n" for lead in leads)
+        
+        with self.lock:
+            f = self._open_for_append()
+            f.write(data)
+            f.flush()
+            self._unsynced += len(leads)
+            self._maybe_sync()
+        
+        return leads
+    
+    def sync(self):
+        """Force any unsynced appends to disk."""
+        with self.lock:
+            self._maybe_sync(force=True)
+    
+    def close(self):
+        """Sync and close the append handle."""
+        with self.lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._maybe_sync(force=True)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def _iter_records(self):
+        """Yield (offset, lead) for every line in the log."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            yield from self._iter_file(f)
+    
+    def _iter_file(self, f):
+        """Yield (offset, lead) for every line of an open log file."""
+        offset = 0
+        for line in f:
+            start = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                yield start, json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-append
+                print(f"⚠️ Skipping unreadable line at byte {start} of {self.path}")
+    
+    def _latest_offsets(self, f):
+        """Map each lead ID to the offset of its latest version in an open log file, in first-seen order."""
+        latest = {}
+        for offset, lead in self._iter_file(f):
+            latest[lead.get("id")] = offset
+        return latest
+    
+    def iter_leads(self):
+        """
+        Iterate over the latest version of every lead, in log order.
+        
+        Only the lead IDs are held in memory; leads are parsed as they are yielded.
+        Both passes read the same open file, so a compaction that replaces the
+        log mid-iteration cannot mix offsets from one file with lines of another.
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            latest = set(self._latest_offsets(f).values())
+            f.seek(0)
+            for offset, lead in self._iter_file(f):
+                if offset in latest:
+                    yield lead
+    
+    def iter_leads_by_id(self, after=None):
+        """
+        Iterate over the latest version of every lead in ID order.
+        
+        The scan reads from the log as it was when iteration started, so leads
+        can be appended or the log compacted while it runs.
+        
+        Args:
+            after (str): Only leads with an ID greater than this one
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            latest = self._latest_offsets(f)
+            lead_ids = sorted(lead_id for lead_id in latest if lead_id is not None and (after is None or lead_id > after))
+            for lead_id in lead_ids:
+                f.seek(latest[lead_id])
+                yield json.loads(f.readline())
+    
+    def changes_since(self, cursor=None, limit=None):
+        """
+        Get the leads appended since a cursor.
+        
+        The cursor is the log's inode and the byte offset read up to. After
+        compaction replaces the log, every lead is returned again.
+        
+        Args:
+            cursor (list): Cursor from a previous call, None for every lead
+            limit (int): Most log lines to read, None for all of them
+        
+        Returns:
+            tuple: (latest version of each changed lead, cursor for the next call)
+        """
+        if not os.path.exists(self.path):
+            return [], None
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            offset = 0
+            if cursor is not None and cursor[0] == stat.st_ino and cursor[1] <= stat.st_size:
+                offset = cursor[1]
+            f.seek(offset)
+            
+            changed = {}
+            for line in itertools.islice(f, limit):
+                if not line.endswith(b"\n"):
+                    # An append still being written, read it next time
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    lead = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                changed[lead.get("id")] = lead
+        return list(changed.values()), [stat.st_ino, offset]
+    
+    def get(self, lead_id):
+        """Get the latest version of a lead by ID, or None."""
+        found = None
+        for _, lead in self._iter_records():
+            if lead.get("id") == lead_id:
+                found = lead
+        return found
+    
+    def query(self, min_score=None, since=None, until=None, order_by=None, limit=None, offset=0, origin=None, destination=None):
+        """
+        Query leads by scanning the log.
+        
+        Ordered queries with a limit keep only offset + limit leads in memory,
+        in a bounded heap.
+        
+        Args:
+            min_score (float): Only leads scoring at least this much
+            since (datetime or str): Only leads captured at or after this time
+            until (datetime or str): Only leads captured before this time
+            order_by (str): None for log order, "score" for highest score
+                first, "timestamp" for newest first or "oldest" for oldest first
+            limit (int): Most leads to return
+            offset (int): Leads to skip, for pagination
+            origin (str): Only leads starting from this location
+            destination (str): Only leads going to this location
+        
+        Yields:
+            dict: Lead dictionary
+        """
+        since = as_iso_timestamp(since)
+        until = as_iso_timestamp(until)
+        origin = None if origin is None else normalize_location(origin)
+        destination = None if destination is None else normalize_location(destination)
+        
+        def response(lead, key):
+            return lead.get("responses", {}).get(key, {}).get("response", "")
+        
+        def matches(lead):
+            if origin is not None and normalize_location(response(lead, "current_location")) != origin:
+                return False
+            if destination is not None and normalize_location(response(lead, "destination")) != destination:
+                return False
+            if min_score is not None and lead.get("score", 0) < min_score:
+                return False
+            if since is not None and lead.get("timestamp", "") < since:
+                return False
+            if until is not None and lead.get("timestamp", "") >= until:
+                return False
+            return True
+        
+        leads = (lead for lead in self.iter_leads() if matches(lead))
+        end = None if limit is None else offset + limit
+        
+        if order_by is None:
+            yield from itertools.islice(leads, offset, end)
+            return
+        
+        if order_by == "score":
+            key, largest = (lambda lead: lead.get("score", 0)), True
+        elif order_by == "timestamp":
+            key, largest = (lambda lead: lead.get("timestamp", "")), True
+        elif order_by == "oldest":
+            key, largest = (lambda lead: lead.get("timestamp", "")), False
+        else:
+            raise ValueError(f"Unknown order_by: {order_by}")
+        
+        if end is None:
+            ordered = sorted(leads, key=key, reverse=largest)
+        elif largest:
+            ordered = heapq.nlargest(end, leads, key=key)
+        else:
+            ordered = heapq.nsmallest(end, leads, key=key)
+        yield from ordered[offset:end]
+    
+    def count(self, min_score=None):
+        """Get the number of distinct leads, optionally only those scoring at least min_score."""
+        if min_score is None:
+            if not os.path.exists(self.path):
+                return 0
+            with open(self.path, "rb") as f:
+                return len(self._latest_offsets(f))
+        return sum(1 for _ in self.query(min_score=min_score))
+    
+    def compact(self):
+        """
+        Rewrite the log with only the latest version of each lead.
+        
+        Returns:
+            int: Number of leads kept
+        """
+        with self.lock:
+            self._maybe_sync(force=True)
+            leads = list(self.iter_leads())
+            atomic_write(self.path, lambda f: f.writelines(json.dumps(lead) + "\n" for lead in leads))
+        print(f"🗜️ Compacted {self.path} to {len(leads)} leads")
+        return len(leads)
+    
+    def migrate_from_json(self, json_path):
+        """
+        Import leads from the legacy leads.json array file.
+        
+        The legacy file is renamed to <name>.migrated afterwards so the import
+        runs only once.
+        
+        Args:
+            json_path (str): Path of the legacy JSON file
+        
+        Returns:
+            int: Number of leads imported
+        """
+        with self.lock:
+            if not os.path.exists(json_path):
+                return 0
+            try:
+                with open(json_path, "r") as f:
+                    leads = json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ Error reading {json_path}, nothing migrated")
+                return 0
+            
+            self.append_many(leads)
+            self._maybe_sync(force=True)
+            os.replace(json_path, json_path + ".migrated")
+        
+        print(f"📦 Migrated {len(leads)} leads from {json_path} to {self.path}")
+        return len(leads)
\ No newline at end of file
@@ -1,9 +1,12 @@
 from config import OPENAI_API_KEY, NOTIFICATION_METHOD, TWILIO_PHONE_NUMBER
-from voice_utils import record_audio, transcribe_audio, make_call
-from questions import DISPATCH_QUESTIONS, get_question_text
-from leads_manager import save_lead, get_lead_count
+from config import SAVE_RESPONSE_AUDIO, MAX_ANSWER_SECONDS, PIPELINED_INTERVIEW, WEBHOOK_BASE_URL, RESCORE_ON_STARTUP
+from voice_utils import record_audio_buffer, transcribe_audio, make_call, warm_up_models
+from questions import DISPATCH_QUESTIONS, GREETING, ACKNOWLEDGMENT, CONCLUSION, get_question_text
+from leads_manager import save_lead, save_responses, get_stats, start_rescoring
+from call_session import conduct_interview_session
 import time
-import json
+import queue
+import threading
 from datetime import datetime
 
 def mask_api_key(api_key, visible_chars=4):
@@ -19,7 +22,17 @@ def print_boot_message():
     print("="*50)
     print(f"OpenAI API Key: {mask_api_key(OPENAI_API_KEY)}")
     print(f"Notification Method: {NOTIFICATION_METHOD}")
-    print(f"Total Leads Collected: {get_lead_count()}")
+    stats = get_stats()
+    print(f"Total Leads Collected: {stats.count}")
+    if stats.count:
+        print(f"Average Lead Score: {stats.average_score:.2f}")
+        print(f"Last Lead Saved: {stats.last_write}")
+    for stats in warm_up_models():
+        print(
+            f"Whisper Model: {stats['model']} on {stats['device']} "
+            f"(loaded in {stats['load_seconds']}s, {stats['parameter_mb']} MB weights, "
+            f"+{stats['resident_mb']} MB resident)"
+        )
     print("="*50 + "\n")
 
 def check_dispatch_keywords(text):
@@ -27,28 +40,64 @@ def check_dispatch_keywords(text):
     keywords = ["dispatch", "truck", "delivery", "shipment", "cargo"]
     return any(keyword.lower() in text.lower() for keyword in keywords)
 
-def save_responses(responses, trucker_id):
-    """Save the responses to a JSON file."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"dispatch_responses_{trucker_id}_{timestamp}.json"
+def transcribe_answers(pending, responses):
+    """
+    Transcribe recorded answers from a queue until a None sentinel arrives.
     
-    with open(filename, 'w') as f:
-        json.dump(responses, f, indent=4)
-    
-    print(f"\n💾 Responses saved to {filename}")
-    return filename
+    Args:
+        pending (queue.Queue): (key, question, audio) tuples from the recording stage
+        responses (dict): Dictionary the transcribed responses are stored in
+    """
+    while True:
+        item = pending.get()
+        if item is None:
+            break
+        
+        key, question, audio = item
+        try:
+            response = transcribe_audio(audio)
+        except Exception as e:
+            print(f"\n❌ Error transcribing {key}: {str(e)}")
+            response = ""
+        print(f"✅ Response ({key}): {response}")
+        
+        responses[key] = {
+            "question": question,
+            "response": response,
+            "timestamp": datetime.now().isoformat()
+        }
 
-def conduct_interview(phone_number):
-    """Conduct an interview with the trucker using the predefined questions."""
+def conduct_interview(phone_number, pipelined=PIPELINED_INTERVIEW):
+    """
+    Conduct an interview with the trucker using the predefined questions.
+    
+    Args:
+        phone_number (str): Trucker's phone number
+        pipelined (bool): Transcribe each answer on a background thread while
+            the next question is asked and recorded
+    
+    Returns:
+        dict: Responses keyed by question, or None if the interview failed
+    """
     responses = {}
+    pending = None
+    transcriber = None
     
     try:
         # Initial greeting
-        greeting = "Hello, I'm your AI dispatcher. I'll be asking you a few questions about your trip."
         print(f"\n📞 Initiating call to {phone_number}...")
-        make_call(phone_number, greeting)
+        make_call(phone_number, GREETING)
         time.sleep(2)  # Wait for the greeting to finish
         
+        if pipelined:
+            pending = queue.Queue()
+            transcriber = threading.Thread(
+                target=transcribe_answers,
+                args=(pending, responses),
+                daemon=True
+            )
+            transcriber.start()
+        
         # Ask each question and record responses
         for key, question in DISPATCH_QUESTIONS:
             print(f"\n❓ Asking: {question}")
@@ -59,28 +108,45 @@ def conduct_interview(phone_number):
             
             # Record response
             print("🎤 Recording response...")
-            audio_file = record_audio(duration=15, output_file=f"response_{key}.wav")
+            audio = record_audio_buffer(
+                duration=MAX_ANSWER_SECONDS,
+                output_file=f"response_{key}.wav" if SAVE_RESPONSE_AUDIO else None,
+                stop_on_silence=True
+            )
             
-            # Transcribe response
-            print("📝 Transcribing response...")
-            response = transcribe_audio(audio_file)
-            print(f"✅ Response: {response}")
-            
-            # Store response
-            responses[key] = {
-                "question": question,
-                "response": response,
-                "timestamp": datetime.now().isoformat()
-            }
+            if pipelined:
+                # Hand the answer to the transcription stage and move on
+                pending.put((key, question, audio))
+            else:
+                # Transcribe response
+                print("📝 Transcribing response...")
+                response = transcribe_audio(audio)
+                print(f"✅ Response: {response}")
+                
+                # Store response
+                responses[key] = {
+                    "question": question,
+                    "response": response,
+                    "timestamp": datetime.now().isoformat()
+                }
             
             # Acknowledge response
-            acknowledgment = "Thank you for that information."
-            make_call(phone_number, acknowledgment)
+            make_call(phone_number, ACKNOWLEDGMENT)
             time.sleep(1)
         
         # Final message
-        conclusion = "Thank you for providing all the information. Your dispatch details have been recorded."
-        make_call(phone_number, conclusion)
+        make_call(phone_number, CONCLUSION)
+        
+        if pipelined:
+            # Wait for the remaining answers, then restore question order
+            print("📝 Waiting for remaining transcriptions...")
+            pending.put(None)
+            transcriber.join()
+            answers = dict(responses)
+            responses.clear()
+            responses.update(
+                (key, answers[key]) for key, _ in DISPATCH_QUESTIONS if key in answers
+            )
         
         # Save responses to individual file
         save_responses(responses, phone_number)
@@ -96,20 +162,29 @@ def conduct_interview(phone_number):
     except Exception as e:
         print(f"\n❌ Error during interview: {str(e)}")
         return None
+    
+    finally:
+        # Stop the transcription stage if the interview ended early
+        if transcriber is not None and transcriber.is_alive():
+            pending.put(None)
 
 def main():
     # Print boot message
     print_boot_message()
     
+    # Catch up on scoring rule changes without holding up the interview
+    if RESCORE_ON_STARTUP:
+        start_rescoring()
+    
     try:
         # Step 1: Record initial audio
         print("\n🎤 Recording initial audio input...")
-        audio_file = record_audio(output_file="input.wav")
+        audio = record_audio_buffer(output_file="input.wav" if SAVE_RESPONSE_AUDIO else None)
         print("✅ Audio recording completed")
         
         # Step 2: Transcribe audio
         print("\n📝 Transcribing audio...")
-        transcription = transcribe_audio(audio_file)
+        transcription = transcribe_audio(audio)
         print(f"✅ Transcription: {transcription}")
         
         # Step 3: Check for dispatch keywords and conduct interview if found
@@ -118,7 +193,11 @@ def main():
             test_number = "+1234567890"  # Replace with actual test number
             
             print("\n📋 Starting dispatch interview...")
-            responses = conduct_interview(test_number)
+            if WEBHOOK_BASE_URL:
+                # One call for the whole interview, answers arrive via webhooks
+                responses = conduct_interview_session(test_number)
+            else:
+                responses = conduct_interview(test_number)
             
             if responses:
                 print("\n✅ Interview completed successfully")
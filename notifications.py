@@ -0,0 +1,394 @@
+"""
+Background dispatcher notifications.
+
+Saving a lead only adds it to a persistent SQLite queue; a worker thread
+turns everything queued during a coalescing window into one digest, so a
+burst of leads sends one message with the count and the best leads instead
+of a burst of identical texts. A failed digest stays queued and is retried
+with exponential backoff, including after a restart.
+
+Several processes can share the queue file. Before sending, a worker claims
+the queued rows it will send in one write transaction, so each lead goes out
+in exactly one process's digest; a claim left by a process that died expires
+and the rows are sent by the next worker.
+
+Digests go out through the sender selected by config.NOTIFICATION_METHOD:
+SMS via Twilio, email via SMTP or a JSON webhook.
+"""
+
+import atexit
+import json
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from email.message import EmailMessage
+from config import TWILIO_PHONE_NUMBER, DISPATCHER_PHONE_NUMBER, NOTIFICATION_METHOD
+from config import (
+    NOTIFICATION_DIGEST_SECONDS, NOTIFICATION_DIGEST_TOP_LEADS, NOTIFICATION_RETRY_BASE_SECONDS,
+    NOTIFICATION_RETRY_MAX_SECONDS, NOTIFICATION_MAX_ATTEMPTS, NOTIFICATION_WEBHOOK_URL, EMAIL_SETTINGS,
+    NOTIFICATION_CLAIM_SECONDS
+)
+
+NOTIFICATION_QUEUE_FILE = "notifications.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lead_id TEXT,
+    phone_number TEXT,
+    score REAL,
+    origin TEXT,
+    destination TEXT,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    claimed_at REAL
+);
+"""
+
+# Rows no live worker is sending: never claimed, or claimed by a worker that died
+UNCLAIMED = "(claimed_by IS NULL OR claimed_at < ?)"
+
+def _response(lead, key):
+    """Get one response text from a lead."""
+    return lead.get('responses', {}).get(key, {}).get('response', '')
+
+class SmsSender:
+    def send(self, digest):
+        """Text the digest to the dispatcher."""
+        # Imported here so email and webhook notifications work without Twilio installed
+        from twilio_client import get_twilio_client
+        message = get_twilio_client().messages.create(
+            body=digest["text"],
+            from_=TWILIO_PHONE_NUMBER,
+            to=DISPATCHER_PHONE_NUMBER
+        )
+        print(f"\n📱 SMS notification sent to dispatcher (SID: {message.sid})")
+
+class EmailSender:
+    def __init__(self, settings=EMAIL_SETTINGS):
+        """
+        Initialize the email sender.
+        
+        Args:
+            settings (dict): SMTP server, port, credentials and addresses
+        """
+        self.settings = settings
+    
+    def send(self, digest):
+        """Email the digest to the dispatcher."""
+        settings = self.settings
+        message = EmailMessage()
+        message["Subject"] = digest["subject"]
+        message["From"] = settings["sender_email"]
+        message["To"] = settings["recipient_email"]
+        message.set_content(digest["text"])
+        
+        with smtplib.SMTP(settings["smtp_server"], settings.get("smtp_port", 587), timeout=30) as smtp:
+            if settings.get("use_tls", True):
+                smtp.starttls()
+            if settings.get("password"):
+                smtp.login(settings.get("username") or settings["sender_email"], settings["password"])
+            smtp.send_message(message)
+        print(f"\n📧 Email notification sent to {settings['recipient_email']}")
+
+class WebhookSender:
+    def __init__(self, url=NOTIFICATION_WEBHOOK_URL):
+        """
+        Initialize the webhook sender.
+        
+        Args:
+            url (str): URL the digest is POSTed to as JSON
+        """
+        if not url:
+            raise ValueError("NOTIFICATION_WEBHOOK_URL must be set to send webhook notifications")
+        self.url = url
+    
+    def send(self, digest):
+        """POST the digest to the webhook."""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(digest).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+        print(f"\n🌐 Webhook notification sent to {self.url}")
+
+SENDERS = {
+    "sms": SmsSender,
+    "email": EmailSender,
+    "webhook": WebhookSender
+}
+
+def get_sender(method=NOTIFICATION_METHOD):
+    """
+    Create the sender for a notification method.
+    
+    Args:
+        method (str): One of SENDERS
+    
+    Returns:
+        Object with a send(digest) method that raises on failure
+    """
+    if method not in SENDERS:
+        raise ValueError(f"Unsupported NOTIFICATION_METHOD: {method}")
+    return SENDERS[method]()
+
+def build_digest(rows, top_leads=NOTIFICATION_DIGEST_TOP_LEADS):
+    """
+    Summarize queued leads in one notification.
+    
+    Args:
+        rows (list): Queued notification rows as dictionaries
+        top_leads (int): Highest scoring leads to list
+    
+    Returns:
+        dict: count, subject, text and leads fields
+    """
+    count = len(rows)
+    best = sorted(rows, key=lambda row: row["score"] or 0, reverse=True)[:top_leads]
+    lines = [
+        f"{row['score'] or 0:.2f} {row['origin'] or '?'} → {row['destination'] or '?'} ({row['phone_number']})"
+        for row in best
+    ]
+    
+    if count == 1:
+        text = "New trucker lead captured: " + lines[0]
+    else:
+        text = f"{count} new trucker leads captured. Top: " + "; ".join(lines)
+    text += ". Check the leads dashboard."
+    
+    return {
+        "count": count,
+        "subject": f"{count} new trucker lead{'s' if count != 1 else ''}",
+        "text": text,
+        "leads": [
+            {key: row[key] for key in ("lead_id", "phone_number", "score", "origin", "destination")}
+            for row in best
+        ]
+    }
+
+class Notifier:
+    def __init__(
+        self,
+        sender=None,
+        path=NOTIFICATION_QUEUE_FILE,
+        digest_seconds=NOTIFICATION_DIGEST_SECONDS,
+        retry_base=NOTIFICATION_RETRY_BASE_SECONDS,
+        retry_max=NOTIFICATION_RETRY_MAX_SECONDS,
+        max_attempts=NOTIFICATION_MAX_ATTEMPTS,
+        claim_seconds=NOTIFICATION_CLAIM_SECONDS
+    ):
+        """
+        Initialize the notifier and its persistent queue.
+        
+        Args:
+            sender: Object with a send(digest) method, from config.NOTIFICATION_METHOD if None
+            path (str): Path of the SQLite queue file
+            digest_seconds (float): Coalescing window, counted from the oldest queued lead
+            retry_base (float): First retry delay in seconds, doubled after every failure
+            retry_max (float): Longest delay between retries
+            max_attempts (int): Attempts before a digest is dropped
+            claim_seconds (float): Age after which another worker's claim on queued rows is ignored
+        """
+        self.sender = sender
+        self.path = path
+        self.digest_seconds = digest_seconds
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.claim_seconds = claim_seconds
+        # Marks the rows this notifier is sending, unique across processes
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex}"
+        
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+        self._add_claim_columns()
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def _add_claim_columns(self):
+        """Add the claim columns to a queue created without them."""
+        conn = self._connect()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(notifications)")]
+        with conn:
+            if "claimed_by" not in columns:
+                conn.execute("ALTER TABLE notifications ADD COLUMN claimed_by TEXT")
+            if "claimed_at" not in columns:
+                conn.execute("ALTER TABLE notifications ADD COLUMN claimed_at REAL")
+    
+    def notify(self, lead):
+        """
+        Queue a notification for a saved lead and return immediately.
+        
+        Args:
+            lead (dict): Saved, scored lead
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO notifications (lead_id, phone_number, score, origin, destination, created)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    lead.get("id"),
+                    lead.get("phone_number"),
+                    lead.get("score"),
+                    _response(lead, 'current_location'),
+                    _response(lead, 'destination'),
+                    time.time()
+                )
+            )
+        self.start()
+        self._wake.set()
+    
+    def pending(self):
+        """Get the number of queued leads."""
+        return self._connect().execute("SELECT COUNT(*) FROM notifications").fetchone()[0]
+    
+    def seconds_until_due(self):
+        """
+        Get how long until the next digest should be sent.
+        
+        Returns:
+            float: Seconds to wait, 0 if a digest is due, None if the queue is empty
+        """
+        # Rows another worker is sending are its to finish
+        oldest, retry_at = self._connect().execute(
+            f"SELECT MIN(created), MAX(next_attempt) FROM notifications WHERE {UNCLAIMED}",
+            (time.time() - self.claim_seconds,)
+        ).fetchone()
+        if oldest is None:
+            return None
+        due = max(oldest + self.digest_seconds, retry_at)
+        return max(due - time.time(), 0)
+    
+    def _claim(self):
+        """
+        Claim every queued row no other worker is sending.
+        
+        The claim is one BEGIN IMMEDIATE transaction, which takes the database
+        write lock, so two processes can never claim the same row.
+        
+        Returns:
+            list: Claimed rows as dictionaries, oldest first
+        """
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"UPDATE notifications SET claimed_by = ?, claimed_at = ? WHERE {UNCLAIMED}",
+                (self.worker_id, now, now - self.claim_seconds)
+            )
+            return [
+                dict(row) for row in
+                conn.execute("SELECT * FROM notifications WHERE claimed_by = ? ORDER BY id", (self.worker_id,))
+            ]
+    
+    def send_digest(self):
+        """
+        Send everything queued, and not being sent by another worker, as one digest.
+        
+        Returns:
+            bool: True if a digest was sent, False if the queue was empty or sending failed
+        """
+        with self._send_lock:
+            conn = self._connect()
+            rows = self._claim()
+            if not rows:
+                return False
+            
+            try:
+                if self.sender is None:
+                    self.sender = get_sender()
+                self.sender.send(build_digest(rows))
+            except Exception as e:
+                attempts = max(row["attempts"] for row in rows) + 1
+                if attempts >= self.max_attempts:
+                    print(f"\n❌ Dropping notification for {len(rows)} leads after {attempts} attempts: {str(e)}")
+                    with conn:
+                        conn.execute("DELETE FROM notifications WHERE claimed_by = ?", (self.worker_id,))
+                    return False
+                
+                delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+                print(f"\n⚠️ Failed to notify dispatcher, retrying in {delay:g}s: {str(e)}")
+                with conn:
+                    conn.execute(
+                        """
+                        UPDATE notifications SET attempts = ?, next_attempt = ?, claimed_by = NULL, claimed_at = NULL
+                        WHERE claimed_by = ?
+                        """,
+                        (attempts, time.time() + delay, self.worker_id)
+                    )
+                return False
+            
+            # Leads queued while sending were not claimed and wait for the next digest
+            with conn:
+                conn.execute("DELETE FROM notifications WHERE claimed_by = ?", (self.worker_id,))
+            return True
+    
+    def _run(self):
+        """Send digests as they come due until stopped."""
+        while not self._stop.is_set():
+            delay = self.seconds_until_due()
+            if delay is None or delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            self.send_digest()
+    
+    def start(self):
+        """Start the worker thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+            self._thread.start()
+    
+    def close(self, timeout=10):
+        """
+        Stop the worker and try once to send anything still queued.
+        
+        Whatever cannot be sent stays queued for the next run.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.pending():
+            self.send_digest()
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+def get_notifier():
+    """Get the process-wide notifier, flushed at exit."""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier()
+            atexit.register(_notifier.close)
+            # Deliver anything left queued by a previous run
+            if _notifier.pending():
+                _notifier.start()
+    return _notifier
\ No newline at end of file
@@ -3,8 +3,15 @@ Questions for the AI Truck Dispatcher to ask during calls.
 Each question is a tuple of (key, question_text) where:
 - key: unique identifier for storing the response
 - question_text: the actual question to be asked
+
+GREETING, ACKNOWLEDGMENT and CONCLUSION are spoken before the first question,
+after each answer and at the end of the interview.
 """
 
+GREETING = "Hello, I'm your AI dispatcher. I'll be asking you a few questions about your trip."
+ACKNOWLEDGMENT = "Thank you for that information."
+CONCLUSION = "Thank you for providing all the information. Your dispatch details have been recorded."
+
 DISPATCH_QUESTIONS = [
     ("truck_id", "What is your truck ID or license plate number?"),
     ("current_location", "What is your current location?"),
@@ -0,0 +1,218 @@
+"""
+Background rescoring of leads after a scoring rule change.
+
+Every lead stores its component scores and the version of the rules each
+component was computed with. When the truck types, routes, ETA parser or
+weights change, the rescorer walks the store in lead ID order and recomputes
+only the stale components of each lead; a weights-only change recombines the
+stored components without scoring anything.
+
+Progress is checkpointed after every chunk, so an interrupted run resumes
+where it stopped, and each chunk is written back with a single upsert so new
+leads keep being saved while a large store is rescored.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from config import RESCORE_CHUNK_SIZE, RESCORE_PAUSE_SECONDS
+from lead_scorer import COMPONENTS, get_scoring_versions, score_components, combine_components
+from leads_store import atomic_write
+
+def _captured_at(lead):
+    """Get the time a lead was captured, which its availability is scored against."""
+    try:
+        return datetime.fromisoformat(lead["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def stale_components(lead, versions):
+    """
+    Find the components of a lead scored with outdated rules.
+    
+    Args:
+        lead (dict): Stored lead
+        versions (dict): Current versions from get_scoring_versions()
+    
+    Returns:
+        list: Names of the components to recompute
+    """
+    lead_versions = lead.get("score_versions", {})
+    scores = lead.get("score_components", {})
+    return [
+        component for component in COMPONENTS
+        if component not in scores or lead_versions.get(component) != versions[component]
+    ]
+
+def rescore_lead(lead, versions):
+    """
+    Bring a lead's score up to date with the current scoring rules.
+    
+    Args:
+        lead (dict): Stored lead, updated in place
+        versions (dict): Current versions from get_scoring_versions()
+    
+    Returns:
+        bool: True if the lead changed and must be written back
+    """
+    stale = stale_components(lead, versions)
+    if not stale and lead.get("score_versions", {}).get("weights") == versions["weights"]:
+        return False
+    
+    scores = dict(lead.get("score_components", {}))
+    if stale:
+        scores.update(score_components(lead, _captured_at(lead), stale))
+    
+    lead["score_components"] = scores
+    lead["score"] = combine_components(scores)
+    lead["score_versions"] = dict(versions)
+    return True
+
+class Rescorer:
+    def __init__(self, store, stats_sidecar, checkpoint_path, chunk_size=RESCORE_CHUNK_SIZE, pause=RESCORE_PAUSE_SECONDS):
+        """
+        Initialize the rescorer.
+        
+        Args:
+            store: Leads store with iter_leads_by_id() and append_many() methods
+            stats_sidecar (StatsSidecar): Statistics adjusted for changed scores
+            checkpoint_path (str): Path of the progress checkpoint file
+            chunk_size (int): Leads rescored and written back per checkpoint
+            pause (float): Seconds to pause between chunks
+        """
+        self.store = store
+        self.stats_sidecar = stats_sidecar
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def load_checkpoint(self, versions):
+        """
+        Load progress for the current rule versions.
+        
+        A checkpoint for other versions is discarded: the rules changed again,
+        so the run starts over.
+        
+        Args:
+            versions (dict): Current versions from get_scoring_versions()
+        
+        Returns:
+            dict: Checkpoint with last_id, scanned, rescored and complete fields
+        """
+        if os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, "r") as f:
+                    checkpoint = json.load(f)
+                if checkpoint.get("versions") == versions:
+                    return checkpoint
+            except json.JSONDecodeError:
+                print(f"⚠️ Error reading {self.checkpoint_path}, rescoring from the start")
+        
+        return {
+            "versions": versions,
+            "last_id": None,
+            "scanned": 0,
+            "rescored": 0,
+            "complete": False,
+            "started": datetime.now().isoformat()
+        }
+    
+    def save_checkpoint(self, checkpoint):
+        """Atomically write the checkpoint file."""
+        checkpoint["updated"] = datetime.now().isoformat()
+        atomic_write(self.checkpoint_path, lambda f: json.dump(checkpoint, f, indent=4))
+    
+    def _rescore_chunk(self, chunk, versions, checkpoint):
+        """Rescore one chunk, write the changed leads back and checkpoint."""
+        changed = []
+        score_changes = []
+        for lead in chunk:
+            old_score = lead.get("score", 0)
+            if rescore_lead(lead, versions):
+                changed.append(lead)
+                if lead["score"] != old_score:
+                    score_changes.append((old_score, lead))
+        
+        if changed:
+            self.store.append_many(changed)
+        if score_changes:
+            def apply(stats):
+                for old_score, lead in score_changes:
+                    stats.record_rescore(old_score, lead["score"], lead)
+            self.stats_sidecar.update(self.store, apply)
+        
+        checkpoint["last_id"] = chunk[-1]["id"]
+        checkpoint["scanned"] += len(chunk)
+        checkpoint["rescored"] += len(changed)
+        self.save_checkpoint(checkpoint)
+    
+    def run(self):
+        """
+        Rescore stale leads until the store is current or stop() is called.
+        
+        Returns:
+            dict: The checkpoint, complete unless the run was stopped
+        """
+        versions = get_scoring_versions()
+        checkpoint = self.load_checkpoint(versions)
+        if checkpoint["complete"]:
+            return checkpoint
+        
+        if checkpoint["last_id"]:
+            print(f"🔁 Resuming rescoring after {checkpoint['scanned']} leads")
+        start_time = time.monotonic()
+        
+        chunk = []
+        for lead in self.store.iter_leads_by_id(after=checkpoint["last_id"]):
+            chunk.append(lead)
+            if len(chunk) < self.chunk_size:
+                continue
+            
+            self._rescore_chunk(chunk, versions, checkpoint)
+            chunk = []
+            if self._stop.wait(self.pause):
+                print(f"⏸️ Rescoring paused after {checkpoint['scanned']} leads")
+                return checkpoint
+        
+        if chunk:
+            self._rescore_chunk(chunk, versions, checkpoint)
+        checkpoint["complete"] = True
+        self.save_checkpoint(checkpoint)
+        
+        if checkpoint["rescored"]:
+            print(
+                f"✅ Rescored {checkpoint['rescored']} of {checkpoint['scanned']} leads "
+                f"in {time.monotonic() - start_time:.1f}s"
+            )
+        return checkpoint
+    
+    def _run_safely(self):
+        """Run on the background thread, reporting errors instead of raising."""
+        try:
+            self.run()
+        except Exception as e:
+            print(f"\n❌ Error rescoring leads: {str(e)}")
+    
+    def start(self):
+        """Start rescoring on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_safely, name="rescorer", daemon=True)
+            self._thread.start()
+        return self._thread
+    
+    def stop(self, timeout=None):
+        """Stop after the current chunk; the checkpoint lets the next run resume."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+if __name__ == "__main__":
+    from leads_manager import get_rescorer
+    
+    checkpoint = get_rescorer().run()
+    print(json.dumps(checkpoint, indent=4))
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+Precompiled matchers for the lead scoring tables.
+
+Truck keywords are compiled into one regex and preferred routes into hash
+indexes, so scoring a lead costs about the same with five lanes or five
+thousand. The matchers give exactly the answers of the original linear
+scans: the highest priority keyword found anywhere in the cargo text wins,
+and among partial route matches the first lane in table order wins.
+
+Each matcher also scores whole pandas columns: the compiled patterns are run
+over the column with str.findall and the matches are joined to the tables,
+so a batch costs a few column operations instead of a Python call per lead.
+
+The tables can be loaded from a JSON file so large lane lists can ship as
+data instead of code:
+
+    {
+        "truck_types": {"reefer": 1.0, "flatbed": 0.9},
+        "refrigerated_words": ["refrigerated", "reefer", "cold", "frozen"],
+        "preferred_routes": [
+            {"origin": "los angeles", "destination": "new york", "score": 1.0}
+        ]
+    }
+
+Every section is optional; a missing section keeps the built-in table.
+"""
+
+import json
+import os
+import re
+import pandas as pd
+
+def normalize_location(location):
+    """Normalize location string for comparison."""
+    return location.lower().strip()
+
+def _substrings(text, lengths):
+    """Yield every substring of text with one of the given lengths."""
+    for length in lengths:
+        for start in range(len(text) - length + 1):
+            yield text[start:start + length]
+
+def _lookahead(words):
+    """Compile words into a regex that reports every position one of them starts at."""
+    return re.compile("(?=(" + "|".join(re.escape(word) for word in words) + "))")
+
+def _prefix_free_patterns(words):
+    """
+    Compile words into patterns that together find every occurrence of every word.
+    
+    A lookahead alternation reports one word per position, so a word that is
+    a prefix of another (e.g. "new york" and "new york city") would hide it.
+    Words are split into tiers by how many other words are prefixes of them;
+    no word in a tier is a prefix of another in the same tier.
+    """
+    words = set(words)
+    tiers = {}
+    for word in words:
+        tier = sum(1 for end in range(1, len(word)) if word[:end] in words)
+        tiers.setdefault(tier, []).append(word)
+    return [_lookahead(sorted(tier)) for _, tier in sorted(tiers.items())]
+
+def _find_all(texts, patterns, column):
+    """
+    Find every occurrence of the patterns' words in a column.
+    
+    Returns:
+        pd.DataFrame: row (index label of texts) and column (word found), one row per distinct pair
+    """
+    found = [texts.str.findall(pattern).explode().dropna() for pattern in patterns]
+    found = [matches for matches in found if not matches.empty]
+    if not found:
+        return pd.DataFrame({'row': [], column: []})
+    matches = pd.concat(found)
+    return pd.DataFrame({'row': matches.index, column: matches.to_numpy()}).drop_duplicates()
+
+class KeywordMatcher:
+    def __init__(self, keywords, default=0.5):
+        """
+        Compile keywords into a single regex.
+        
+        Args:
+            keywords (list): (keyword, score) tuples, highest priority first
+            default (float): Score when no keyword is found
+        """
+        self.default = default
+        self.priorities = {}
+        for keyword, score in keywords:
+            self.priorities.setdefault(keyword.lower(), (len(self.priorities), score))
+        
+        # A lookahead finds overlapping keywords at every position, and the
+        # alternation is in priority order so each position reports its best keyword
+        ordered = sorted(self.priorities, key=lambda keyword: self.priorities[keyword][0])
+        self.pattern = _lookahead(ordered)
+        self.ranks = {keyword: rank for keyword, (rank, _) in self.priorities.items()}
+        self.rank_scores = {rank: score for rank, score in self.priorities.values()}
+    
+    def score(self, text):
+        """
+        Score text by the highest priority keyword it contains.
+        
+        Args:
+            text (str): Text to search, any case
+        
+        Returns:
+            float: Score of the best keyword, or the default
+        """
+        if not self.priorities:
+            return self.default
+        
+        best = None
+        for match in self.pattern.finditer(text.lower()):
+            found = self.priorities[match.group(1)]
+            if best is None or found[0] < best[0]:
+                best = found
+                if best[0] == 0:
+                    break
+        return self.default if best is None else best[1]
+    
+    def score_series(self, texts):
+        """
+        Score a column of texts, giving what score() gives each of them.
+        
+        Args:
+            texts (pd.Series): Texts to search, any case
+        
+        Returns:
+            np.ndarray: Scores
+        """
+        scores = pd.Series(self.default, index=texts.index, dtype=float)
+        if not self.priorities or texts.empty:
+            return scores.to_numpy()
+        
+        # Every keyword found in each text, then the best one per text
+        found = texts.str.lower().str.findall(self.pattern).explode().dropna()
+        if not found.empty:
+            best = found.map(self.ranks).groupby(level=0).min()
+            scores[best.index] = best.map(self.rank_scores)
+        return scores.to_numpy()
+
+class RouteMatcher:
+    def __init__(self, routes, partial_factor=0.9, default=0.5):
+        """
+        Index preferred routes by normalized origin and destination.
+        
+        Args:
+            routes (list): ((origin, destination), score) tuples in table order
+            partial_factor (float): Score multiplier for partial matches
+            default (float): Score for unknown routes
+        """
+        self.partial_factor = partial_factor
+        self.default = default
+        self.exact = {}
+        self.by_origin = {}
+        
+        for priority, ((origin, destination), score) in enumerate(routes):
+            route = (normalize_location(origin), normalize_location(destination))
+            if route in self.exact:
+                continue
+            self.exact[route] = score
+            self.by_origin.setdefault(route[0], {})[route[1]] = (priority, score)
+        
+        # Substring lengths worth looking up, per origin for destinations
+        self.origin_lengths = sorted({len(origin) for origin in self.by_origin})
+        self.destination_lengths = {
+            origin: sorted({len(destination) for destination in destinations})
+            for origin, destinations in self.by_origin.items()
+        }
+        
+        # Column-wise matching: lanes as a table and every table city as patterns
+        self.lanes = pd.DataFrame(
+            [
+                (origin, destination, priority, score)
+                for origin, destinations in self.by_origin.items()
+                for destination, (priority, score) in destinations.items()
+            ],
+            columns=['origin', 'destination', 'priority', 'score']
+        )
+        self.origin_patterns = _prefix_free_patterns(self.by_origin)
+        self.destination_patterns = _prefix_free_patterns(self.lanes['destination'])
+        self.exact_keys = {f"{origin}\n{destination}": score for (origin, destination), score in self.exact.items()}
+    
+    def score(self, origin, destination):
+        """
+        Score a route, preferring exact lanes over partial matches.
+        
+        Args:
+            origin (str): Starting location
+            destination (str): Ending location
+        
+        Returns:
+            float: Score between 0 and 1
+        """
+        origin = normalize_location(origin)
+        destination = normalize_location(destination)
+        
+        route = (origin, destination)
+        if route in self.exact:
+            return self.exact[route]
+        
+        # Partial matches (e.g., "Los Angeles, CA" matches "los angeles"):
+        # look up every substring of the origin that could be a table origin
+        best = None
+        for pref_origin in set(_substrings(origin, self.origin_lengths)):
+            destinations = self.by_origin.get(pref_origin)
+            if destinations is None:
+                continue
+            for pref_dest in set(_substrings(destination, self.destination_lengths[pref_origin])):
+                found = destinations.get(pref_dest)
+                if found is not None and (best is None or found[0] < best[0]):
+                    best = found
+        
+        return self.default if best is None else best[1] * self.partial_factor
+    
+    def score_series(self, origins, destinations):
+        """
+        Score columns of routes, giving what score() gives each of them.
+        
+        Args:
+            origins (pd.Series): Starting locations
+            destinations (pd.Series): Ending locations, with the same index
+        
+        Returns:
+            np.ndarray: Scores between 0 and 1
+        """
+        origins = origins.str.lower().str.strip()
+        destinations = destinations.str.lower().str.strip()
+        scores = (origins + "\n" + destinations).map(self.exact_keys)
+        
+        partial = scores.isna()
+        if partial.any() and not self.lanes.empty:
+            # Table cities inside each origin and destination, paired into lanes
+            candidates = (
+                _find_all(origins[partial], self.origin_patterns, 'origin')
+                .merge(_find_all(destinations[partial], self.destination_patterns, 'destination'), on='row')
+                .merge(self.lanes, on=['origin', 'destination'])
+            )
+            # The first lane in table order wins
+            best = candidates.sort_values('priority', kind='stable').drop_duplicates('row')
+            scores[best['row'].to_numpy()] = best['score'].to_numpy() * self.partial_factor
+        return scores.fillna(self.default).to_numpy(dtype=float)
+
+def load_scoring_tables(path, truck_types, refrigerated_words, preferred_routes):
+    """
+    Load scoring tables from a JSON file, falling back to the given tables.
+    
+    Args:
+        path (str): Path of the tables file, may not exist
+        truck_types (dict): Built-in truck type scores
+        refrigerated_words (list): Built-in refrigerated cargo words
+        preferred_routes (dict): Built-in (origin, destination) -> score table
+    
+    Returns:
+        tuple: (truck_types, refrigerated_words, preferred_routes)
+    """
+    if not path or not os.path.exists(path):
+        return truck_types, refrigerated_words, preferred_routes
+    
+    try:
+        with open(path, "r") as f:
+            tables = json.load(f)
+    except json.JSONDecodeError:
+        print(f"⚠️ Error reading {path}, using built-in scoring tables")
+        return truck_types, refrigerated_words, preferred_routes
+    
+    if "preferred_routes" in tables:
+        preferred_routes = {
+            (route["origin"], route["destination"]): route["score"]
+            for route in tables["preferred_routes"]
+        }
+    return (
+        tables.get("truck_types", truck_types),
+        tables.get("refrigerated_words", refrigerated_words),
+        preferred_routes
+    )
\ No newline at end of file
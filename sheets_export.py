@@ -0,0 +1,327 @@
+"""
+Rate-limited, resumable bulk export of the leads store to Google Sheets.
+
+sync_leads() is meant for the dashboard button; pushing a large historical
+backlog with it would burst straight into the Sheets API quotas. The bulk
+exporter follows the store's change cursor, formats leads one fixed-size
+chunk at a time and sends every request through a token bucket, so the
+sustained request rate stays under the quota however large the store.
+
+Leads are read in the order they were written, so leads saved while the
+export runs come after the cursor and are exported too, before it finishes.
+Each lead is exported once; a lead updated after its row was sent is
+rewritten by the next incremental sync.
+
+Progress is checkpointed after every chunk, so an interrupted export resumes
+after the last chunk that reached the sheet. Each chunk is also recorded as
+pending before it is sent; if the export stops between sending a chunk and
+checkpointing it, the resume reads the rows the chunk would have filled and
+only sends it again if they are empty, so no rows are duplicated. When the
+export completes, the rows it wrote become the incremental sync state, so
+later syncs only send new and changed leads.
+
+Usage:
+    python sheets_export.py SPREADSHEET_ID [--restart]
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from config import SHEETS_SYNC_CHUNK_SIZE, SHEETS_EXPORT_CHECKPOINT_FILE
+from config import SHEETS_EXPORT_REQUESTS_PER_SECOND, SHEETS_EXPORT_BURST, SHEETS_EXPORT_RETRIES
+from leads_store import atomic_write
+from sheets_sync import SHEET_NAME, HEADERS, RANGE_START_ROW, row_hash
+
+# Seconds between progress reports
+REPORT_SECONDS = 10
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Initialize a full token bucket.
+        
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Most tokens the bucket holds, i.e. the largest burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, sleeping until enough have accumulated.
+        
+        Args:
+            tokens (float): Tokens to take, at most the capacity
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class BulkExporter:
+    def __init__(
+        self,
+        sheets_sync,
+        store,
+        checkpoint_path=SHEETS_EXPORT_CHECKPOINT_FILE,
+        chunk_size=SHEETS_SYNC_CHUNK_SIZE,
+        requests_per_second=SHEETS_EXPORT_REQUESTS_PER_SECOND,
+        burst=SHEETS_EXPORT_BURST,
+        retries=SHEETS_EXPORT_RETRIES
+    ):
+        """
+        Initialize the exporter.
+        
+        Args:
+            sheets_sync (SheetsSync): Sync for the target spreadsheet
+            store: Leads store with a changes_since() method
+            checkpoint_path (str): Path of the progress checkpoint file
+            chunk_size (int): Rows sent per request
+            requests_per_second (float): Sustained Sheets API request rate
+            burst (int): Requests that may be sent back to back
+            retries (int): Retries of a rate-limited or failed request, with backoff
+        """
+        self.sheets_sync = sheets_sync
+        self.store = store
+        self.checkpoint_path = checkpoint_path
+        # Row number, lead ID and hash of every exported row, one JSON line per row
+        self.rows_path = f"{checkpoint_path}.rows"
+        self.chunk_size = chunk_size
+        self.bucket = TokenBucket(requests_per_second, max(burst, 2))
+        self.retries = retries
+    
+    def load_checkpoint(self, restart=False):
+        """
+        Load progress of the export to this spreadsheet.
+        
+        Args:
+            restart (bool): Discard any progress and export from the start
+        
+        Returns:
+            dict: Checkpoint with cursor, next_row, exported and complete fields,
+                and pending and pending_cursor while a chunk is being appended
+        """
+        spreadsheet_id = self.sheets_sync.spreadsheet_id
+        if not restart and os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, "r") as f:
+                    checkpoint = json.load(f)
+                if checkpoint.get("spreadsheet_id") == spreadsheet_id:
+                    if "cursor" in checkpoint:
+                        return checkpoint
+                    print(f"📦 {self.checkpoint_path} is from an older version, exporting from the start")
+            except json.JSONDecodeError:
+                print(f"⚠️ Error reading {self.checkpoint_path}, exporting from the start")
+        
+        return {
+            "spreadsheet_id": spreadsheet_id,
+            "cursor": None,
+            "next_row": None,
+            "exported": 0,
+            "complete": False,
+            "started": datetime.now().isoformat()
+        }
+    
+    def save_checkpoint(self, checkpoint):
+        """Atomically write the checkpoint file."""
+        checkpoint["updated"] = datetime.now().isoformat()
+        atomic_write(self.checkpoint_path, lambda f: json.dump(checkpoint, f, indent=4))
+    
+    def _execute(self, request):
+        """Send one request once the rate limit allows it."""
+        self.bucket.acquire()
+        return request.execute(num_retries=self.retries)
+    
+    def _append_chunk(self, rows, next_row):
+        """
+        Append one chunk of rows to the sheet.
+        
+        Returns:
+            int: Sheet row the chunk starts on
+        """
+        result = self._execute(self.sheets_sync._values().append(
+            spreadsheetId=self.sheets_sync.spreadsheet_id,
+            range=f'{SHEET_NAME}!A1',
+            valueInputOption='RAW',
+            insertDataOption='INSERT_ROWS',
+            body={'values': rows}
+        ))
+        match = RANGE_START_ROW.search(result.get('updates', {}).get('updatedRange', ''))
+        return int(match.group(1)) if match else next_row
+    
+    def _record_chunk(self, checkpoint, rows_log, pending, first_row):
+        """
+        Log the rows of a chunk that reached the sheet and advance the checkpoint.
+        
+        Args:
+            checkpoint (dict): Checkpoint to advance, saved by the caller
+            rows_log (file): Open rows log
+            pending (list): [lead ID, row hash] of every row in the chunk
+            first_row (int): Sheet row the chunk starts on
+        """
+        for offset, (lead_id, digest) in enumerate(pending):
+            rows_log.write(json.dumps([lead_id, first_row + offset, digest]) + "\n")
+        rows_log.flush()
+        os.fsync(rows_log.fileno())
+        
+        checkpoint["cursor"] = checkpoint.pop("pending_cursor")
+        checkpoint["next_row"] = first_row + len(pending)
+        checkpoint["exported"] += len(pending)
+        checkpoint.pop("pending", None)
+    
+    def _reconcile_pending(self, checkpoint, rows_log):
+        """
+        Settle a chunk that was sent but not checkpointed before the export stopped.
+        
+        The append either reached the sheet as a whole or not at all, so the
+        rows it would have filled are read back: filled rows are recorded as
+        exported, empty ones leave the chunk to be sent again.
+        """
+        pending = checkpoint.get("pending")
+        if not pending:
+            return
+        
+        first_row = checkpoint["next_row"]
+        last_row = first_row + len(pending) - 1
+        result = self._execute(self.sheets_sync._values().get(
+            spreadsheetId=self.sheets_sync.spreadsheet_id,
+            range=f'{SHEET_NAME}!A{first_row}:A{last_row}'
+        ))
+        found = len(result.get('values', []))
+        if found == len(pending):
+            print("🔁 Last chunk reached the sheet before the export stopped, not sending it again")
+            self._record_chunk(checkpoint, rows_log, pending, first_row)
+        elif found == 0:
+            print("🔁 Last chunk did not reach the sheet, sending it again")
+            checkpoint.pop("pending")
+            checkpoint.pop("pending_cursor")
+        else:
+            raise RuntimeError(
+                f"Rows {first_row}-{last_row} hold {found} of {len(pending)} rows of the last chunk, "
+                f"use --restart to export again"
+            )
+        self.save_checkpoint(checkpoint)
+    
+    def _load_rows(self):
+        """Get lead ID -> [row, hash] of every exported row from the rows log."""
+        rows = {}
+        with open(self.rows_path, "r") as f:
+            for line in f:
+                # A later line for the same lead was written by a resumed chunk
+                lead_id, row_number, digest = json.loads(line)
+                rows[lead_id] = [row_number, digest]
+        return rows
+    
+    def _save_sync_state(self, checkpoint):
+        """Hand the exported rows over to incremental sync."""
+        rows = self._load_rows()
+        self.sheets_sync.save_state({
+            'headers_hash': row_hash(HEADERS),
+            'next_row': checkpoint["next_row"],
+            'rows': rows
+        })
+        os.remove(self.rows_path)
+    
+    def _report(self, checkpoint, rows, seconds):
+        """Print the export progress and rate."""
+        rate = rows / seconds if seconds else 0.0
+        print(f"📤 Exported {checkpoint['exported']} leads ({rate:.0f} rows/s)")
+    
+    def run(self, restart=False):
+        """
+        Export every lead in the store, resuming an interrupted export.
+        
+        Args:
+            restart (bool): Clear the sheet and export from the start
+        
+        Returns:
+            dict: The completed checkpoint, with the overall rows_per_second
+        """
+        checkpoint = self.load_checkpoint(restart)
+        if checkpoint["complete"]:
+            print(f"✅ Already exported {checkpoint['exported']} leads, use --restart to export again")
+            return checkpoint
+        
+        if checkpoint["next_row"] is None:
+            self.bucket.acquire(2)
+            checkpoint["next_row"] = self.sheets_sync._reset_sheet()["next_row"]
+            open(self.rows_path, "w").close()
+            self.save_checkpoint(checkpoint)
+        elif checkpoint["exported"]:
+            print(f"🔁 Resuming export after {checkpoint['exported']} leads")
+        
+        start_time = time.monotonic()
+        report_time = start_time
+        exported = 0
+        
+        with open(self.rows_path, "a") as rows_log:
+            self._reconcile_pending(checkpoint, rows_log)
+            exported_ids = set(self._load_rows())
+            while True:
+                changed, cursor = self.store.changes_since(checkpoint["cursor"], limit=self.chunk_size)
+                if not changed:
+                    break
+                
+                # Leads already exported were updated since; incremental sync rewrites their rows
+                chunk = [lead for lead in changed if lead["id"] not in exported_ids]
+                if not chunk:
+                    checkpoint["cursor"] = cursor
+                    self.save_checkpoint(checkpoint)
+                    continue
+                
+                rows = list(self.sheets_sync.format_leads_for_sheets(chunk, include_headers=False))
+                # Recorded before sending, so a resume can tell whether the append landed
+                checkpoint["pending"] = [[lead["id"], row_hash(row)] for lead, row in zip(chunk, rows)]
+                checkpoint["pending_cursor"] = cursor
+                self.save_checkpoint(checkpoint)
+                
+                first_row = self._append_chunk(rows, checkpoint["next_row"])
+                self._record_chunk(checkpoint, rows_log, checkpoint["pending"], first_row)
+                exported_ids.update(lead["id"] for lead in chunk)
+                exported += len(chunk)
+                
+                now = time.monotonic()
+                if now - report_time >= REPORT_SECONDS:
+                    self._report(checkpoint, exported, now - start_time)
+                    report_time = now
+                self.save_checkpoint(checkpoint)
+        
+        elapsed = time.monotonic() - start_time
+        self._save_sync_state(checkpoint)
+        checkpoint["complete"] = True
+        checkpoint["rows_per_second"] = round(exported / elapsed, 1) if elapsed else None
+        self.save_checkpoint(checkpoint)
+        
+        print(f"✅ Exported {exported} leads in {elapsed:.1f}s ({exported / elapsed if elapsed else 0:.0f} rows/s)")
+        return checkpoint
+
+if __name__ == "__main__":
+    import argparse
+    from leads_manager import get_store
+    from sheets_sync import SheetsSync
+    
+    parser = argparse.ArgumentParser(description="Export every lead to a Google Sheet")
+    parser.add_argument("spreadsheet_id", help="ID of the Google Sheet to export to")
+    parser.add_argument("--restart", action="store_true", help="Clear the sheet and export from the start")
+    args = parser.parse_args()
+    
+    exporter = BulkExporter(SheetsSync(args.spreadsheet_id), get_store())
+    checkpoint = exporter.run(restart=args.restart)
+    print(json.dumps(checkpoint, indent=4))
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+In-memory stand-in for the Google Sheets API, for running the sync offline.
+
+Pass it to SheetsSync instead of authenticating:
+    
+    from sheets_stub import FakeSheetsService
+    service = FakeSheetsService()
+    SheetsSync("offline-sheet", service=service).sync_leads(get_all_leads())
+    print(service.rows("Leads"))
+
+Only the spreadsheets().values() calls the sync uses are implemented, and
+every request is counted so the amount of traffic can be checked.
+"""
+
+import re
+from collections import Counter
+
+# "Leads!A2", "Leads!A2:I9" or "Leads!A:Z"
+RANGE = re.compile(r'^(?P<sheet>[^!]+)!(?P<column>[A-Z]+)(?P<row>\d*)(?::[A-Z]+(?P<end>\d*))?$')
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+    
+    def execute(self, num_retries=0):
+        return self.result
+
+class FakeValues:
+    def __init__(self, service):
+        self.service = service
+    
+    def _sheet(self, range_name):
+        """Get the sheet name and first row number of a range."""
+        match = RANGE.match(range_name)
+        if match is None:
+            raise ValueError(f"Unsupported range: {range_name}")
+        return match.group('sheet'), int(match.group('row') or 1)
+    
+    def _write(self, sheet, first_row, values):
+        """Write rows starting at a 1-based row number."""
+        rows = self.service.sheets.setdefault(sheet, [])
+        while len(rows) < first_row - 1 + len(values):
+            rows.append([])
+        for offset, row in enumerate(values):
+            rows[first_row - 1 + offset] = list(row)
+    
+    def get(self, spreadsheetId, range):
+        self.service.requests['get'] += 1
+        sheet, first_row = self._sheet(range)
+        end = RANGE.match(range).group('end')
+        rows = self.service.sheets.get(sheet, [])[first_row - 1:int(end) if end else None]
+        # Like the API, trailing empty rows are left out
+        while rows and not rows[-1]:
+            rows = rows[:-1]
+        return FakeRequest({'values': rows})
+    
+    def clear(self, spreadsheetId, range):
+        self.service.requests['clear'] += 1
+        sheet, first_row = self._sheet(range)
+        del self.service.sheets.setdefault(sheet, [])[first_row - 1:]
+        return FakeRequest({'clearedRange': range})
+    
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        self.service.requests['update'] += 1
+        sheet, first_row = self._sheet(range)
+        self._write(sheet, first_row, body['values'])
+        return FakeRequest({'updatedRows': len(body['values'])})
+    
+    def append(self, spreadsheetId, range, valueInputOption, body, insertDataOption='OVERWRITE'):
+        self.service.requests['append'] += 1
+        sheet, _ = self._sheet(range)
+        rows = self.service.sheets.setdefault(sheet, [])
+        
+        # Like the real API, append after the last non-empty row
+        while rows and not rows[-1]:
+            rows.pop()
+        first_row = len(rows) + 1
+        self._write(sheet, first_row, body['values'])
+        last_row = first_row + len(body['values']) - 1
+        return FakeRequest({'updates': {'updatedRange': f"{sheet}!A{first_row}:Z{last_row}"}})
+    
+    def batchUpdate(self, spreadsheetId, body):
+        self.service.requests['batchUpdate'] += 1
+        for data in body['data']:
+            sheet, first_row = self._sheet(data['range'])
+            self._write(sheet, first_row, data['values'])
+        return FakeRequest({'totalUpdatedRows': len(body['data'])})
+
+class FakeSpreadsheets:
+    def __init__(self, service):
+        self.service = service
+    
+    def values(self):
+        return FakeValues(self.service)
+
+class FakeSheetsService:
+    def __init__(self):
+        """Initialize an empty fake spreadsheet."""
+        self.sheets = {}
+        self.requests = Counter()
+    
+    def spreadsheets(self):
+        return FakeSpreadsheets(self)
+    
+    def rows(self, sheet):
+        """Get the current rows of a sheet."""
+        return [row for row in self.sheets.get(sheet, []) if row]
\ No newline at end of file
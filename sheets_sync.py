@@ -1,124 +1,419 @@
 """
 Module for syncing leads data with Google Sheets.
+
+Syncs are incremental: a local state file remembers the sheet row and a
+content hash of every synced lead, so each sync only appends new leads and
+rewrites the rows of leads that changed, in chunked requests. The rows each
+chunk touched are appended to a small change log as soon as the chunk is
+sent, so an interrupted sync never sends them again; the state file itself is
+rewritten once at the end of a sync, which folds the log back into it.
+
+The Sheets API service is built once per process from the discovery
+document bundled with googleapiclient, and its token is refreshed in the
+background before it expires. Credentials are never requested interactively
+from the dashboard; run `python sheets_sync.py --authorize` once instead.
 """
 
 import os
+import re
 import json
-from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+try:
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from googleapiclient.discovery import build
+except ImportError:  # Offline: only a passed-in service, e.g. sheets_stub, can be used
+    Credentials = InstalledAppFlow = Request = build = None
 import pickle
+from config import SHEETS_SYNC_STATE_FILE, SHEETS_SYNC_CHUNK_SIZE, SHEETS_TOKEN_REFRESH_MARGIN_SECONDS
+from leads_store import atomic_write
 
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+TOKEN_FILE = 'token.pickle'
+CREDENTIALS_FILE = 'credentials.json'
+
+SHEET_NAME = 'Leads'
+
+HEADERS = [
+    'Phone', 'Timestamp', 'Truck ID', 'Current Location',
+    'Destination', 'Cargo Type', 'ETA', 'Special Requirements',
+    'Contact Number'
+]
+
+# First row of a range such as "Leads!A2:I501"
+RANGE_START_ROW = re.compile(r'![A-Z]+(\d+)')
+
+def format_lead_row(lead):
+    """
+    Format one lead as a Google Sheets row.
+    
+    Args:
+        lead (dict): Lead dictionary
+    
+    Returns:
+        list: Cell values in HEADERS order
+    """
+    responses = lead['responses']
+    return [
+        lead['phone_number'],
+        datetime.fromisoformat(lead['timestamp']).strftime("%Y-%m-%d %H:%M:%S"),
+        responses.get('truck_id', {}).get('response', ''),
+        responses.get('current_location', {}).get('response', ''),
+        responses.get('destination', {}).get('response', ''),
+        responses.get('cargo_type', {}).get('response', ''),
+        responses.get('estimated_arrival', {}).get('response', ''),
+        responses.get('special_requirements', {}).get('response', ''),
+        responses.get('contact_number', {}).get('response', '')
+    ]
+
+def row_hash(row):
+    """Hash a row's cell values to detect changes."""
+    return hashlib.sha1(json.dumps(row).encode()).hexdigest()
+
+def _chunks(items, size):
+    """Split a list into lists of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def save_credentials(creds):
+    """Save credentials for the next run."""
+    tmp_path = f"{TOKEN_FILE}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as token:
+        pickle.dump(creds, token)
+    os.replace(tmp_path, TOKEN_FILE)
+
+def load_credentials(interactive=False):
+    """
+    Load saved Google credentials, refreshing them if they expired.
+    
+    Args:
+        interactive (bool): Let the user log in through the browser if there
+            are no usable saved credentials
+    
+    Returns:
+        Credentials: Valid credentials
+    """
+    if Request is None:
+        raise RuntimeError("Google Sheets needs google-api-python-client and google-auth-oauthlib installed")
+    
+    creds = None
+    # The file token.pickle stores the user's access and refresh tokens
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'rb') as token:
+            creds = pickle.load(token)
+    
+    if creds and creds.valid:
+        return creds
+    
+    if creds and creds.expired and creds.refresh_token:
+        creds.refresh(Request())
+    elif interactive:
+        flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
+        creds = flow.run_local_server(port=0)
+    else:
+        raise RuntimeError("Google Sheets is not authorized, run `python sheets_sync.py --authorize` once")
+    
+    save_credentials(creds)
+    return creds
+
+class SheetsService:
+    def __init__(self, refresh_margin=SHEETS_TOKEN_REFRESH_MARGIN_SECONDS):
+        """
+        Initialize the process-wide Sheets service holder.
+        
+        Args:
+            refresh_margin (float): Seconds before expiry to refresh the token
+        """
+        self.refresh_margin = refresh_margin
+        self.service = None
+        self.creds = None
+        self.error = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._building = False
+        self._refresher = None
+    
+    def prefetch(self):
+        """Start building the service on a background thread, unless it is built or building."""
+        with self._lock:
+            if self.service is not None or self._building:
+                return
+            self._building = True
+            self._ready.clear()
+        threading.Thread(target=self._build, name="sheets-service", daemon=True).start()
+    
+    def _build(self):
+        """Load credentials and build the service from the bundled discovery document."""
+        try:
+            creds = load_credentials()
+            service = build('sheets', 'v4', credentials=creds, static_discovery=True, cache_discovery=False)
+            with self._lock:
+                self.creds, self.service, self.error = creds, service, None
+            self._start_refresher()
+        except Exception as e:
+            self.error = str(e)
+            print(f"\n❌ Error building Google Sheets service: {str(e)}")
+        finally:
+            with self._lock:
+                self._building = False
+            self._ready.set()
+    
+    def get(self, timeout=None):
+        """
+        Get the service, building it if needed.
+        
+        Args:
+            timeout (float): Longest to wait for a build in progress, None to wait for it
+        
+        Returns:
+            The Sheets API service, or None if it is not available yet or failed
+            to build (see error)
+        """
+        self.prefetch()
+        self._ready.wait(timeout)
+        return self.service
+    
+    def _start_refresher(self):
+        """Keep the token fresh on a background thread."""
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._keep_fresh, name="sheets-token", daemon=True)
+            self._refresher.start()
+    
+    def _keep_fresh(self):
+        """Refresh the token shortly before each expiry, retrying failures every minute."""
+        while self.creds is not None and self.creds.expiry is not None:
+            # google-auth keeps expiry as naive UTC
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            time.sleep(max((self.creds.expiry - now).total_seconds() - self.refresh_margin, 0))
+            try:
+                self.creds.refresh(Request())
+                save_credentials(self.creds)
+            except Exception as e:
+                print(f"\n⚠️ Error refreshing Google token, retrying in 60s: {str(e)}")
+                time.sleep(60)
+
+_sheets_service = SheetsService()
+
+def prefetch_sheets_service():
+    """Start building the shared Sheets service in the background."""
+    _sheets_service.prefetch()
+
+def get_sheets_service(timeout=None):
+    """Get the shared Sheets service, or None if it is not available within timeout."""
+    return _sheets_service.get(timeout)
+
+def get_sheets_service_error():
+    """Get why the shared Sheets service could not be built, or None."""
+    return _sheets_service.error
+
 class SheetsSync:
-    def __init__(self, spreadsheet_id):
+    def __init__(self, spreadsheet_id, service=None, state_path=SHEETS_SYNC_STATE_FILE, chunk_size=SHEETS_SYNC_CHUNK_SIZE):
         """
         Initialize Google Sheets sync.
         
         Args:
             spreadsheet_id (str): The ID of the Google Sheet to sync with
+            service: Sheets API service to use instead of authenticating,
+                e.g. sheets_stub.FakeSheetsService for offline runs
+            state_path (str): Path of the sync state file
+            chunk_size (int): Rows sent per request
         """
         self.spreadsheet_id = spreadsheet_id
+        self.state_path = state_path
+        self.chunk_size = chunk_size
         self.creds = None
-        self.service = None
-        self.initialize_service()
+        self.service = service
+        if self.service is None:
+            self.initialize_service()
     
     def initialize_service(self):
-        """Initialize the Google Sheets service."""
-        # The file token.pickle stores the user's access and refresh tokens
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                self.creds = pickle.load(token)
+        """Use the shared Google Sheets service, built once per process."""
+        self.service = get_sheets_service()
+        if self.service is None:
+            raise RuntimeError(f"Google Sheets is not available: {get_sheets_service_error()}")
+        self.creds = _sheets_service.creds
+    
+    def format_leads_for_sheets(self, leads, include_headers=True):
+        """
+        Format leads data for Google Sheets, one row at a time.
         
-        # If there are no (valid) credentials available, let the user log in
-        if not self.creds or not self.creds.valid:
-            if self.creds and self.creds.expired and self.creds.refresh_token:
-                self.creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                self.creds = flow.run_local_server(port=0)
-            
-            # Save the credentials for the next run
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(self.creds, token)
+        Args:
+            leads (iterable): Lead dictionaries, consumed lazily
+            include_headers (bool): Yield the header row first
+        
+        Yields:
+            list: Cell values of one row
+        """
+        if include_headers:
+            yield HEADERS
+        for lead in leads:
+            yield format_lead_row(lead)
+    
+    @property
+    def changes_path(self):
+        """Path of this spreadsheet's change log, folded into the state file by save_state()."""
+        return f"{self.state_path}.{self.spreadsheet_id}.log"
+    
+    def load_state(self):
+        """
+        Load the sync state of this spreadsheet, including changes logged since it was saved.
         
-        self.service = build('sheets', 'v4', credentials=self.creds)
+        Returns:
+            dict: headers_hash, next_row and rows (lead ID -> [row, hash]), empty if never synced
+        """
+        state = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    state = json.load(f).get(self.spreadsheet_id, {})
+            except json.JSONDecodeError:
+                print(f"⚠️ Error reading {self.state_path}, the sheet will be rewritten")
+                return {}
+        
+        if state and os.path.exists(self.changes_path):
+            with open(self.changes_path, 'r') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        break
+                    state['rows'].update(change['rows'])
+                    state['next_row'] = max(state['next_row'], change['next_row'])
+        return state
     
-    def format_leads_for_sheets(self, leads):
+    def save_state(self, state):
+        """Atomically save the sync state of this spreadsheet and clear its change log."""
+        all_states = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    all_states = json.load(f)
+            except json.JSONDecodeError:
+                pass
+        all_states[self.spreadsheet_id] = state
+        atomic_write(self.state_path, lambda f: json.dump(all_states, f))
+        if os.path.exists(self.changes_path):
+            os.remove(self.changes_path)
+    
+    def _log_changes(self, state, rows):
         """
-        Format leads data for Google Sheets.
+        Record the rows one chunk wrote, before the next chunk is sent.
         
         Args:
-            leads (list): List of lead dictionaries
+            state (dict): Sync state, already updated with the chunk
+            rows (dict): Lead ID -> [row, hash] of every row in the chunk
+        """
+        with open(self.changes_path, 'a') as f:
+            f.write(json.dumps({'next_row': state['next_row'], 'rows': rows}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _values(self):
+        """Get the spreadsheet values resource."""
+        return self.service.spreadsheets().values()
+    
+    def _reset_sheet(self):
+        """
+        Clear the sheet and write the headers, for the first sync or a full resync.
         
         Returns:
-            list: Formatted data for sheets
-        """
-        # Headers
-        headers = [
-            'Phone', 'Timestamp', 'Truck ID', 'Current Location',
-            'Destination', 'Cargo Type', 'ETA', 'Special Requirements',
-            'Contact Number'
-        ]
-        
-        # Format data
-        rows = [headers]
-        for lead in leads:
-            responses = lead['responses']
-            row = [
-                lead['phone_number'],
-                datetime.fromisoformat(lead['timestamp']).strftime("%Y-%m-%d %H:%M:%S"),
-                responses.get('truck_id', {}).get('response', ''),
-                responses.get('current_location', {}).get('response', ''),
-                responses.get('destination', {}).get('response', ''),
-                responses.get('cargo_type', {}).get('response', ''),
-                responses.get('estimated_arrival', {}).get('response', ''),
-                responses.get('special_requirements', {}).get('response', ''),
-                responses.get('contact_number', {}).get('response', '')
+            dict: Fresh sync state
+        """
+        self._values().clear(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{SHEET_NAME}!A:Z'
+        ).execute()
+        self._values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'{SHEET_NAME}!A1',
+            valueInputOption='RAW',
+            body={'values': [HEADERS]}
+        ).execute()
+        return {'headers_hash': row_hash(HEADERS), 'next_row': 2, 'rows': {}}
+    
+    def _append_rows(self, state, leads_and_rows):
+        """Append new leads in chunks, recording the row each one landed on."""
+        for chunk in _chunks(leads_and_rows, self.chunk_size):
+            # INSERT_ROWS grows the sheet, so it is not limited to its current size
+            result = self._values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{SHEET_NAME}!A1',
+                valueInputOption='RAW',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [row for _, row in chunk]}
+            ).execute()
+            
+            match = RANGE_START_ROW.search(result.get('updates', {}).get('updatedRange', ''))
+            first_row = int(match.group(1)) if match else state['next_row']
+            rows = {
+                lead['id']: [first_row + offset, row_hash(row)]
+                for offset, (lead, row) in enumerate(chunk)
+            }
+            state['rows'].update(rows)
+            state['next_row'] = first_row + len(chunk)
+            self._log_changes(state, rows)
+    
+    def _update_rows(self, state, leads_and_rows):
+        """Rewrite the rows of changed leads in chunked batch updates."""
+        for chunk in _chunks(leads_and_rows, self.chunk_size):
+            data = [
+                {'range': f"{SHEET_NAME}!A{state['rows'][lead['id']][0]}", 'values': [row]}
+                for lead, row in chunk
             ]
-            rows.append(row)
-        
-        return rows
+            self._values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'valueInputOption': 'RAW', 'data': data}
+            ).execute()
+            
+            rows = {}
+            for lead, row in chunk:
+                state['rows'][lead['id']][1] = row_hash(row)
+                rows[lead['id']] = state['rows'][lead['id']]
+            self._log_changes(state, rows)
     
-    def sync_leads(self, leads):
+    def sync_leads(self, leads, full=False):
         """
         Sync leads to Google Sheets.
         
+        Only leads that are new or changed since the last sync are sent. The
+        sheet is cleared and rewritten only on the first sync, when the
+        columns change or when a full sync is requested.
+        
         Args:
-            leads (list): List of lead dictionaries
+            leads (iterable): Lead dictionaries, read once
+            full (bool): Rewrite the whole sheet
         
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Format data
-            values = self.format_leads_for_sheets(leads)
+            state = self.load_state()
+            if full or state.get('headers_hash') != row_hash(HEADERS):
+                state = self._reset_sheet()
+                self.save_state(state)
             
-            # Clear existing data
-            range_name = 'Leads!A1:Z1000'  # Adjust range as needed
-            self.service.spreadsheets().values().clear(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
+            # Diff against the state file
+            new, changed = [], []
+            for lead in leads:
+                row = format_lead_row(lead)
+                synced = state['rows'].get(lead['id'])
+                if synced is None:
+                    new.append((lead, row))
+                elif synced[1] != row_hash(row):
+                    changed.append((lead, row))
             
-            # Update with new data
-            body = {
-                'values': values
-            }
+            self._update_rows(state, changed)
+            self._append_rows(state, new)
+            if new or changed:
+                self.save_state(state)
             
-            result = self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                body=body
-            ).execute()
-            
-            print(f"\n✅ Synced {len(leads)} leads to Google Sheets")
+            print(f"\n✅ Synced {len(new)} new and {len(changed)} changed leads to Google Sheets")
             return True
             
         except Exception as e:
@@ -127,4 +422,15 @@ class SheetsSync:
     
     def get_sheet_url(self):
         """Get the URL of the Google Sheet."""
-        return f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}" 
\ No newline at end of file
+        return f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}" 
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Google Sheets sync for trucker leads")
+    parser.add_argument("--authorize", action="store_true", help="Log in through the browser and save token.pickle")
+    args = parser.parse_args()
+    
+    if args.authorize:
+        load_credentials(interactive=True)
+        print(f"✅ Google credentials saved to {TOKEN_FILE}")
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Check that score_batch gives every lead the same scores as calculate_lead_score.
+"""
+
+import itertools
+from datetime import datetime
+from lead_scorer import score_batch, score_components, calculate_lead_score
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+CARGO_TYPES = ['Reefer load', 'FLATBED steel', 'dry van', 'stepdeck', 'tanker', 'misc', '']
+ETAS = ['today 5pm', 'tomorrow', 'in 6 hours', '2024-06-01 10:00', '6/2/2024 9:05', '2024-13-01', '']
+LOCATIONS = ['Los Angeles', 'new york, ny', ' Chicago ', 'Miami', 'Dallas TX', 'nowhere', '']
+
+def make_lead(cargo_type, eta, origin, destination):
+    """Build a lead with the responses the scorer reads."""
+    return {
+        'responses': {
+            'cargo_type': {'response': cargo_type},
+            'estimated_arrival': {'response': eta},
+            'current_location': {'response': origin},
+            'destination': {'response': destination}
+        }
+    }
+
+def sample_leads():
+    """Get leads covering every cargo type, ETA form and lane above, plus one without responses."""
+    leads = [
+        make_lead(cargo_type, eta, origin, destination)
+        for (cargo_type, eta), (origin, destination) in zip(
+            itertools.product(CARGO_TYPES, ETAS),
+            itertools.cycle(itertools.product(LOCATIONS, LOCATIONS))
+        )
+    ]
+    leads += [make_lead('reefer', 'today', origin, destination) for origin, destination in itertools.product(LOCATIONS, LOCATIONS)]
+    leads.append({'responses': {}})
+    return leads
+
+def missing_response_leads():
+    """Get leads whose answers are None, missing or without a response text."""
+    return [
+        make_lead(None, None, None, None),
+        make_lead('reefer', None, None, 'Miami'),
+        make_lead(None, 'today', 'Los Angeles', None),
+        {'responses': {'cargo_type': None, 'destination': {}}},
+        {'responses': {'current_location': {'response': 'Chicago'}, 'estimated_arrival': {'response': None}}},
+        {'responses': None},
+        {}
+    ]
+
+def assert_parity(leads):
+    """Check every batch score against the scalar scorers."""
+    batch = score_batch(leads, NOW)
+    
+    assert len(batch) == len(leads)
+    for lead, row in zip(leads, batch.itertuples(index=False)):
+        components = score_components(lead, NOW)
+        assert (row.truck_type, row.availability, row.route) == (
+            components['truck_type'], components['availability'], components['route']
+        )
+        assert row.score == calculate_lead_score(lead, NOW)
+
+def test_score_batch_matches_calculate_lead_score():
+    assert_parity(sample_leads())
+
+def test_score_batch_matches_calculate_lead_score_for_missing_responses():
+    assert_parity(missing_response_leads())
+
+def test_score_batch_matches_calculate_lead_score_mixed_with_missing_responses():
+    assert_parity(missing_response_leads() + sample_leads()[:20] + missing_response_leads())
+
+def test_score_batch_of_no_leads_is_empty():
+    batch = score_batch([], NOW)
+    
+    assert batch.empty
+    assert list(batch.columns) == ['truck_type', 'availability', 'route', 'score']
\ No newline at end of file
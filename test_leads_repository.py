@@ -0,0 +1,144 @@
+"""
+Check the SQLite leads repository: upserts, the change sequence cursor and schema migration.
+"""
+
+import json
+import sqlite3
+import pytest
+from leads_repository import LeadsRepository
+from leads_store import LeadsLog
+
+def make_lead(lead_id, score=0.5, origin='Los Angeles', destination='Miami', timestamp='2024-06-01T12:00:00'):
+    """Build a minimal scored lead."""
+    return {
+        'id': lead_id,
+        'phone_number': '+15550100',
+        'timestamp': timestamp,
+        'score': score,
+        'responses': {
+            'current_location': {'response': origin},
+            'destination': {'response': destination}
+        }
+    }
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'leads.db')
+
+@pytest.fixture
+def repo(db_path):
+    repository = LeadsRepository(db_path)
+    yield repository
+    repository.close()
+
+def test_append_replaces_existing_leads(repo):
+    repo.append(make_lead('a', score=0.1))
+    repo.append(make_lead('b', score=0.2))
+    repo.append(make_lead('a', score=0.9))
+    
+    assert repo.count() == 2
+    assert repo.get('a')['score'] == 0.9
+    assert repo.get('missing') is None
+    assert [lead['id'] for lead in repo.iter_leads()] == ['a', 'b']
+
+def test_changes_since_returns_only_new_writes(repo):
+    repo.append_many([make_lead('a'), make_lead('b')])
+    changed, cursor = repo.changes_since()
+    assert [lead['id'] for lead in changed] == ['a', 'b']
+    
+    changed, same = repo.changes_since(cursor)
+    assert changed == []
+    assert same == cursor
+    
+    repo.append(make_lead('c'))
+    repo.append(make_lead('a', score=0.8))
+    changed, cursor = repo.changes_since(cursor)
+    assert [(lead['id'], lead['score']) for lead in changed] == [('c', 0.5), ('a', 0.8)]
+
+def test_append_many_numbers_every_row(repo, db_path):
+    repo.append_many([make_lead(str(number)) for number in range(5)])
+    repo.append_many([make_lead('1'), make_lead('9')])
+    
+    with sqlite3.connect(db_path) as conn:
+        seqs = dict(conn.execute("SELECT id, seq FROM leads"))
+    assert len(set(seqs.values())) == len(seqs)
+    assert seqs['1'] == 6
+    assert seqs['9'] == 7
+
+def test_query_uses_normalized_lanes_and_orders(repo):
+    repo.append(make_lead('a', score=0.3, origin='Chicago'))
+    repo.append(make_lead('b', score=0.9, origin=' los angeles '))
+    repo.append(make_lead('c', score=0.6))
+    repo.append(make_lead('d', score=0.8, timestamp='2024-05-01T00:00:00'))
+    
+    assert [lead['id'] for lead in repo.query(order_by='score', limit=2)] == ['b', 'd']
+    assert [lead['id'] for lead in repo.page(1, 2)] == ['c', 'a']
+    assert [lead['id'] for lead in repo.query(origin='LOS ANGELES', destination='miami', order_by='score')] == ['b', 'd', 'c']
+    assert [lead['id'] for lead in repo.in_time_range(since='2024-06-01T00:00:00')] == ['a', 'b', 'c']
+    assert repo.count(min_score=0.6) == 3
+
+def test_iter_leads_by_id_reads_in_chunks(repo):
+    repo.append_many([make_lead(f'{number:03d}') for number in range(7)])
+    
+    assert [lead['id'] for lead in repo.iter_leads_by_id(chunk_size=3)] == [f'{number:03d}' for number in range(7)]
+    assert [lead['id'] for lead in repo.iter_leads_by_id(after='004', chunk_size=3)] == ['005', '006']
+
+def test_opening_a_database_without_seq_adds_it(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE leads (id TEXT PRIMARY KEY, phone_number TEXT, timestamp TEXT, "
+            "score REAL, origin TEXT, destination TEXT, data TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO leads (id, score, data) VALUES (?, ?, ?)",
+            [(lead_id, 0.5, json.dumps(make_lead(lead_id))) for lead_id in ('x', 'y')]
+        )
+    
+    repo = LeadsRepository(db_path)
+    try:
+        changed, cursor = repo.changes_since()
+        assert [lead['id'] for lead in changed] == ['x', 'y']
+        assert cursor == 2
+        
+        # Upserts continue the sequence from the migrated rows
+        repo.append(make_lead('x', score=0.7))
+        changed, cursor = repo.changes_since(cursor)
+        assert [(lead['id'], lead['score']) for lead in changed] == [('x', 0.7)]
+        assert cursor == 3
+    finally:
+        repo.close()
+    
+    # Opening it again leaves the numbering alone
+    repo = LeadsRepository(db_path)
+    try:
+        assert repo.changes_since(2)[1] == 3
+    finally:
+        repo.close()
+
+def test_migrate_from_log(repo, tmp_path):
+    log = LeadsLog(str(tmp_path / 'leads.jsonl'))
+    try:
+        log.append_many([make_lead('a', score=0.1), make_lead('b'), make_lead('a', score=0.9)])
+        assert repo.migrate_from(log) == 2
+    finally:
+        log.close()
+    
+    assert repo.get('a')['score'] == 0.9
+    
+    # Importing again upserts instead of duplicating
+    log = LeadsLog(str(tmp_path / 'leads.jsonl'))
+    try:
+        repo.migrate_from(log)
+    finally:
+        log.close()
+    assert repo.count() == 2
+
+def test_migrate_from_json_runs_once(repo, tmp_path):
+    json_path = tmp_path / 'leads.json'
+    json_path.write_text(json.dumps([make_lead('a'), make_lead('b')]))
+    
+    assert repo.migrate_from_json(str(json_path)) == 2
+    assert not json_path.exists()
+    assert (tmp_path / 'leads.json.migrated').exists()
+    assert repo.migrate_from_json(str(json_path)) == 0
+    assert repo.count() == 2
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Check the append-only leads log: latest version wins, batched fsync, compaction and migration.
+"""
+
+import json
+import time
+import pytest
+import leads_store
+from leads_store import LeadsLog
+
+def make_lead(lead_id, score=0.5, origin='Los Angeles', timestamp='2024-06-01T12:00:00'):
+    """Build a minimal scored lead."""
+    return {
+        'id': lead_id,
+        'timestamp': timestamp,
+        'score': score,
+        'responses': {'current_location': {'response': origin}}
+    }
+
+def read_lines(path):
+    """Get the parsed lines of a log file."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'leads.jsonl')
+
+@pytest.fixture
+def log(log_path):
+    leads_log = LeadsLog(log_path)
+    yield leads_log
+    leads_log.close()
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(leads_store.os, 'fsync', lambda fd: calls.append(fd))
+    return calls
+
+def test_latest_version_of_a_lead_wins(log, log_path):
+    log.append(make_lead('a', score=0.1))
+    log.append(make_lead('b', score=0.2))
+    log.append(make_lead('a', score=0.9))
+    
+    assert len(read_lines(log_path)) == 3
+    assert [(lead['id'], lead['score']) for lead in log.iter_leads()] == [('b', 0.2), ('a', 0.9)]
+    assert log.get('a')['score'] == 0.9
+    assert log.get('missing') is None
+    assert log.count() == 2
+    assert log.count(min_score=0.5) == 1
+
+def test_append_assigns_missing_ids(log):
+    stored = log.append_many([{'responses': {}}, {'responses': {}}])
+    
+    assert all(lead['id'] for lead in stored)
+    assert stored[0]['id'] != stored[1]['id']
+    assert {lead['id'] for lead in log.iter_leads()} == {lead['id'] for lead in stored}
+
+def test_torn_final_line_is_skipped(log, log_path):
+    log.append(make_lead('a'))
+    with open(log_path, 'a') as f:
+        f.write('{"id": "b", "sco')
+    
+    assert [lead['id'] for lead in log.iter_leads()] == ['a']
+
+def test_fsync_is_batched(log_path, fsyncs):
+    log = LeadsLog(log_path, fsync_batch_size=4, fsync_interval=60)
+    try:
+        for number in range(3):
+            log.append(make_lead(str(number)))
+        assert fsyncs == []
+        
+        log.append(make_lead('3'))
+        assert len(fsyncs) == 1
+        
+        log.append(make_lead('4'))
+        log.sync()
+        assert len(fsyncs) == 2
+        
+        # Nothing left to sync
+        log.sync()
+        assert len(fsyncs) == 2
+    finally:
+        log.close()
+
+def test_timer_syncs_the_last_append_of_a_burst(log_path, fsyncs):
+    log = LeadsLog(log_path, fsync_batch_size=100, fsync_interval=0.05)
+    try:
+        log.append(make_lead('a'))
+        assert fsyncs == []
+        
+        deadline = time.monotonic() + 5
+        while not fsyncs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(fsyncs) == 1
+    finally:
+        log.close()
+
+def test_close_syncs_pending_appends(log_path, fsyncs):
+    log = LeadsLog(log_path, fsync_batch_size=100, fsync_interval=60)
+    log.append(make_lead('a'))
+    log.close()
+    
+    assert len(fsyncs) == 1
+
+def test_compaction_keeps_only_latest_versions(log, log_path):
+    for score in (0.1, 0.2, 0.3):
+        log.append(make_lead('a', score=score))
+    log.append(make_lead('b'))
+    
+    assert log.compact() == 2
+    assert [(lead['id'], lead['score']) for lead in read_lines(log_path)] == [('a', 0.3), ('b', 0.5)]
+    
+    # Appends after compaction go to the new file
+    log.append(make_lead('c'))
+    assert [lead['id'] for lead in read_lines(log_path)] == ['a', 'b', 'c']
+
+def test_changes_since_cursor(log):
+    log.append(make_lead('a'))
+    changed, cursor = log.changes_since()
+    assert [lead['id'] for lead in changed] == ['a']
+    
+    log.append(make_lead('b'))
+    log.append(make_lead('b', score=0.8))
+    changed, cursor = log.changes_since(cursor)
+    assert [(lead['id'], lead['score']) for lead in changed] == [('b', 0.8)]
+    
+    changed, cursor = log.changes_since(cursor)
+    assert changed == []
+    
+    # A compacted log is a new file, so everything is returned again
+    log.compact()
+    changed, cursor = log.changes_since(cursor)
+    assert sorted(lead['id'] for lead in changed) == ['a', 'b']
+
+def test_iter_leads_by_id_resumes_after_an_id(log):
+    for lead_id in ('c', 'a', 'b'):
+        log.append(make_lead(lead_id))
+    
+    assert [lead['id'] for lead in log.iter_leads_by_id()] == ['a', 'b', 'c']
+    assert [lead['id'] for lead in log.iter_leads_by_id(after='a')] == ['b', 'c']
+
+def test_query_filters_and_orders(log):
+    log.append(make_lead('a', score=0.3, origin='Chicago'))
+    log.append(make_lead('b', score=0.9, origin=' los angeles '))
+    log.append(make_lead('c', score=0.6, origin='Los Angeles'))
+    log.append(make_lead('d', score=0.8, origin='Los Angeles', timestamp='2024-05-01T00:00:00'))
+    
+    assert [lead['id'] for lead in log.query(order_by='score', limit=2)] == ['b', 'd']
+    assert [lead['id'] for lead in log.query(order_by='score', limit=2, offset=1)] == ['d', 'c']
+    assert [lead['id'] for lead in log.query(origin='LOS ANGELES', min_score=0.7)] == ['b', 'd']
+    assert [lead['id'] for lead in log.query(since='2024-06-01T00:00:00', order_by='oldest')] == ['a', 'b', 'c']
+
+def test_migrate_from_json_runs_once(log, tmp_path):
+    json_path = tmp_path / 'leads.json'
+    json_path.write_text(json.dumps([make_lead('a'), make_lead('b')]))
+    
+    assert log.migrate_from_json(str(json_path)) == 2
+    assert not json_path.exists()
+    assert (tmp_path / 'leads.json.migrated').exists()
+    assert [lead['id'] for lead in log.iter_leads()] == ['a', 'b']
+    
+    assert log.migrate_from_json(str(json_path)) == 0
+    assert log.count() == 2
+
+def test_migrate_from_unreadable_json_keeps_the_file(log, tmp_path):
+    json_path = tmp_path / 'leads.json'
+    json_path.write_text('[{"id": ')
+    
+    assert log.migrate_from_json(str(json_path)) == 0
+    assert json_path.exists()
+    assert log.count() == 0
\ No newline at end of file
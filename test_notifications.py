@@ -0,0 +1,184 @@
+"""
+Check the SQLite notification queue: digests, claims, retry backoff and schema migration.
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from notifications import Notifier, build_digest
+
+class RecordingSender:
+    def __init__(self):
+        self.digests = []
+    
+    def send(self, digest):
+        self.digests.append(digest)
+
+class FailingSender:
+    def send(self, digest):
+        raise ConnectionError("dispatcher unreachable")
+
+def make_lead(lead_id, score=0.5):
+    """Build a minimal scored lead."""
+    return {
+        'id': lead_id,
+        'phone_number': '+15550100',
+        'score': score,
+        'responses': {
+            'current_location': {'response': 'Los Angeles'},
+            'destination': {'response': 'Miami'}
+        }
+    }
+
+def queued_rows(path):
+    """Get every queued row as a dictionary."""
+    with sqlite3.connect(path) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute("SELECT * FROM notifications ORDER BY id")]
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'notifications.db')
+
+@pytest.fixture
+def make_notifier(queue_path):
+    notifiers = []
+    
+    def make(sender, **kwargs):
+        # A long coalescing window keeps the worker thread from sending on its own
+        kwargs.setdefault('digest_seconds', 3600)
+        notifier = Notifier(sender=sender, path=queue_path, **kwargs)
+        notifiers.append(notifier)
+        return notifier
+    
+    yield make
+    for notifier in notifiers:
+        notifier._stop.set()
+        notifier._wake.set()
+
+def test_queued_leads_go_out_in_one_digest(make_notifier):
+    sender = RecordingSender()
+    notifier = make_notifier(sender)
+    for number in range(3):
+        notifier.notify(make_lead(str(number), score=number / 10))
+    assert notifier.pending() == 3
+    
+    assert notifier.send_digest()
+    
+    assert notifier.pending() == 0
+    assert len(sender.digests) == 1
+    assert sender.digests[0]['count'] == 3
+    assert [lead['lead_id'] for lead in sender.digests[0]['leads']] == ['2', '1', '0']
+    assert not notifier.send_digest()
+
+def test_leads_queued_while_sending_wait_for_the_next_digest(make_notifier):
+    class QueueingSender(RecordingSender):
+        def send(self, digest):
+            super().send(digest)
+            if len(self.digests) == 1:
+                notifier.notify(make_lead('late'))
+    
+    sender = QueueingSender()
+    notifier = make_notifier(sender)
+    notifier.notify(make_lead('early'))
+    
+    assert notifier.send_digest()
+    assert notifier.pending() == 1
+    assert notifier.send_digest()
+    assert [digest['leads'][0]['lead_id'] for digest in sender.digests] == ['early', 'late']
+
+def test_failed_digest_is_retried_with_backoff(make_notifier, queue_path):
+    notifier = make_notifier(FailingSender(), retry_base=60, retry_max=100, max_attempts=3)
+    notifier.notify(make_lead('a'))
+    
+    before = time.time()
+    assert not notifier.send_digest()
+    row = queued_rows(queue_path)[0]
+    assert row['attempts'] == 1
+    assert row['claimed_by'] is None
+    assert before + 60 <= row['next_attempt'] <= time.time() + 60
+    assert notifier.seconds_until_due() > 50
+    
+    assert not notifier.send_digest()
+    row = queued_rows(queue_path)[0]
+    assert row['attempts'] == 2
+    assert row['next_attempt'] <= time.time() + 100
+    
+    # The last attempt drops the digest
+    assert not notifier.send_digest()
+    assert notifier.pending() == 0
+
+def test_rows_claimed_by_another_worker_are_left_alone(make_notifier):
+    first = RecordingSender()
+    second = RecordingSender()
+    sending = make_notifier(first, claim_seconds=0.2)
+    waiting = make_notifier(second, claim_seconds=0.2)
+    sending.notify(make_lead('a'))
+    
+    # A worker that claimed the rows and has not finished sending
+    assert [row['lead_id'] for row in sending._claim()] == ['a']
+    assert not waiting.send_digest()
+    assert waiting.seconds_until_due() is None
+    assert waiting.pending() == 1
+    
+    # The claim expires as if the worker died
+    time.sleep(0.3)
+    assert waiting.send_digest()
+    assert [digest['leads'][0]['lead_id'] for digest in second.digests] == ['a']
+    assert first.digests == []
+
+def test_concurrent_workers_send_each_lead_once(make_notifier):
+    senders = [RecordingSender() for _ in range(4)]
+    notifiers = [make_notifier(sender) for sender in senders]
+    
+    def work(notifier, worker):
+        for number in range(50):
+            notifier.notify(make_lead(f'{worker}-{number}'))
+            notifier.send_digest()
+    
+    threads = [threading.Thread(target=work, args=(notifier, worker)) for worker, notifier in enumerate(notifiers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    notifiers[0].send_digest()
+    
+    # A lead claimed by two workers would be counted twice
+    assert notifiers[0].pending() == 0
+    assert sum(digest['count'] for sender in senders for digest in sender.digests) == 200
+
+def test_opening_a_queue_without_claim_columns_adds_them(queue_path, make_notifier):
+    with sqlite3.connect(queue_path) as conn:
+        conn.execute(
+            "CREATE TABLE notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, lead_id TEXT, "
+            "phone_number TEXT, score REAL, origin TEXT, destination TEXT, created REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL DEFAULT 0)"
+        )
+        conn.execute("INSERT INTO notifications (lead_id, score, created) VALUES ('old', 0.9, 0)")
+    
+    sender = RecordingSender()
+    make_notifier(sender)
+    notifier = make_notifier(sender)
+    
+    with sqlite3.connect(queue_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(notifications)")]
+    assert columns.count('claimed_by') == 1
+    assert columns.count('claimed_at') == 1
+    assert notifier.seconds_until_due() == 0
+    assert notifier.send_digest()
+    assert sender.digests[0]['leads'][0]['lead_id'] == 'old'
+
+def test_build_digest_text():
+    rows = [
+        {'lead_id': 'a', 'phone_number': '1', 'score': 0.4, 'origin': 'Dallas', 'destination': None},
+        {'lead_id': 'b', 'phone_number': '2', 'score': 0.9, 'origin': 'Miami', 'destination': 'Chicago'}
+    ]
+    
+    single = build_digest(rows[:1])
+    assert single['subject'] == '1 new trucker lead'
+    assert single['text'].startswith('New trucker lead captured: 0.40 Dallas → ?')
+    
+    digest = build_digest(rows, top_leads=1)
+    assert digest['subject'] == '2 new trucker leads'
+    assert [lead['lead_id'] for lead in digest['leads']] == ['b']
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Check incremental syncs against the in-memory Sheets service from sheets_stub.
+"""
+
+import pytest
+import sheets_stub
+from sheets_stub import FakeSheetsService
+from sheets_sync import SheetsSync, SHEET_NAME
+
+def make_lead(number, truck_id=None):
+    """Build a lead whose Truck ID cell identifies it."""
+    return {
+        'id': f'lead-{number:05d}',
+        'phone_number': '+15550100',
+        'timestamp': '2024-06-01T12:00:00',
+        'responses': {'truck_id': {'response': truck_id or str(number)}}
+    }
+
+def truck_ids(service):
+    """Get the Truck ID column of every data row."""
+    return [row[2] for row in service.rows(SHEET_NAME)[1:]]
+
+@pytest.fixture
+def service():
+    return FakeSheetsService()
+
+@pytest.fixture
+def sync(service, tmp_path):
+    return SheetsSync('test-sheet', service=service, state_path=str(tmp_path / 'state.json'), chunk_size=400)
+
+def test_first_sync_grows_past_1000_rows(sync, service):
+    sync.sync_leads([make_lead(number) for number in range(1500)])
+    
+    assert truck_ids(service) == [str(number) for number in range(1500)]
+    state = sync.load_state()
+    assert state['next_row'] == 1502
+    assert state['rows']['lead-01200'][0] == 1202
+
+def test_second_sync_updates_changed_rows_and_appends_new_ones(sync, service):
+    leads = [make_lead(number) for number in range(1200)]
+    sync.sync_leads(leads)
+    service.requests.clear()
+    
+    leads[7] = make_lead(7, truck_id='changed')
+    leads += [make_lead(number) for number in range(1200, 1250)]
+    sync.sync_leads(leads)
+    
+    ids = truck_ids(service)
+    assert len(ids) == 1250
+    assert ids[7] == 'changed'
+    assert ids[1249] == '1249'
+    assert service.requests['clear'] == 0
+    assert service.requests['batchUpdate'] == 1
+    assert service.requests['append'] == 1
+
+def test_unchanged_sync_sends_nothing(sync, service):
+    leads = [make_lead(number) for number in range(10)]
+    sync.sync_leads(leads)
+    service.requests.clear()
+    
+    sync.sync_leads(leads)
+    
+    assert sum(service.requests.values()) == 0
+
+def test_interrupted_sync_does_not_append_sent_chunks_again(sync, service, monkeypatch):
+    append = sheets_stub.FakeValues.append
+    calls = []
+    
+    def failing_append(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise ConnectionError("connection reset")
+        return append(self, *args, **kwargs)
+    
+    leads = [make_lead(number) for number in range(1500)]
+    monkeypatch.setattr(sheets_stub.FakeValues, 'append', failing_append)
+    sync.sync_leads(leads)
+    assert len(truck_ids(service)) == 800
+    
+    monkeypatch.setattr(sheets_stub.FakeValues, 'append', append)
+    sync.sync_leads(leads)
+    
+    assert truck_ids(service) == [str(number) for number in range(1500)]
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Batched Whisper transcription service.
+
+Callers from any thread submit 16 kHz audio clips and get a future back. A
+single worker thread collects clips until the batch is full or the oldest
+clip has waited long enough, pads each one into a 30-second log-mel window
+and decodes the whole batch in one forward pass through a shared model.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import torch
+import whisper
+from config import WHISPER_FP16
+from config import TRANSCRIPTION_MAX_BATCH_SIZE, TRANSCRIPTION_MAX_WAIT_SECONDS, TRANSCRIPTION_LANGUAGE
+from voice_utils import get_whisper_model, to_float32_mono, WHISPER_SAMPLE_RATE
+
+# Registry replica reserved for the batch worker, separate from direct transcribe_audio callers
+BATCH_REPLICA = "batch"
+
+class BatchTranscriber:
+    def __init__(
+        self,
+        model_name=None,
+        max_batch_size=TRANSCRIPTION_MAX_BATCH_SIZE,
+        max_wait=TRANSCRIPTION_MAX_WAIT_SECONDS,
+        language=TRANSCRIPTION_LANGUAGE
+    ):
+        """
+        Initialize the batch transcriber.
+        
+        Args:
+            model_name (str): Whisper model size, defaults to config.WHISPER_MODEL
+            max_batch_size (int): Most clips decoded in one forward pass
+            max_wait (float): Longest time in seconds the first clip in a batch
+                waits for more clips to arrive
+            language (str): Spoken language, or None to detect it per clip
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.options = whisper.DecodingOptions(
+            language=language,
+            fp16=WHISPER_FP16,
+            without_timestamps=True
+        )
+        
+        self.model = None
+        self.batches = 0
+        self.clips = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Load the model and start the batching worker."""
+        with self._lock:
+            if self._worker is not None:
+                return
+            
+            self.model = get_whisper_model(self.model_name, replica=BATCH_REPLICA)
+            self._worker = threading.Thread(target=self._run, name="whisper-batch", daemon=True)
+            self._worker.start()
+    
+    def stop(self):
+        """Finish the queued clips and stop the worker."""
+        if self._worker is None:
+            return
+        
+        self._queue.put(None)
+        self._worker.join()
+        self._worker = None
+    
+    def submit(self, audio):
+        """
+        Queue a clip for transcription.
+        
+        Args:
+            audio (np.ndarray): 16 kHz samples, clips longer than 30 seconds
+                are truncated to the first 30
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the transcribed text
+        """
+        self.start()
+        future = Future()
+        self._queue.put((to_float32_mono(audio), future))
+        return future
+    
+    def transcribe(self, audio, timeout=None):
+        """
+        Transcribe a clip, blocking until its batch has been decoded.
+        
+        Args:
+            audio (np.ndarray): 16 kHz samples
+            timeout (float): Seconds to wait for the result
+        
+        Returns:
+            str: Transcribed text
+        """
+        return self.submit(audio).result(timeout=timeout)
+    
+    def get_stats(self):
+        """Get the number of batches and clips decoded so far."""
+        return {
+            "batches": self.batches,
+            "clips": self.clips,
+            "average_batch_size": round(self.clips / self.batches, 2) if self.batches else 0.0,
+            "queue_depth": self._queue.qsize()
+        }
+    
+    def _collect_batch(self, first):
+        """
+        Gather clips behind the first one until the batch is full or max_wait passes.
+        
+        Returns:
+            tuple: (batch, stop) where stop is True if the stop sentinel was seen
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        
+        return batch, False
+    
+    def _run(self):
+        """Decode batches until stop() is called."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            
+            batch, stop = self._collect_batch(first)
+            self._decode(batch)
+            if stop:
+                return
+    
+    def _decode(self, batch):
+        """Decode a batch of clips in one forward pass and resolve their futures."""
+        # Empty clips have nothing to decode
+        pending = []
+        for audio, future in batch:
+            if audio.size == 0:
+                future.set_result("")
+            else:
+                pending.append((audio, future))
+        if not pending:
+            return
+        
+        try:
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(audio),
+                    n_mels=self.model.dims.n_mels,
+                    device=self.model.device
+                )
+                for audio, _ in pending
+            ])
+            results = whisper.decode(self.model, mels, self.options)
+            
+            for (_, future), result in zip(pending, results):
+                future.set_result(result.text)
+            
+            self.batches += 1
+            self.clips += len(pending)
+            
+        except Exception as e:
+            print(f"❌ Error transcribing batch of {len(pending)} clips: {str(e)}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_transcription_service():
+    """Get the process-wide batch transcriber, starting it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BatchTranscriber()
+            _service.start()
+    return _service
+
+if __name__ == "__main__":
+    # Decode a few clips of silence to check the service end to end
+    service = get_transcription_service()
+    futures = [service.submit(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)) for _ in range(4)]
+    print([future.result() for future in futures])
+    print(service.get_stats())
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Async Twilio HTTP client for the interview scheduler.
+
+Follows the same rules as the shared client in twilio_client: requests go to
+TWILIO_API_BASE_URL when it is set, so the scheduler can run against a local
+stub; 429 and 5xx responses are retried with exponential backoff, but a POST
+is only repeated when Twilio is known not to have acted on it; and request
+latency is recorded. Kept apart from twilio_client because it needs aiohttp.
+"""
+
+import asyncio
+import time
+import aiohttp
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from config import (
+    TWILIO_MAX_RETRIES, TWILIO_RETRY_BACKOFF_SECONDS, TWILIO_TIMEOUT_SECONDS, TWILIO_API_BASE_URL
+)
+from twilio_client import LatencyStats, rewrite_url, should_retry_status
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"}
+
+class AsyncPooledTwilioHttpClient(AsyncTwilioHttpClient):
+    def __init__(
+        self,
+        max_retries=TWILIO_MAX_RETRIES,
+        backoff=TWILIO_RETRY_BACKOFF_SECONDS,
+        timeout=TWILIO_TIMEOUT_SECONDS,
+        base_url=TWILIO_API_BASE_URL
+    ):
+        """
+        Initialize the async HTTP client.
+        
+        Args:
+            max_retries (int): Retries for 429 and 5xx responses and connection errors
+            backoff (float): Exponential backoff factor in seconds
+            timeout (float): Per-request timeout in seconds
+            base_url (str): Replacement for https://api.twilio.com, e.g. a local stub
+        """
+        super().__init__(pool_connections=True, timeout=timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.base_url = base_url
+        self.latency = LatencyStats()
+    
+    async def request(self, method, url, params=None, data=None, headers=None, auth=None, timeout=None, allow_redirects=False):
+        """Send a request through the pooled session, retrying what is safe to retry."""
+        url = rewrite_url(url, self.base_url)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            failed = True
+            response = None
+            try:
+                response = await super().request(
+                    method, url,
+                    params=params,
+                    data=data,
+                    headers=headers,
+                    auth=auth,
+                    timeout=timeout,
+                    allow_redirects=allow_redirects
+                )
+                failed = response.status_code >= 400
+            except aiohttp.ClientConnectorError:
+                # Nothing was sent, so any method can be retried
+                if attempt >= self.max_retries:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # The request may have reached Twilio
+                if attempt >= self.max_retries or method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+            finally:
+                self.latency.record(time.perf_counter() - start, failed)
+            
+            if response is not None and (attempt >= self.max_retries or not should_retry_status(method, response.status_code)):
+                return response
+            
+            delay = self.backoff * 2 ** attempt
+            retry_after = response.headers.get("Retry-After") if response is not None and response.headers else None
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    def get_stats(self):
+        """Get request latency counters, see LatencyStats.get()."""
+        return self.latency.get()
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Shared Twilio REST client backed by a pooled keep-alive HTTP session.
+
+Every call and SMS goes through one client per process, so TLS handshakes and
+connection setup are paid once per pooled connection instead of per request.
+Rate limit and server errors are retried with exponential backoff and request
+latency is recorded for monitoring.
+"""
+
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
+from config import (
+    TWILIO_POOL_SIZE, TWILIO_MAX_RETRIES, TWILIO_RETRY_BACKOFF_SECONDS,
+    TWILIO_TIMEOUT_SECONDS, TWILIO_API_BASE_URL
+)
+
+TWILIO_API_HOST = "https://api.twilio.com"
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Responses that guarantee Twilio did not act on the request, so a POST is safe to repeat
+UNPROCESSED_STATUS_CODES = (429, 503)
+
+def rewrite_url(url, base_url):
+    """Point a Twilio API URL at base_url, e.g. a local stub, if one is set."""
+    if base_url and url.startswith(TWILIO_API_HOST):
+        return base_url.rstrip("/") + url[len(TWILIO_API_HOST):]
+    return url
+
+def should_retry_status(method, status_code):
+    """Check whether a response may be retried without risking a repeated POST."""
+    if method.upper() == "POST":
+        return status_code in UNPROCESSED_STATUS_CODES
+    return status_code in RETRY_STATUS_CODES
+
+class LatencyStats:
+    def __init__(self):
+        """Initialize empty request latency counters."""
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+    
+    def record(self, seconds, failed):
+        """Count one request."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["errors"] += int(failed)
+            self._stats["total_seconds"] += seconds
+            self._stats["max_seconds"] = max(self._stats["max_seconds"], seconds)
+    
+    def get(self):
+        """
+        Get request latency counters.
+        
+        Returns:
+            dict: Request and error counts with average and max latency in ms
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "requests": stats["requests"],
+            "errors": stats["errors"],
+            "average_ms": round(stats["total_seconds"] / stats["requests"] * 1000, 1) if stats["requests"] else 0.0,
+            "max_ms": round(stats["max_seconds"] * 1000, 1)
+        }
+
+class TwilioRetry(Retry):
+    """
+    Retry policy that never repeats a POST that Twilio may already have processed.
+    
+    POST is left out of allowed_methods, so read timeouts and dropped
+    connections after a POST was sent are never retried; connection errors
+    are, since the request never left. A POST is only retried on a response
+    that guarantees Twilio did not act on it.
+    """
+    
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return should_retry_status(method, status_code)
+        return super().is_retry(method, status_code, has_retry_after)
+
+class PooledTwilioHttpClient(TwilioHttpClient):
+    def __init__(
+        self,
+        pool_size=TWILIO_POOL_SIZE,
+        max_retries=TWILIO_MAX_RETRIES,
+        backoff=TWILIO_RETRY_BACKOFF_SECONDS,
+        timeout=TWILIO_TIMEOUT_SECONDS,
+        base_url=TWILIO_API_BASE_URL
+    ):
+        """
+        Initialize the pooled HTTP client.
+        
+        Args:
+            pool_size (int): Keep-alive connections kept open per host
+            max_retries (int): Retries for 429 and 5xx responses
+            backoff (float): Exponential backoff factor in seconds
+            timeout (float): Per-request timeout in seconds
+            base_url (str): Replacement for https://api.twilio.com, e.g. a local stub
+        """
+        super().__init__(pool_connections=True, timeout=timeout)
+        
+        retry = TwilioRetry(
+            total=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self.base_url = base_url
+        self.latency = LatencyStats()
+    
+    def request(self, method, url, params=None, data=None, headers=None, auth=None, timeout=None, allow_redirects=False):
+        """Send a request through the pooled session, recording its latency."""
+        url = rewrite_url(url, self.base_url)
+        
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = super().request(
+                method, url,
+                params=params,
+                data=data,
+                headers=headers,
+                auth=auth,
+                timeout=timeout,
+                allow_redirects=allow_redirects
+            )
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self.latency.record(time.perf_counter() - start, failed)
+    
+    def get_stats(self):
+        """Get request latency counters, see LatencyStats.get()."""
+        return self.latency.get()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_twilio_client():
+    """Get the process-wide Twilio client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client(
+                TWILIO_ACCOUNT_SID,
+                TWILIO_AUTH_TOKEN,
+                http_client=PooledTwilioHttpClient()
+            )
+    return _client
+
+def get_twilio_stats():
+    """Get latency counters for the shared Twilio client."""
+    if _client is None:
+        return {"requests": 0, "errors": 0, "average_ms": 0.0, "max_ms": 0.0}
+    return _client.http_client.get_stats()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Local stand-in for the Twilio REST API, for running the dispatcher offline.
+
+Start it and point config.TWILIO_API_BASE_URL at it:
+
+    python twilio_stub.py --port 8099
+    TWILIO_API_BASE_URL = "http://127.0.0.1:8099"
+
+Calls and messages are accepted and logged with fake SIDs. Use --fail-every
+to answer every Nth request with a 429 and exercise the client's retries.
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# SID prefixes Twilio uses for each resource
+RESOURCE_PREFIXES = {
+    "Calls.json": "CA",
+    "Messages.json": "SM"
+}
+
+class TwilioStubHandler(BaseHTTPRequestHandler):
+    fail_every = 0
+    counter = itertools.count(1)
+    lock = threading.Lock()
+    
+    def do_POST(self):
+        """Create a fake call or message."""
+        resource = self.path.rsplit("/", 1)[-1]
+        prefix = RESOURCE_PREFIXES.get(resource)
+        if prefix is None:
+            self._send_json(404, {"code": 20404, "message": f"Unknown resource {self.path}", "status": 404})
+            return
+        
+        with self.lock:
+            request_number = next(self.counter)
+        if self.fail_every and request_number % self.fail_every == 0:
+            self._send_json(429, {"code": 20429, "message": "Too Many Requests", "status": 429})
+            return
+        
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        sid = prefix + uuid.uuid4().hex
+        
+        print(f"📨 {resource[:-5]} {sid} to {form.get('To')}")
+        self._send_json(201, {
+            "sid": sid,
+            "account_sid": self.path.split("/")[3] if self.path.count("/") >= 4 else None,
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "body": form.get("Body"),
+            "status": "queued",
+            "date_created": datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        })
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Silence the default per-request access log."""
+
+def run_stub(host="127.0.0.1", port=8099, fail_every=0):
+    """
+    Serve the stub Twilio API until interrupted.
+    
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        fail_every (int): Answer every Nth request with a 429, 0 to never fail
+    """
+    TwilioStubHandler.fail_every = fail_every
+    server = ThreadingHTTPServer((host, port), TwilioStubHandler)
+    print(f"🧪 Twilio stub listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub of the Twilio REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+    
+    run_stub(args.host, args.port, args.fail_every)
\ No newline at end of file
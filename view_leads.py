@@ -1,13 +1,32 @@
 """
-Script to view and display leads from leads.json in a formatted table.
+Script to view and display saved leads in a formatted table.
+
+Leads are read lazily from the store's query, filtered and ordered by the
+store, and printed one fixed-size page at a time, so the first page appears
+immediately however many leads there are.
+
+Usage:
+    python view_leads.py [--limit N] [--min-score S] [--since 2024-06-01] [--sort score] [--page-size N]
+                         [--origin CITY] [--destination CITY]
 """
 
-from leads_manager import get_all_leads
+from leads_manager import get_lead_count, get_store
 from tabulate import tabulate
 from datetime import datetime
+from config import VIEW_LEADS_PAGE_SIZE
+import argparse
+import itertools
 import json
 import os
 
+# --sort choice -> store query order
+SORT_ORDERS = {
+    "score": "score",
+    "newest": "timestamp",
+    "oldest": "oldest",
+    "inserted": None
+}
+
 def format_timestamp(timestamp):
     """Format ISO timestamp to a more readable format."""
     try:
@@ -23,48 +42,102 @@ def format_responses(responses):
         formatted.append(f"{key}: {data['response']}")
     return "\n".join(formatted)
 
-def display_leads():
-    """Display all leads in a formatted table."""
-    leads = get_all_leads()
+def display_leads(
+    limit=None, min_score=None, since=None, sort="score", page_size=VIEW_LEADS_PAGE_SIZE, origin=None, destination=None
+):
+    """
+    Display leads in formatted tables, one page at a time.
     
-    if not leads:
-        print("\n❌ No leads found in leads.json")
-        return
-    
-    # Prepare table data
-    headers = ["#", "Phone", "Timestamp", "Responses"]
-    table_data = []
-    
-    for idx, lead in enumerate(leads, 1):
-        row = [
-            idx,
-            lead["phone_number"],
-            format_timestamp(lead["timestamp"]),
-            format_responses(lead["responses"])
-        ]
-        table_data.append(row)
+    Args:
+        limit (int): Most leads to display, all of them if None
+        min_score (float): Only leads scoring at least this much
+        since (datetime): Only leads captured at or after this time
+        sort (str): One of SORT_ORDERS
+        page_size (int): Leads per printed table
+        origin (str): Only leads starting from this location
+        destination (str): Only leads going to this location
+    """
+    store = get_store()
+    leads = store.query(
+        min_score=min_score,
+        since=since,
+        order_by=SORT_ORDERS[sort],
+        limit=limit,
+        origin=origin,
+        destination=destination
+    )
     
     # Print summary
     print("\n" + "="*80)
-    print(f"📊 Lead Summary - Total Leads: {len(leads)}")
+    print(f"📊 Lead Summary - Total Leads: {get_lead_count()}")
     print("="*80)
     
-    # Print table
-    print("\n" + tabulate(
-        table_data,
-        headers=headers,
-        tablefmt="grid",
-        numalign="left",
-        stralign="left"
-    ))
+    headers = ["#", "Score", "Phone", "Timestamp", "Responses"]
+    shown = 0
+    for page_number in itertools.count(1):
+        page = list(itertools.islice(leads, page_size))
+        if not page:
+            break
+        
+        table_data = [
+            [
+                shown + idx,
+                f"{lead.get('score', 0):.2f}",
+                lead["phone_number"],
+                format_timestamp(lead["timestamp"]),
+                format_responses(lead["responses"])
+            ]
+            for idx, lead in enumerate(page, 1)
+        ]
+        shown += len(page)
+        
+        # Print each page as soon as it is read
+        print(f"\n📄 Page {page_number}")
+        print(tabulate(
+            table_data,
+            headers=headers,
+            tablefmt="grid",
+            numalign="left",
+            stralign="left"
+        ), flush=True)
+    
+    if not shown:
+        print(f"\n❌ No matching leads found in {store.path}")
+        return
+    print(f"\n📋 Displayed {shown} leads")
     
     # Print file info
-    file_size = os.path.getsize("leads.json") / 1024  # Size in KB
-    print(f"\n💾 leads.json size: {file_size:.1f} KB")
+    file_size = os.path.getsize(store.path) / 1024  # Size in KB
+    print(f"\n💾 {store.path} size: {file_size:.1f} KB")
+
+def parse_args(argv=None):
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description="View saved trucker leads")
+    parser.add_argument("--limit", type=int, help="Most leads to display")
+    parser.add_argument("--min-score", type=float, help="Only leads scoring at least this much")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only leads captured at or after this time, e.g. 2024-06-01 or 2024-06-01T08:00"
+    )
+    parser.add_argument("--sort", choices=list(SORT_ORDERS), default="score", help="Display order (default: score)")
+    parser.add_argument("--page-size", type=int, default=VIEW_LEADS_PAGE_SIZE, help="Leads per printed table")
+    parser.add_argument("--origin", help="Only leads starting from this location, e.g. --limit 10 --origin Chicago for the top 10")
+    parser.add_argument("--destination", help="Only leads going to this location")
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args()
     try:
-        display_leads()
+        display_leads(
+            limit=args.limit,
+            min_score=args.min_score,
+            since=args.since,
+            sort=args.sort,
+            page_size=args.page_size,
+            origin=args.origin,
+            destination=args.destination
+        )
     except Exception as e:
         print(f"\n❌ Error displaying leads: {str(e)}")
     
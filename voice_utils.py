@@ -1,10 +1,122 @@
 import sounddevice as sd
 import scipy.io.wavfile as wav
+import scipy.signal as signal
 import numpy as np
 import whisper
+import math
 import os
-from twilio.rest import Client
-from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+import queue
+from xml.sax.saxutils import escape
+import threading
+import time
+import resource
+from config import TWILIO_PHONE_NUMBER
+from config import WHISPER_MODEL, WHISPER_DEVICE, WHISPER_FP16, WHISPER_PRELOAD_MODELS
+from config import (
+    MAX_ANSWER_SECONDS, VAD_ENERGY_THRESHOLD, VAD_TRAILING_SILENCE_SECONDS,
+    VAD_NO_SPEECH_TIMEOUT_SECONDS
+)
+from twilio_client import get_twilio_client
+
+# Whisper expects 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Length of the audio blocks the voice activity detector looks at
+VAD_FRAME_SECONDS = 0.03
+
+# Process-wide registry of loaded Whisper models keyed by (name, device, fp16)
+_MODEL_CACHE = {}
+_MODEL_STATS = {}
+_MODEL_LOCK = threading.Lock()
+
+def _resident_memory_mb():
+    """Return the current resident memory of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Fall back to peak RSS (reported in KB on Linux) where /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _model_key(model_name=None, device=None, fp16=None, replica=0):
+    """Build the registry key, filling unset values from config."""
+    return (
+        model_name or WHISPER_MODEL,
+        device or WHISPER_DEVICE,
+        WHISPER_FP16 if fp16 is None else fp16,
+        replica
+    )
+
+def get_whisper_model(model_name=None, device=None, fp16=None, replica=0):
+    """
+    Get a Whisper model, loading it only the first time it is requested.
+    
+    Args:
+        model_name (str): Whisper model size, defaults to config.WHISPER_MODEL
+        device (str): Torch device, defaults to config.WHISPER_DEVICE
+        fp16 (bool): Half precision decoding, defaults to config.WHISPER_FP16
+        replica (int): Independent copy of the model. Whisper installs its
+            decoder cache hooks on the model itself, so threads that decode
+            at the same time each need their own replica.
+    
+    Returns:
+        whisper.Whisper: The loaded model
+    """
+    key = _model_key(model_name, device, fp16, replica)
+    model = _MODEL_CACHE.get(key)
+    if model is not None:
+        return model
+    
+    with _MODEL_LOCK:
+        # Another thread may have loaded the model while we waited for the lock
+        if key in _MODEL_CACHE:
+            return _MODEL_CACHE[key]
+        
+        name, device, fp16, replica = key
+        print(f"Loading Whisper model '{name}' on {device}...")
+        memory_before = _resident_memory_mb()
+        start = time.perf_counter()
+        model = whisper.load_model(name, device=device)
+        load_seconds = time.perf_counter() - start
+        
+        parameter_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        _MODEL_STATS[key] = {
+            "model": name,
+            "device": device,
+            "fp16": fp16,
+            "replica": replica,
+            "load_seconds": round(load_seconds, 2),
+            "parameter_mb": round(parameter_bytes / (1024 * 1024), 1),
+            "resident_mb": round(_resident_memory_mb() - memory_before, 1)
+        }
+        _MODEL_CACHE[key] = model
+        print(f"Whisper model '{name}' loaded in {load_seconds:.2f}s")
+    
+    return model
+
+def warm_up_models(model_names=None):
+    """
+    Load and warm up Whisper models so the first transcription is fast.
+    
+    Args:
+        model_names (list): Model sizes to load, defaults to config.WHISPER_PRELOAD_MODELS
+    
+    Returns:
+        list: Load statistics for each warmed up model
+    """
+    stats = []
+    for name in model_names or WHISPER_PRELOAD_MODELS:
+        key = _model_key(name)
+        model = get_whisper_model(name)
+        # Decode one second of silence to allocate buffers before the first real call
+        model.transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32), fp16=key[2])
+        stats.append(_MODEL_STATS[key])
+    return stats
+
+def get_model_stats():
+    """Get load time and memory statistics for every model in the registry."""
+    return [dict(stats) for stats in _MODEL_STATS.values()]
 
 def record_audio(duration=10, sample_rate=44100, output_file="recording.wav"):
     """
@@ -35,24 +147,258 @@ def record_audio(duration=10, sample_rate=44100, output_file="recording.wav"):
     
     return output_file
 
-def transcribe_audio(file_path):
+def to_float32_mono(audio):
+    """
+    Convert a recorded buffer to the mono float32 layout Whisper expects.
+    
+    Args:
+        audio (np.ndarray): Audio samples, int16 or float, mono or multi-channel
+    
+    Returns:
+        np.ndarray: 1-D float32 samples in the range [-1, 1]
+    """
+    if audio.ndim > 1:
+        audio = audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32, copy=False)
+
+def resample_audio(audio, orig_sample_rate, target_sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Resample a mono buffer with a polyphase filter, without ffmpeg.
+    
+    Args:
+        audio (np.ndarray): 1-D audio samples
+        orig_sample_rate (int): Sample rate of the input buffer
+        target_sample_rate (int): Desired sample rate
+    
+    Returns:
+        np.ndarray: Resampled float32 samples
+    """
+    audio = to_float32_mono(audio)
+    if orig_sample_rate == target_sample_rate:
+        return audio
+    
+    divisor = math.gcd(orig_sample_rate, target_sample_rate)
+    resampled = signal.resample_poly(
+        audio,
+        target_sample_rate // divisor,
+        orig_sample_rate // divisor
+    )
+    return resampled.astype(np.float32, copy=False)
+
+def save_audio(audio, output_file, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Save a float32 buffer as a 16-bit WAV file.
+    
+    Args:
+        audio (np.ndarray): 1-D float32 samples in the range [-1, 1]
+        output_file (str): Path to save the WAV file
+        sample_rate (int): Sample rate of the buffer
+    
+    Returns:
+        str: Path to the saved audio file
+    """
+    samples = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    wav.write(output_file, sample_rate, samples)
+    print(f"Audio saved to {output_file}")
+    return output_file
+
+def frame_energy(audio, sample_rate=WHISPER_SAMPLE_RATE, frame_seconds=VAD_FRAME_SECONDS):
     """
-    Transcribe audio file using OpenAI's Whisper model.
+    Compute the RMS energy of consecutive fixed-size frames.
     
     Args:
-        file_path (str): Path to the audio file
+        audio (np.ndarray): 1-D float32 samples
+        sample_rate (int): Sample rate of the buffer
+        frame_seconds (float): Length of each frame in seconds
+    
+    Returns:
+        tuple: (energies, frame_size) where energies holds one RMS value per frame
+    """
+    frame_size = max(1, int(sample_rate * frame_seconds))
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_size
+    
+    frames = audio[:n_frames * frame_size].reshape(n_frames, frame_size)
+    return np.sqrt(np.mean(frames ** 2, axis=1)), frame_size
+
+def trim_silence(audio, threshold=VAD_ENERGY_THRESHOLD, sample_rate=WHISPER_SAMPLE_RATE, padding=0.2):
+    """
+    Trim leading and trailing silence from a buffer.
+    
+    Args:
+        audio (np.ndarray): 1-D float32 samples
+        threshold (float): RMS level above which a frame counts as speech
+        sample_rate (int): Sample rate of the buffer
+        padding (float): Seconds of audio to keep around the detected speech
+    
+    Returns:
+        np.ndarray: The trimmed samples, empty if no speech was found
+    """
+    energies, frame_size = frame_energy(audio, sample_rate)
+    speech_frames = np.flatnonzero(energies >= threshold)
+    if len(speech_frames) == 0:
+        return audio[:0]
+    
+    pad = int(padding * sample_rate)
+    start = max(0, speech_frames[0] * frame_size - pad)
+    end = min(len(audio), (speech_frames[-1] + 1) * frame_size + pad)
+    return audio[start:end]
+
+def record_until_silence(
+    max_duration=MAX_ANSWER_SECONDS,
+    sample_rate=WHISPER_SAMPLE_RATE,
+    threshold=VAD_ENERGY_THRESHOLD,
+    trailing_silence=VAD_TRAILING_SILENCE_SECONDS,
+    no_speech_timeout=VAD_NO_SPEECH_TIMEOUT_SECONDS
+):
+    """
+    Stream audio from the microphone until the speaker stops talking.
+    
+    Blocks arrive from a sounddevice.InputStream callback and are classified
+    as speech or silence by their RMS energy. Recording ends once speech has
+    been followed by trailing_silence seconds of silence, when nobody speaks
+    within no_speech_timeout, or at max_duration.
+    
+    Args:
+        max_duration (float): Upper bound on the recording in seconds
+        sample_rate (int): Capture sample rate
+        threshold (float): RMS level above which a block counts as speech
+        trailing_silence (float): Seconds of silence that end the answer
+        no_speech_timeout (float): Seconds to wait for speech to start
+    
+    Returns:
+        np.ndarray: 1-D float32 samples at the capture sample rate
+    """
+    blocks = queue.Queue()
+    
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+    
+    chunks = []
+    recorded = 0.0
+    silence = 0.0
+    speech_started = False
+    
+    with sd.InputStream(
+        samplerate=sample_rate,
+        channels=1,
+        dtype='float32',
+        blocksize=int(sample_rate * VAD_FRAME_SECONDS),
+        callback=callback
+    ):
+        while recorded < max_duration:
+            try:
+                block = blocks.get(timeout=1.0)
+            except queue.Empty:
+                print("⚠️ Audio input stalled, stopping recording")
+                break
+            
+            chunks.append(block)
+            block_seconds = len(block) / sample_rate
+            recorded += block_seconds
+            
+            if np.sqrt(np.mean(block ** 2)) >= threshold:
+                speech_started = True
+                silence = 0.0
+                continue
+            
+            silence += block_seconds
+            if speech_started and silence >= trailing_silence:
+                break
+            if not speech_started and silence >= no_speech_timeout:
+                break
+    
+    print(f"Recorded {recorded:.1f} seconds of audio")
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks)
+
+def record_audio_buffer(duration=10, sample_rate=WHISPER_SAMPLE_RATE, output_file=None, stop_on_silence=False):
+    """
+    Record audio from the microphone straight into a Whisper-ready buffer.
+    
+    Args:
+        duration (int): Recording duration in seconds, the upper bound when
+            stop_on_silence is set
+        sample_rate (int): Capture sample rate, resampled to 16 kHz if different
+        output_file (str): Optional path to also save the recording as a WAV file
+        stop_on_silence (bool): Stream the recording and stop once the speaker
+            goes quiet, then trim leading and trailing silence
+    
+    Returns:
+        np.ndarray: 1-D float32 samples at 16 kHz
+    """
+    if stop_on_silence:
+        print(f"Recording up to {duration} seconds of audio...")
+        recording = record_until_silence(max_duration=duration, sample_rate=sample_rate)
+        audio = trim_silence(resample_audio(recording, sample_rate))
+        
+        if output_file:
+            save_audio(audio, output_file)
+        
+        return audio
+    
+    print(f"Recording {duration} seconds of audio...")
+    
+    recording = sd.rec(
+        int(duration * sample_rate),
+        samplerate=sample_rate,
+        channels=1,
+        dtype='float32'
+    )
+    sd.wait()  # Wait until recording is finished
+    
+    audio = resample_audio(recording, sample_rate)
+    
+    if output_file:
+        save_audio(audio, output_file)
+    
+    return audio
+
+def transcribe_audio(audio, model_name=None, replica=0):
+    """
+    Transcribe audio using OpenAI's Whisper model.
+    
+    Args:
+        audio (str or np.ndarray): Path to an audio file, or a 16 kHz buffer
+            from record_audio_buffer which skips the disk read and ffmpeg
+        model_name (str): Whisper model size, defaults to config.WHISPER_MODEL
+        replica (int): Model replica to use, see get_whisper_model
     
     Returns:
         str: Transcribed text
     """
-    print("Loading Whisper model...")
-    model = whisper.load_model("base")
+    model = get_whisper_model(model_name, replica=replica)
+    
+    if isinstance(audio, np.ndarray):
+        audio = to_float32_mono(audio)
+        if audio.size == 0:
+            return ""
     
     print("Transcribing audio...")
-    result = model.transcribe(file_path)
+    result = model.transcribe(audio, fp16=_model_key(model_name)[2])
     
     return result["text"]
 
+def build_say_twiml(message):
+    """
+    Build the TwiML document that speaks a single message.
+    
+    Args:
+        message (str): Message to speak during the call
+    
+    Returns:
+        str: TwiML document
+    """
+    return f"""
+        <Response>
+            <Say>{escape(message)}</Say>
+        </Response>
+        """
+
 def make_call(to_number, message):
     """
     Make an outbound call using Twilio and speak the message.
@@ -65,15 +411,11 @@ def make_call(to_number, message):
         str: Call SID if successful
     """
     try:
-        # Initialize Twilio client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        # Reuse the shared pooled Twilio client
+        client = get_twilio_client()
         
         # Create TwiML for the call
-        twiml = f"""
-        <Response>
-            <Say>{message}</Say>
-        </Response>
-        """
+        twiml = build_say_twiml(message)
         
         # Make the call
         call = client.calls.create(
@@ -92,10 +434,10 @@ def make_call(to_number, message):
 # Example usage
 if __name__ == "__main__":
     # Record audio
-    audio_file = record_audio()
+    audio = record_audio_buffer()
     
     # Transcribe audio
-    transcription = transcribe_audio(audio_file)
+    transcription = transcribe_audio(audio)
     print(f"Transcription: {transcription}")
     
     # Make a test call (uncomment to test)